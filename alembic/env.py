@@ -47,7 +47,7 @@ if config.config_file_name is not None:
 
 from src.agent.models import Agent
 from src.session.models import Session
-from src.message.models import Message
+from src.message.models import Message, MessageArchive
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
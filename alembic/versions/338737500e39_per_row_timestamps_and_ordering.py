@@ -0,0 +1,72 @@
+"""per row timestamps and ordering
+
+`created_at` used to be evaluated once at import, so existing rows share a
+handful of timestamps. Rows are backfilled from the millisecond timestamp
+embedded in their UUID7 id, and messages get a (session_id, id) index for
+ordered conversation scans.
+
+Revision ID: 338737500e39
+Revises: 4c83e828770b
+Create Date: 2026-10-19 13:14:40.120934
+
+"""
+import datetime
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '338737500e39'
+down_revision: Union[str, Sequence[str], None] = '4c83e828770b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+cairo_tz = ZoneInfo('Africa/Cairo')
+
+
+def _uuid7_datetime(value) -> datetime.datetime:
+    """Creation time stored in the first 48 bits of a UUID7, text or binary."""
+    if isinstance(value, str):
+        millis = int(value.replace("-", "")[:12], 16)
+    else:
+        millis = int.from_bytes(bytes(value)[:6], "big")
+    return datetime.datetime.fromtimestamp(millis / 1000, cairo_tz)
+
+
+def _backfill_created_at(table_name: str) -> None:
+    conn = op.get_bind()
+    table = sa.table(table_name, sa.column("id"), sa.column("created_at", sa.DateTime))
+    stmt = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam("_id"))
+        .values(created_at=sa.bindparam("_created_at"))
+    )
+    last_id = None
+    while True:
+        query = sa.select(table.c.id).order_by(table.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        ids = conn.execute(query).scalars().all()
+        if not ids:
+            break
+        conn.execute(stmt, [{"_id": value, "_created_at": _uuid7_datetime(value)} for value in ids])
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in ("agents", "sessions", "messages"):
+        _backfill_created_at(table_name)
+    op.create_index('ix_messages_session_id_id', 'messages', ['session_id', 'id'], unique=False)
+    op.drop_index(op.f('ix_messages_session_id'), table_name='messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # backfilled timestamps are correct, only the index is reverted
+    op.create_index(op.f('ix_messages_session_id'), 'messages', ['session_id'], unique=False)
+    op.drop_index('ix_messages_session_id_id', table_name='messages')
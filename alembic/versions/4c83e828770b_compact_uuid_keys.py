@@ -0,0 +1,37 @@
+"""compact uuid keys
+
+Drops the redundant secondary indexes on primary keys. Binary ids
+(`DB_BINARY_UUID`) used to be converted here, depending on the setting at
+the time the revision ran; revision 9b3f6e1d2c47 converts them now, in both
+directions.
+
+Revision ID: 4c83e828770b
+Revises: ba8df38ae9ed
+Create Date: 2026-10-19 13:05:12.418302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c83e828770b'
+down_revision: Union[str, Sequence[str], None] = 'ba8df38ae9ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # primary keys are already indexed by the table itself
+    op.drop_index(op.f('ix_agents_id'), table_name='agents')
+    op.drop_index(op.f('ix_sessions_id'), table_name='sessions')
+    op.drop_index(op.f('ix_messages_id'), table_name='messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+    op.create_index(op.f('ix_sessions_id'), 'sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_agents_id'), 'agents', ['id'], unique=False)
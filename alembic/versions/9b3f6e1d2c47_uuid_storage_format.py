@@ -0,0 +1,40 @@
+"""uuid storage format
+
+Stores every id and foreign key in the form selected by `DB_BINARY_UUID`: 16 raw
+bytes, or the 36 character text form. Converts in both directions, so switching the
+setting and running `python -m src.common.uuid_storage` (the same conversion) works
+on databases past this revision; the app refuses to start on a mismatch.
+
+Revision ID: 9b3f6e1d2c47
+Revises: e5b0c7d19a26
+Create Date: 2026-10-19 22:14:08.305117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.core import settings
+from src.common.uuid_storage import convert_uuid_storage
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3f6e1d2c47'
+down_revision: Union[str, Sequence[str], None] = 'e5b0c7d19a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    convert_uuid_storage(op.get_bind(), binary=settings.DB_BINARY_UUID)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    # earlier revisions store text ids
+    convert_uuid_storage(op.get_bind(), binary=False)
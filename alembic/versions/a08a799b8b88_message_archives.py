@@ -0,0 +1,42 @@
+"""message archives
+
+Revision ID: a08a799b8b88
+Revises: f667c872e9ef
+Create Date: 2026-10-19 13:48:21.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.common import uuid_column_type
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a08a799b8b88'
+down_revision: Union[str, Sequence[str], None] = 'f667c872e9ef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_archives',
+    sa.Column('session_id', uuid_column_type(), nullable=False),
+    sa.Column('codec', sa.String(length=8), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', uuid_column_type(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('id', uuid_column_type(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('message_archives')
@@ -0,0 +1,34 @@
+"""message usage and token quota
+
+Revision ID: a83e5c19f0b4
+Revises: d41f7a9c2e63
+Create Date: 2026-10-19 18:02:11.304117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83e5c19f0b4'
+down_revision: Union[str, Sequence[str], None] = 'd41f7a9c2e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('cached_tokens', sa.Integer(), nullable=True))
+    op.add_column('messages', sa.Column('audio_seconds', sa.Float(), nullable=True))
+    op.add_column('agents', sa.Column('token_quota', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('agents', schema=None) as batch_op:
+        batch_op.drop_column('token_quota')
+    # plain ALTER TABLE DROP COLUMN (SQLite 3.35+), a batch table copy would break the FTS view and triggers
+    op.drop_column('messages', 'audio_seconds')
+    op.drop_column('messages', 'cached_tokens')
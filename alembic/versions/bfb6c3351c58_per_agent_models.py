@@ -0,0 +1,35 @@
+"""per agent models
+
+Revision ID: bfb6c3351c58
+Revises: a08a799b8b88
+Create Date: 2026-10-19 15:02:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bfb6c3351c58'
+down_revision: Union[str, Sequence[str], None] = 'a08a799b8b88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('agents', sa.Column('model', sa.String(length=100), nullable=True))
+    op.add_column('agents', sa.Column('tts_model', sa.String(length=100), nullable=True))
+    op.add_column('agents', sa.Column('tts_voice', sa.String(length=50), nullable=True))
+    op.add_column('agents', sa.Column('stt_model', sa.String(length=100), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('agents', schema=None) as batch_op:
+        batch_op.drop_column('stt_model')
+        batch_op.drop_column('tts_voice')
+        batch_op.drop_column('tts_model')
+        batch_op.drop_column('model')
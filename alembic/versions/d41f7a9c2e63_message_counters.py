@@ -0,0 +1,57 @@
+"""message counters
+
+Revision ID: d41f7a9c2e63
+Revises: bfb6c3351c58
+Create Date: 2026-10-19 16:10:37.520914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f7a9c2e63'
+down_revision: Union[str, Sequence[str], None] = 'bfb6c3351c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTER_TABLES = ('sessions', 'agents')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('input_tokens', sa.Integer(), nullable=True))
+    op.add_column('messages', sa.Column('output_tokens', sa.Integer(), nullable=True))
+    for table in COUNTER_TABLES:
+        op.add_column(table, sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('last_message_at', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('input_tokens', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('output_tokens', sa.Integer(), server_default='0', nullable=False))
+    # backfill from the hot messages and the archive row counts, token usage was not recorded so far;
+    # the counter repair job also reads archived messages for their last timestamp
+    op.execute("""
+        UPDATE sessions SET
+            message_count = (SELECT count(*) FROM messages m WHERE m.session_id = sessions.id)
+                + coalesce((SELECT a.message_count FROM message_archives a WHERE a.session_id = sessions.id), 0),
+            last_message_at = (SELECT max(m.created_at) FROM messages m WHERE m.session_id = sessions.id)
+    """)
+    op.execute("""
+        UPDATE agents SET
+            message_count = (SELECT coalesce(sum(s.message_count), 0) FROM sessions s WHERE s.agent_id = agents.id),
+            last_message_at = (SELECT max(s.last_message_at) FROM sessions s WHERE s.agent_id = agents.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(COUNTER_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('output_tokens')
+            batch_op.drop_column('input_tokens')
+            batch_op.drop_column('last_message_at')
+            batch_op.drop_column('message_count')
+    # plain ALTER TABLE DROP COLUMN (SQLite 3.35+), a batch table copy would break the FTS view and triggers
+    op.drop_column('messages', 'output_tokens')
+    op.drop_column('messages', 'input_tokens')
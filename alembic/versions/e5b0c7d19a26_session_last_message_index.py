@@ -0,0 +1,30 @@
+"""session last message index
+
+Lets the message archiver find inactive sessions from `sessions.last_message_at`
+instead of grouping the whole messages table.
+
+Revision ID: e5b0c7d19a26
+Revises: a83e5c19f0b4
+Create Date: 2026-10-19 20:41:37.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b0c7d19a26'
+down_revision: Union[str, Sequence[str], None] = 'a83e5c19f0b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_sessions_last_message_at'), 'sessions', ['last_message_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_sessions_last_message_at'), table_name='sessions')
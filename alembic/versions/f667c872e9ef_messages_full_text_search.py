@@ -0,0 +1,124 @@
+"""messages full text search
+
+FTS5 index over `messages.content` kept in sync by triggers.
+
+The index reads its content through the `messages_fts_source` view, which
+applies a light Arabic normalization (strip tashkeel and tatweel, unify
+alef/yeh/teh marbuta forms), so "كَتَبَ" and "كتب" index the same tokens and
+snippets stay consistent with what was indexed. Latin diacritics are folded
+by the `unicode61` tokenizer.
+
+The index is keyed on `messages_fts_keys`, an `INTEGER PRIMARY KEY` per message
+id: the implicit rowid of `messages` (its primary key is the TEXT id) may be
+renumbered by VACUUM or a table copy, which would silently desync the index.
+
+Batch (table copy) migrations on `messages` drop these triggers, any later
+migration doing one must recreate them and run the 'rebuild' command.
+
+Revision ID: f667c872e9ef
+Revises: 338737500e39
+Create Date: 2026-10-19 13:26:03.771520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f667c872e9ef'
+down_revision: Union[str, Sequence[str], None] = '338737500e39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (code point, replacement) applied to indexed text, mirrored by the query side in src/message/search.py
+ARABIC_NORMALIZATION = (
+    *((code_point, "") for code_point in range(0x064B, 0x0653)),  # tashkeel (fathatan .. sukun)
+    (0x0670, ""),  # superscript alef
+    (0x0640, ""),  # tatweel
+    (0x0622, "ا"),  # alef with madda -> alef
+    (0x0623, "ا"),  # alef with hamza above -> alef
+    (0x0625, "ا"),  # alef with hamza below -> alef
+    (0x0649, "ي"),  # alef maksura -> yeh
+    (0x0629, "ه"),  # teh marbuta -> heh
+)
+
+
+def normalized_sql(expression: str) -> str:
+    """Wraps a SQL text expression with the Arabic normalization replaces."""
+    for code_point, replacement in ARABIC_NORMALIZATION:
+        expression = f"replace({expression}, char({code_point}), '{replacement}')"
+    return expression
+
+
+def fts_key(message_id: str) -> str:
+    return f"(SELECT rowid FROM messages_fts_keys WHERE message_id = {message_id})"
+
+
+def fts_statements() -> list[str]:
+    return [
+        # untyped message_id, so it also holds the binary ids of DB_BINARY_UUID as they are
+        """
+        CREATE TABLE messages_fts_keys (
+            rowid INTEGER PRIMARY KEY,
+            message_id NOT NULL UNIQUE
+        )
+        """,
+        "INSERT INTO messages_fts_keys (message_id) SELECT id FROM messages ORDER BY id",
+        f"""
+        CREATE VIEW messages_fts_source AS
+        SELECT k.rowid AS message_rowid, {normalized_sql('m.content')} AS content
+        FROM messages_fts_keys k JOIN messages m ON m.id = k.message_id
+        """,
+        """
+        CREATE VIRTUAL TABLE messages_fts USING fts5(
+            content,
+            content='messages_fts_source',
+            content_rowid='message_rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER messages_fts_after_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts_keys (message_id) VALUES (new.id);
+            INSERT INTO messages_fts(rowid, content) VALUES ({fts_key('new.id')}, {normalized_sql('new.content')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER messages_fts_after_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', {fts_key('old.id')}, {normalized_sql('old.content')});
+            DELETE FROM messages_fts_keys WHERE message_id = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER messages_fts_after_update AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', {fts_key('old.id')}, {normalized_sql('old.content')});
+            INSERT INTO messages_fts(rowid, content) VALUES ({fts_key('new.id')}, {normalized_sql('new.content')});
+        END
+        """,
+        # index the rows that already exist
+        "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in fts_statements():
+        op.execute(sa.text(statement))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_after_update")
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_after_delete")
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_after_insert")
+    op.execute("DROP TABLE IF EXISTS messages_fts")
+    op.execute("DROP VIEW IF EXISTS messages_fts_source")
+    op.execute("DROP TABLE IF EXISTS messages_fts_keys")
@@ -0,0 +1,190 @@
+"""
+Fake OpenAI-compatible server for offline load tests.
+
+Implements the endpoints the platform uses, with configurable latency, jitter,
+error rate and streaming speed, and no API quota:
+
+    POST /v1/responses              (JSON or `stream: true` server-sent events)
+    POST /v1/audio/speech           (silent MP3 frames, length grows with the input)
+    POST /v1/audio/transcriptions   (canned transcript)
+    GET  /v1/models                 (the platform's startup warm-up)
+
+    python benchmarks/fake_openai.py --port 9100 --latency-ms 800 --jitter-ms 200 --error-rate 0.01
+
+then run the platform with `OPENAI_BASE_URL=http://127.0.0.1:9100/v1`.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417 byte frames of 1152 samples (~26 ms)
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+MP3_FRAME_SECONDS = 1152 / 44100
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 500  # time to first token / full response
+    jitter_ms: float = 100  # uniform +/- jitter on every latency
+    error_rate: float = 0.0  # share of requests answered with a 500 (or 429, see below)
+    rate_limit_share: float = 0.5  # share of injected errors that are 429 instead of 500
+    tokens_per_second: float = 50  # streaming speed and extra latency per generated token
+    reply_words: int = 40  # words in every generated reply
+    stt_latency_ms: float = 300
+    tts_latency_ms: float = 400
+    seed: int = 0
+
+
+def mp3_silence(seconds: float) -> bytes:
+    """Silent but well-formed MP3 of roughly `seconds`, recognised as audio/mpeg by libmagic."""
+    return MP3_FRAME * max(1, round(seconds / MP3_FRAME_SECONDS))
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    rng = random.Random(config.seed)
+    words = "the order was shipped yesterday and should arrive within three business days".split()
+
+    async def wait(base_ms: float) -> None:
+        delay = base_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+    def injected_error() -> Response | None:
+        if rng.random() >= config.error_rate:
+            return None
+        if rng.random() < config.rate_limit_share:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after-ms": "100"},
+            )
+        return JSONResponse(
+            {"error": {"message": "The server had an error (fake)", "type": "server_error", "code": None}},
+            status_code=500,
+        )
+
+    def reply_text(user_input) -> str:
+        last = user_input[-1]["content"] if isinstance(user_input, list) and user_input else str(user_input)
+        body = " ".join(rng.choice(words) for _ in range(config.reply_words))
+        return f"Re: {str(last)[:40]} - {body}"
+
+    def usage(messages, text: str) -> dict:
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in messages) if isinstance(messages, list) else 1
+        output_tokens = len(text.split())
+        return {
+            "input_tokens": prompt_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": prompt_tokens + output_tokens,
+        }
+
+    def response_object(model: str, text: str, status: str, usage_data: dict | None) -> dict:
+        message_id = f"msg_{uuid.uuid4().hex}"
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": status,
+            "model": model,
+            "output": [{
+                "type": "message",
+                "id": message_id,
+                "status": status,
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }] if text else [],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": usage_data,
+        }
+
+    @app.post("/v1/responses")
+    async def responses(request: Request):
+        body = await request.json()
+        if (error := injected_error()) is not None:
+            await wait(config.latency_ms / 4)
+            return error
+        model = body.get("model", "fake-model")
+        text = reply_text(body.get("input"))
+        if not body.get("stream"):
+            await wait(config.latency_ms + len(text.split()) / config.tokens_per_second * 1000)
+            return response_object(model, text, "completed", usage(body.get("input"), text))
+
+        async def events():
+            sequence = 0
+
+            def event(kind: str, **data) -> str:
+                nonlocal sequence
+                sequence += 1
+                return f"event: {kind}\ndata: {json.dumps({'type': kind, 'sequence_number': sequence, **data})}\n\n"
+
+            yield event("response.created", response=response_object(model, "", "in_progress", None))
+            await wait(config.latency_ms)
+            for index, word in enumerate(text.split(" ")):
+                yield event(
+                    "response.output_text.delta",
+                    item_id="msg_fake", output_index=0, content_index=0,
+                    delta=word if index == 0 else " " + word,
+                )
+                await asyncio.sleep(1 / config.tokens_per_second)
+            yield event("response.completed", response=response_object(model, text, "completed", usage(body.get("input"), text)))
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/audio/speech")
+    async def speech(request: Request):
+        body = await request.json()
+        if (error := injected_error()) is not None:
+            return error
+        await wait(config.tts_latency_ms)
+        # ~15 characters of speech per second
+        return Response(mp3_silence(len(body.get("input", "")) / 15), media_type="audio/mpeg")
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        form = await request.form()
+        upload = form.get("file")
+        size = len(await upload.read()) if upload is not None else 0
+        if (error := injected_error()) is not None:
+            return error
+        await wait(config.stt_latency_ms)
+        return {"text": f"transcribed voice note of {size} bytes, where is my order?"}
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model", "created": 0, "owned_by": "fake"}]}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=FakeConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=FakeConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate)
+    parser.add_argument("--rate-limit-share", type=float, default=FakeConfig.rate_limit_share)
+    parser.add_argument("--tokens-per-second", type=float, default=FakeConfig.tokens_per_second)
+    parser.add_argument("--reply-words", type=int, default=FakeConfig.reply_words)
+    parser.add_argument("--stt-latency-ms", type=float, default=FakeConfig.stt_latency_ms)
+    parser.add_argument("--tts-latency-ms", type=float, default=FakeConfig.tts_latency_ms)
+    parser.add_argument("--seed", type=int, default=FakeConfig.seed)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeConfig(**{key: value for key, value in vars(args).items() if key not in ("host", "port")})
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Full-text search benchmark: FTS5 `MATCH` vs `LIKE '%...%'` over a generated corpus.
+
+Builds a throwaway SQLite database with the `messages` table, the FTS5 index and
+triggers from the "messages full text search" migration, fills it with a mixed
+Arabic/English corpus and times both query styles.
+
+    python benchmarks/fts_search.py --rows 2000000 --sessions 20000
+
+Only needs the standard library sqlite3 module (with FTS5) plus alembic/sqlalchemy
+to import the migration.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MIGRATION = ROOT / "alembic" / "versions" / "f667c872e9ef_messages_full_text_search.py"
+
+ENGLISH_WORDS = (
+    "order delivery refund invoice account password reset shipping address payment card "
+    "subscription cancel upgrade plan support ticket status tracking return warranty product "
+    "price discount coupon voice message agent session hello thanks please help problem"
+).split()
+ARABIC_WORDS = (
+    "طلب توصيل استرداد فاتورة حساب كلمة المرور شحن عنوان دفع بطاقة اشتراك إلغاء ترقية خطة "
+    "دعم تذكرة حالة تتبع إرجاع ضمان منتج سعر خصم قسيمة رسالة صوتية مرحبا شكرا مساعدة مشكلة "
+    "كَتَبَ الطالبُ الدرسَ أحمد إبراهيم مدرسة"
+).split()
+# words sprinkled into ~1 in RARE_EVERY messages, the typical "find that conversation" search
+RARE_WORDS = ("zephyr", "زمرد")
+RARE_EVERY = 5000
+# (label, query) frequent terms rank a large share of the table, rare/absent ones are where LIKE scans everything
+QUERIES = (
+    ("frequent", "refund"),
+    ("frequent", "password reset"),
+    ("frequent-ar", "كلمة المرور"),
+    ("diacritics", "كتب"),
+    ("rare", "zephyr"),
+    ("rare-ar", "زمرد"),
+    ("absent", "quasar"),
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("fts_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_schema(conn: sqlite3.Connection, migration) -> None:
+    conn.execute("""
+        CREATE TABLE messages (
+            session_id VARCHAR(36) NOT NULL,
+            role VARCHAR(9) NOT NULL,
+            content TEXT NOT NULL,
+            type VARCHAR(5) NOT NULL,
+            id VARCHAR(36) NOT NULL PRIMARY KEY,
+            created_at DATETIME,
+            updated_at DATETIME
+        )
+    """)
+    conn.execute("CREATE INDEX ix_messages_session_id_id ON messages (session_id, id)")
+    for statement in migration.fts_statements():
+        conn.execute(statement)
+
+
+def generate_rows(rows: int, sessions: int, seed: int):
+    rnd = random.Random(seed)
+    session_ids = [str(uuid.UUID(int=rnd.getrandbits(128))) for _ in range(sessions)]
+    for index in range(rows):
+        words = ARABIC_WORDS if rnd.random() < 0.5 else ENGLISH_WORDS
+        content = " ".join(rnd.choices(words, k=rnd.randint(5, 40)))
+        if rnd.randrange(RARE_EVERY) == 0:
+            content += " " + rnd.choice(RARE_WORDS)
+        yield (
+            rnd.choice(session_ids), "user" if index % 2 == 0 else "assistant",
+            content, "text", f"{index:032x}",
+        )
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"  {name:<8} p50 {statistics.median(samples) * 1000:9.2f}ms  p95 {p95 * 1000:9.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", help="database path, a temporary file by default")
+    args = parser.parse_args()
+
+    migration = load_migration()
+    path = args.db or os.path.join(tempfile.mkdtemp(), "fts_bench.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    create_schema(conn, migration)
+
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(
+            "INSERT INTO messages (session_id, role, content, type, id) VALUES (?, ?, ?, ?, ?)",
+            generate_rows(args.rows, args.sessions, args.seed),
+        )
+    elapsed = time.perf_counter() - start
+    print(f"inserted {args.rows} messages through the FTS triggers in {elapsed:.1f}s "
+          f"({args.rows / elapsed:,.0f} rows/s), db size {os.path.getsize(path) / 1e6:.1f} MB")
+
+    session_id = conn.execute("SELECT session_id FROM messages LIMIT 1").fetchone()[0]
+    match_sql = """
+        SELECT m.id, snippet(messages_fts, 0, '<mark>', '</mark>', '…', 16), bm25(messages_fts) AS rank
+        FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid
+        WHERE messages_fts MATCH ?{filter} ORDER BY rank LIMIT 20
+    """
+    like_sql = "SELECT id FROM messages WHERE content LIKE ?{filter} LIMIT 20"
+    normalization = dict((chr(code), value or None) for code, value in migration.ARABIC_NORMALIZATION)
+    for label, query in QUERIES:
+        fts_query = " ".join('"' + term + '"' for term in query.translate(str.maketrans(normalization)).split())
+        print(f"{label} {query!r}")
+        report("match", timed(conn, match_sql.format(filter=""), (fts_query,), args.repeat))
+        report("like", timed(conn, like_sql.format(filter=""), (f"%{query}%",), args.repeat))
+        report("match/s", timed(conn, match_sql.format(filter=" AND m.session_id = ?"), (fts_query, session_id), args.repeat))
+        report("like/s", timed(conn, like_sql.format(filter=" AND session_id = ?"), (f"%{query}%", session_id), args.repeat))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
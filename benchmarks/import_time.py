@@ -0,0 +1,75 @@
+"""
+Import time of the platform's entry points, from `python -X importtime`.
+
+Every module is imported in a fresh interpreter `--repeat` times; the script reports the
+median total and the packages contributing most (self time summed per top-level
+package) so slow imports can be spotted and made lazy:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py src.main src.message.models --repeat 7 --top 15
+
+`src.main` is what every uvicorn worker pays before serving, `src.message.models`
+roughly what alembic and the scripts pay.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# settings without defaults, only needed so the modules import
+ENV_DEFAULTS = {
+    "APP_VERSION": "v1",
+    "DATABASE_URL": "sqlite+aiosqlite:///import_time.db",
+    "OPENAI_API_KEY": "unused",
+}
+
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """Imports `module` in a new interpreter, returns the total and self time per package, in ms."""
+    env = {**ENV_DEFAULTS, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    packages: dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        packages[name.split(".")[0] if not name.startswith("src.") else ".".join(name.split(".")[:2])] += int(self_us) / 1000
+        if len(indent) == 1:  # top level imports of the `-c` statement
+            total += int(cumulative_us) / 1000
+    return total, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=["src.main", "src.message.models"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages listed per module")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        by_package: dict[str, list[float]] = defaultdict(list)
+        for _, packages in runs:
+            for name, ms in packages.items():
+                by_package[name].append(ms)
+        print(f"{module}: median {statistics.median(totals):.1f} ms (min {min(totals):.1f}, max {max(totals):.1f}, {args.repeat} runs)")
+        ranked = sorted(by_package.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for name, values in ranked[:args.top]:
+            print(f"    {statistics.median(values):8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
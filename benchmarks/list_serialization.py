@@ -0,0 +1,143 @@
+"""
+List endpoint serialization benchmark: ORM objects + response model vs column tuples + orjson.
+
+Builds a throwaway SQLite database (tables from the ORM metadata), fills it with agents,
+sessions and messages, then times one page of each list endpoint both ways at the
+service level:
+
+- `orm`: what the endpoints do by default, the service returns ORM instances (with
+  their eager loaded relationships), FastAPI validates them against the response model
+  (`from_attributes`), dumps them to JSON compatible data and `json.dumps` it.
+- `fast`: what `FAST_LIST_SERIALIZATION=true` does, the repository selects only the
+  response model's columns and the tuples are written with orjson.
+
+    python benchmarks/list_serialization.py
+    python benchmarks/list_serialization.py --page 100 --messages 200 --repeat 300
+
+Both outputs are compared once, so a mismatch between the two paths is reported too.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# settings without defaults, only needed so the modules import
+for name, value in {"APP_VERSION": "v1", "OPENAI_API_KEY": "unused", "DATABASE_URL": "sqlite+aiosqlite:///unused.db"}.items():
+    os.environ.setdefault(name, value)
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from src.common import Base  # noqa: E402
+from src.agent import Agent  # noqa: E402
+from src.agent.repository import AgentRepository  # noqa: E402
+from src.agent.schemas import AgentRead  # noqa: E402
+from src.agent.service import AgentService  # noqa: E402
+from src.session import Session  # noqa: E402
+from src.session.repository import SessionRepository  # noqa: E402
+from src.session.schemas import Session as SessionRead  # noqa: E402
+from src.session.service import SessionService  # noqa: E402
+from src.message.models import Message  # noqa: E402
+from src.message.repository import MessageRepository  # noqa: E402
+from src.message.schemas import Message as MessageRead  # noqa: E402
+from src.message.service import MessageService  # noqa: E402
+from src.message.types import MessageRole, MessageType  # noqa: E402
+
+
+async def seed(sessionmaker, agents: int, messages: int) -> str:
+    """One session per agent, `messages` messages in each; returns a session id to list."""
+    async with sessionmaker() as db:
+        for index in range(agents):
+            agent = Agent(name=f"agent {index}", prompt="You are a helpful support agent. " * 8, model="gpt-4o-mini")
+            session = Session(agent=agent, title=f"conversation {index}")
+            session.messages = [
+                Message(
+                    role=MessageRole.USER if position % 2 == 0 else MessageRole.ASSISTANT,
+                    type=MessageType.TEXT,
+                    content=f"message {position} of conversation {index}, " + "lorem ipsum dolor sit amet " * 6,
+                )
+                for position in range(messages)
+            ]
+            db.add(agent)
+        await db.commit()
+        return session.id
+
+
+def orm_response(schema) -> Callable[[list], bytes]:
+    """What FastAPI does with a `response_model`: validate from attributes, dump, json.dumps."""
+    adapter = TypeAdapter(list[schema])
+
+    def render(items: list) -> bytes:
+        data = adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    return render
+
+
+async def measure(sessionmaker, call: Callable[..., Awaitable], repeat: int) -> tuple[list[float], bytes]:
+    timings, body = [], b""
+    for _ in range(repeat):
+        async with sessionmaker() as db:
+            started = time.perf_counter()
+            body = await call(db)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, body
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/bench.db")
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_id = await seed(sessionmaker, args.agents, args.messages)
+        page = args.page
+
+        render_agents, render_sessions, render_messages = orm_response(AgentRead), orm_response(SessionRead), orm_response(MessageRead)
+        cases = {
+            "GET /agent/": (
+                lambda db: AgentService(AgentRepository(db)).list_agents(limit=page),
+                lambda db: AgentService(AgentRepository(db)).list_agents_json(limit=page),
+                render_agents,
+            ),
+            "GET /session/": (
+                lambda db: SessionService(SessionRepository(db)).list_sessions(limit=page),
+                lambda db: SessionService(SessionRepository(db)).list_sessions_json(limit=page),
+                render_sessions,
+            ),
+            "GET /message/conversation/{id}": (
+                lambda db: MessageService(MessageRepository(db)).list_session_messages(session_id, limit=page),
+                lambda db: MessageService(MessageRepository(db)).list_session_messages_json(session_id, limit=page),
+                render_messages,
+            ),
+        }
+        print(f"{args.agents} agents/sessions, {args.messages} messages per session, page of {page}, {args.repeat} runs")
+        print(f"{'endpoint':<32} {'orm p50 ms':>11} {'fast p50 ms':>12} {'speedup':>8}  same output")
+        for label, (orm_list, fast_list, render) in cases.items():
+            async def orm_call(db, orm_list=orm_list, render=render):
+                return render(list(await orm_list(db)))
+            orm_timings, orm_body = await measure(sessionmaker, orm_call, args.repeat)
+            fast_timings, fast_body = await measure(sessionmaker, fast_list, args.repeat)
+            orm_p50, fast_p50 = statistics.median(orm_timings), statistics.median(fast_timings)
+            same = json.loads(orm_body) == json.loads(fast_body)
+            print(f"{label:<32} {orm_p50:>11.2f} {fast_p50:>12.2f} {orm_p50 / fast_p50:>7.1f}x  {'yes' if same else 'NO'}")
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=100, help="agents, each with one session")
+    parser.add_argument("--messages", type=int, default=100, help="messages per session")
+    parser.add_argument("--page", type=int, default=100, help="limit of every list call")
+    parser.add_argument("--repeat", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Load test for the message endpoints, against the fake OpenAI server so no quota is used.
+
+Runs each scenario with a fixed number of concurrent clients and reports throughput,
+p50/p95/p99 latency, errors, DB round-trips per request (from the `db_query`
+stage count on `/metrics`) and the p99 event loop lag of the platform while the
+scenario ran (from `event_loop_lag_seconds`):
+
+    text    POST /message/text
+    voice   POST /message/voice (silent MP3 upload)
+    list    GET  /message/conversation/{id}, /session/ and /agent/
+
+With `--spawn` the script starts everything itself: a fresh SQLite database migrated
+with alembic, `benchmarks/fake_openai.py` and the platform under uvicorn.
+
+    python benchmarks/load_test.py --spawn --scenario text voice list --concurrency 32 --requests 2000
+    python benchmarks/load_test.py --spawn --env MESSAGE_WRITE_BEHIND=true --latency-ms 50
+
+Without `--spawn`, point it at a running instance (started with OPENAI_BASE_URL set
+to the fake server): `--base-url http://127.0.0.1:8000`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from fake_openai import mp3_silence  # noqa: E402
+
+DB_QUERIES = re.compile(r'^stage_duration_seconds_count\{stage="db_query"\} (\S+)$', re.MULTILINE)
+LOOP_LAG_BUCKETS = re.compile(r'^event_loop_lag_seconds_bucket\{le="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def scrape(client: httpx.AsyncClient) -> dict | None:
+    """The db_query count and the cumulative event loop lag buckets from `/metrics`."""
+    response = await client.get("/metrics")
+    if response.status_code != 200:
+        return None
+    match = DB_QUERIES.search(response.text)
+    return {
+        "db_queries": float(match.group(1)) if match else 0.0,
+        "loop_lag": {float(le): float(count) for le, count in LOOP_LAG_BUCKETS.findall(response.text)},
+    }
+
+
+def bucket_percentile(before: dict[float, float], after: dict[float, float], pct: float) -> float | None:
+    """Upper bound of the bucket holding the `pct` percentile of the observations made in between."""
+    deltas = sorted((le, after[le] - before.get(le, 0.0)) for le in after)
+    if not deltas or deltas[-1][1] <= 0:
+        return None
+    for le, count in deltas:
+        if count >= deltas[-1][1] * pct / 100:
+            return le
+    return deltas[-1][0]
+
+
+class Scenario:
+    """A named workload, `request(client, index)` sends one request and returns the response."""
+
+    def __init__(self, name: str, api: str, session_ids: list[str]) -> None:
+        self.name = name
+        self.api = api
+        self.session_ids = session_ids
+        self.voice_note = mp3_silence(3)
+
+    async def request(self, client: httpx.AsyncClient, index: int) -> httpx.Response:
+        session_id = self.session_ids[index % len(self.session_ids)]
+        if self.name == "text":
+            return await client.post(
+                f"{self.api}/message/text", json={"session_id": session_id, "content": f"where is order #{index}?"}
+            )
+        if self.name == "voice":
+            return await client.post(
+                f"{self.api}/message/voice",
+                data={"session_id": session_id},
+                files={"voice_note": ("note.mp3", self.voice_note, "audio/mpeg")},
+            )
+        # list: rotate over the three listing endpoints
+        kind = index % 3
+        if kind == 0:
+            return await client.get(f"{self.api}/message/conversation/{session_id}", params={"limit": 50})
+        if kind == 1:
+            return await client.get(f"{self.api}/session/", params={"limit": 50})
+        return await client.get(f"{self.api}/agent/", params={"limit": 50})
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, index)
+                status = response.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - started)
+            if not (isinstance(status, int) and status < 400):
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    metrics_before = await scrape(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    metrics_after = await scrape(client)
+
+    latencies.sort()
+    result = {
+        "scenario": scenario.name,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "errors": errors,
+    }
+    if metrics_before is not None and metrics_after is not None:
+        # /metrics itself runs no queries, so the delta is the scenario's
+        queries = metrics_after["db_queries"] - metrics_before["db_queries"]
+        result["db_queries_per_request"] = round(queries / max(len(latencies), 1), 2)
+        lag = bucket_percentile(metrics_before["loop_lag"], metrics_after["loop_lag"], 99)
+        if lag is not None:
+            result["loop_lag_p99_ms"] = "inf" if lag == float("inf") else round(lag * 1000, 1)
+    return result
+
+
+async def prepare(client: httpx.AsyncClient, api: str, sessions: int, seed_messages: int) -> list[str]:
+    """Creates an agent, `sessions` sessions and `seed_messages` text turns in each of them."""
+    response = await client.post(f"{api}/agent/", json={"name": "load-test", "prompt": "You are a support agent."})
+    response.raise_for_status()
+    agent_id = response.json()["id"]
+    session_ids = []
+    for _ in range(sessions):
+        response = await client.post(f"{api}/session/", json={"agent_id": agent_id})
+        response.raise_for_status()
+        session_ids.append(response.json()["id"])
+    await asyncio.gather(*(
+        seed_session(client, api, session_id, number, seed_messages) for number, session_id in enumerate(session_ids)
+    ))
+    return session_ids
+
+
+async def seed_session(client: httpx.AsyncClient, api: str, session_id: str, number: int, turns: int) -> None:
+    # turns of a session are sent in order and worded per session, so recorded LLM exchanges replay identically
+    for turn in range(turns):
+        await client.post(f"{api}/message/text", json={"session_id": session_id, "content": f"seed message {turn} of session {number}"})
+
+
+def print_table(results: list[dict]) -> None:
+    columns = ("scenario", "requests", "concurrency", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "db_queries_per_request", "loop_lag_p99_ms", "errors")
+    rows = [[str(result.get(column, "-")) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn(args, workdir: str) -> tuple[str, list[subprocess.Popen]]:
+    """Starts the fake OpenAI server and the platform on a fresh database, returns the platform url."""
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    fake = subprocess.Popen([
+        sys.executable, str(ROOT / "benchmarks" / "fake_openai.py"), "--port", str(args.fake_port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate), "--tokens-per-second", str(args.tokens_per_second),
+    ])
+    processes = [fake]
+    env = {
+        **os.environ,
+        "APP_VERSION": args.api_version,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{Path(workdir) / 'load_test.db'}",
+        "OPENAI_API_KEY": "fake-key",
+        "OPENAI_BASE_URL": f"{fake_url}/v1",
+        "LOG_LEVEL": "WARNING",
+        "ENV": "Benchmark",
+    }
+    env.update(dict(item.split("=", 1) for item in args.env))
+    subprocess.run(["alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True, capture_output=True)
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(args.app_port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    processes.append(app)
+    wait_for(fake_url + "/docs", fake)
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    wait_for(base_url + "/metrics", app)
+    return base_url, processes
+
+
+async def run(args, base_url: str) -> list[dict]:
+    api = f"/api/{args.api_version}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        session_ids = await prepare(client, api, args.sessions, args.seed_messages)
+        results = []
+        for name in args.scenario:
+            scenario = Scenario(name, api, session_ids)
+            if args.warmup:
+                await run_scenario(client, scenario, args.warmup, args.concurrency)
+            results.append(await run_scenario(client, scenario, args.requests, args.concurrency))
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=("text", "voice", "list"), default=["text", "voice", "list"])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--seed-messages", type=int, default=10, help="text turns created in every session before measuring")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-version", default="v1")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    spawned = parser.add_argument_group("--spawn", "start the fake OpenAI server and the platform locally")
+    spawned.add_argument("--spawn", action="store_true")
+    spawned.add_argument("--app-port", type=int, default=8765)
+    spawned.add_argument("--fake-port", type=int, default=9100)
+    spawned.add_argument("--latency-ms", type=float, default=200)
+    spawned.add_argument("--jitter-ms", type=float, default=50)
+    spawned.add_argument("--error-rate", type=float, default=0.0)
+    spawned.add_argument("--tokens-per-second", type=float, default=1000)
+    spawned.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="extra platform settings")
+    args = parser.parse_args()
+
+    processes: list[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            base_url = args.base_url
+            if args.spawn:
+                base_url, processes = spawn(args, workdir)
+            results = asyncio.run(run(args, base_url))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=10)
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
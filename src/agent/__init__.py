@@ -1,4 +1,7 @@
+from src.common.lazy import lazy_exports
 from src.agent.models import Agent
-from src.agent.api import router as agent_router
 
-__all__ = ["Agent", "agent_router"]
\ No newline at end of file
+__all__ = ["Agent", "agent_router"]
+
+# imported on first access, the model alone does not need the FastAPI routes
+__getattr__ = lazy_exports(__name__, {"agent_router": ("src.agent.api", "router")})
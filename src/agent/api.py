@@ -1,10 +1,12 @@
 from typing import List
-from fastapi import APIRouter, Depends, status
-from .schemas import AgentCreate, AgentRead, AgentUpdate
+from fastapi import APIRouter, Depends, status, Request
+from fastapi.responses import Response
+from .schemas import AgentCreate, AgentRead, AgentUpdate, AgentStats
 from .service import AgentService
 from .dependency  import get_agent_repository
 from .repository import AgentRepository
-from src.common import UUID7Str
+from src.common import UUID7Str, entity_etag, conditional_response
+from src.core import settings
 
 router = APIRouter(prefix="/agent", tags=["Agents"])
 
@@ -34,6 +36,8 @@ async def list_agents(
 ):
     """Retrieves a list of all defined AI Agents."""
     service = AgentService(agent_repository)
+    if settings.FAST_LIST_SERIALIZATION:
+        return Response(content=await service.list_agents_json(skip=skip, limit=limit), media_type="application/json")
     return await service.list_agents(skip=skip, limit=limit)
 
 @router.get(
@@ -43,11 +47,29 @@ async def list_agents(
 )
 async def get_agent(
     agent_id: UUID7Str,
+    request: Request,
+    response: Response,
     agent_repository: AgentRepository = Depends(get_agent_repository)
 ):
-    """Retrieves a single AI Agent's details."""
+    """Retrieves a single AI Agent's details, `304` when `If-None-Match` has the current ETag."""
     service = AgentService(agent_repository)
-    return await service.get_agent(agent_id)
+    agent = await service.get_agent(agent_id)
+    if (not_modified := conditional_response(request, response, entity_etag(agent))) is not None:
+        return not_modified
+    return agent
+
+@router.get(
+    "/{agent_id}/stats",
+    response_model=AgentStats,
+    summary="Message and token totals of an AI Agent"
+)
+async def get_agent_stats(
+    agent_id: UUID7Str,
+    agent_repository: AgentRepository = Depends(get_agent_repository)
+):
+    """Retrieves the message count, last activity and token usage of an Agent over all its sessions."""
+    service = AgentService(agent_repository)
+    return await service.get_agent_stats(agent_id)
 
 @router.put(
     "/{agent_id}",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime
 from sqlalchemy.orm import relationship
 from src.common.orm_base import Base
 
@@ -9,6 +9,18 @@ class Agent(Base):
     __tablename__ = "agents"
     name = Column(String, index=True, nullable=False)
     prompt = Column(Text, nullable=False)
+    # per agent OpenAI models, NULL uses the platform defaults
+    model = Column(String(100), nullable=True)
+    tts_model = Column(String(100), nullable=True)
+    tts_voice = Column(String(50), nullable=True)
+    stt_model = Column(String(100), nullable=True)
+    # LLM tokens the agent may use per TOKEN_QUOTA_WINDOW_SECONDS, NULL uses AGENT_TOKEN_QUOTA
+    token_quota = Column(Integer, nullable=True)
+    # totals of the agent's sessions, maintained with every message insert
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime, nullable=True)
+    input_tokens = Column(Integer, nullable=False, default=0, server_default="0")
+    output_tokens = Column(Integer, nullable=False, default=0, server_default="0")
      
     sessions = relationship(
         "Session",
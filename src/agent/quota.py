@@ -0,0 +1,97 @@
+import time
+from collections import deque
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from src.core import settings, logger
+from src.core.metrics import TOKEN_QUOTA_REJECTIONS
+
+
+class SlidingWindowQuota:
+    """
+    Tokens used per agent over the last `window` seconds, in process memory.
+
+    Usage is summed into `slots` time slots per agent (a slot leaves the window as a whole),
+    so memory stays bounded whatever the traffic and no request reads the database. Quotas
+    are enforced per worker process.
+
+        if (wait := token_quota.retry_after(agent.id, limit)) is not None:
+            ...  # reject, `wait` seconds until enough usage leaves the window
+        token_quota.add(agent.id, usage.total_tokens)
+    """
+
+    def __init__(self, window: float = 3600, slots: int = 60, clock: Callable[[], float] = time.monotonic) -> None:
+        self.window = window
+        self.slot = window / slots
+        self.clock = clock
+        self._slots: dict[str, deque[list]] = {}  # [slot start, tokens], oldest first
+        self._totals: dict[str, int] = {}
+
+    def _expire(self, key: str, now: float) -> None:
+        slots = self._slots.get(key)
+        if slots is None:
+            return
+        while slots and slots[0][0] + self.window <= now:
+            self._totals[key] -= slots.popleft()[1]
+        if not slots:
+            del self._slots[key], self._totals[key]
+
+    def used(self, key: str) -> int:
+        """Tokens used by `key` within the window."""
+        self._expire(key, self.clock())
+        return self._totals.get(key, 0)
+
+    def add(self, key: str, tokens: int) -> None:
+        """Records `tokens` used by `key` now."""
+        if tokens <= 0:
+            return
+        now = self.clock()
+        self._expire(key, now)
+        start = now - now % self.slot
+        slots = self._slots.setdefault(key, deque())
+        if slots and slots[-1][0] == start:
+            slots[-1][1] += tokens
+        else:
+            slots.append([start, tokens])
+        self._totals[key] = self._totals.get(key, 0) + tokens
+
+    def retry_after(self, key: str, limit: int) -> Optional[float]:
+        """None while `key` is under `limit`, otherwise the seconds until it is again."""
+        now = self.clock()
+        self._expire(key, now)
+        used = self._totals.get(key, 0)
+        if used < limit:
+            return None
+        for start, tokens in self._slots[key]:
+            used -= tokens
+            if used < limit:
+                return start + self.window - now
+        return self.window
+
+
+token_quota = SlidingWindowQuota(window=settings.TOKEN_QUOTA_WINDOW_SECONDS)
+
+
+def quota_retry_after(agent) -> Optional[float]:
+    """
+    None while the agent may make LLM calls, otherwise the seconds until its quota allows
+    it again. The limit is the agent's `token_quota`, else `AGENT_TOKEN_QUOTA` (0 is unlimited).
+    """
+    limit = agent.token_quota or settings.AGENT_TOKEN_QUOTA
+    if not limit:
+        return None
+    retry_after = token_quota.retry_after(agent.id, limit)
+    if retry_after is not None:
+        TOKEN_QUOTA_REJECTIONS.inc()
+        logger.warning(f"agent {agent.id} is over its token quota of {limit}, retry in {retry_after:.0f}s")
+    return retry_after
+
+
+def check_token_quota(agent) -> None:
+    """Refuses the turn (429) before any OpenAI call when the agent used up its token quota."""
+    retry_after = quota_retry_after(agent)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Agent {agent.id} used up its token quota",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
@@ -1,5 +1,6 @@
 from typing import Sequence, Optional
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, Row
+from sqlalchemy.orm import raiseload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common import AbstractRepository
@@ -19,12 +20,12 @@ class AgentRepository(AbstractRepository[Agent, int]):
         await self.session.flush() 
         await self.session.refresh(entity)
         await self.session.commit()
-        logger.debug(f"Created new agent with ID: {entity.id}")
+        logger.debug("Created new agent with ID: %s", entity.id)
         return entity
 
     async def get_by_id(self, entity_id: UUID7Str) -> Optional[Agent]:
-        """Retrieves an Agent by ID."""
-        stmt = select(Agent).where(Agent.id == entity_id)
+        """Retrieves an Agent by ID, without its sessions so it stays cheap to cache."""
+        stmt = select(Agent).where(Agent.id == entity_id).options(raiseload(Agent.sessions))
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
@@ -42,7 +43,7 @@ class AgentRepository(AbstractRepository[Agent, int]):
         
         await self.session.execute(stmt)
         await self.session.commit() 
-        logger.debug(f"Updated Agent ID: {agent_id}")
+        logger.debug("Updated Agent ID: %s", agent_id)
         return await self.get_by_id(agent_id)
 
     async def delete_by_id(self, entity_id: UUID7Str) -> bool:
@@ -55,8 +56,22 @@ class AgentRepository(AbstractRepository[Agent, int]):
             return True
         return False
 
+    async def get_stats(self, agent_id: UUID7Str) -> Optional[Row]:
+        """The counters of an Agent, read fresh with a primary key lookup."""
+        stmt = select(
+            Agent.id.label("agent_id"), Agent.message_count, Agent.last_message_at, Agent.input_tokens, Agent.output_tokens,
+        ).where(Agent.id == agent_id)
+        result = await self.session.execute(stmt)
+        return result.first()
+
     async def get_all(self, skip: int = 0, limit: int = 100) -> Sequence[Agent]:
         """Retrieves a list of Agents with pagination."""
         stmt = select(Agent).offset(skip).limit(limit).order_by(Agent.id)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+    async def get_all_rows(self, columns: Sequence, skip: int = 0, limit: int = 100) -> Sequence[Row]:
+        """Same page as `get_all` as plain tuples of `columns`, no ORM objects are built."""
+        stmt = select(*columns).offset(skip).limit(limit).order_by(Agent.id)
+        result = await self.session.execute(stmt)
+        return result.all()
\ No newline at end of file
@@ -5,6 +5,11 @@ from src.common import UUID7Str
 class AgentBase(BaseModel):
     name: str = Field(..., max_length=100)
     prompt: str = Field(..., description="The system prompt defining the agent's persona.")
+    model: Optional[str] = Field(None, max_length=100, description="Text model, the platform default when empty.")
+    tts_model: Optional[str] = Field(None, max_length=100, description="Text to speech model for voice replies.")
+    tts_voice: Optional[str] = Field(None, max_length=50, description="Voice of spoken replies, e.g. alloy or nova.")
+    stt_model: Optional[str] = Field(None, max_length=100, description="Speech to text model for voice notes.")
+    token_quota: Optional[int] = Field(None, ge=1, description="LLM tokens allowed per quota window, the platform default when empty.")
    
 
 class AgentCreate(AgentBase):
@@ -13,9 +18,30 @@ class AgentCreate(AgentBase):
 class AgentUpdate(BaseModel):
     name: Optional[str] = Field(None)
     prompt: Optional[str] = Field(None)
+    model: Optional[str] = Field(None, max_length=100)
+    tts_model: Optional[str] = Field(None, max_length=100)
+    tts_voice: Optional[str] = Field(None, max_length=50)
+    stt_model: Optional[str] = Field(None, max_length=100)
+    token_quota: Optional[int] = Field(None, ge=1)
 class AgentRead(AgentBase):
     id: UUID7Str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class AgentStats(BaseModel):
+    """Activity of an agent over all its sessions, read from the counters kept with every message."""
+    agent_id: UUID7Str
+    message_count: int
+    last_message_at: Optional[datetime] = None
+    input_tokens: int
+    output_tokens: int
+
+    class Config:
+        from_attributes = True
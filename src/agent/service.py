@@ -1,11 +1,18 @@
 from typing import Sequence
 from .repository import AgentRepository
 from .models import Agent
-from .schemas import AgentCreate, AgentUpdate
+from .schemas import AgentBase, AgentCreate, AgentUpdate, AgentRead
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from src.core import logger
-from src.common import AbstractRepository, get_cairo_time, UUID7Str
+from src.message.persister import message_persister
+from src.common import AbstractRepository, get_cairo_time, UUID7Str, agent_cache, session_cache, schema_columns, dump_rows
+
+# fields of the list response model, read as plain columns by the fast list path
+LIST_COLUMNS = schema_columns(Agent, AgentRead)
+LIST_KEYS = [column.key for column in LIST_COLUMNS]
+
+
 class AgentService:
     """
     Service layer for Agent business logic, orchestrating Repository calls.
@@ -21,7 +28,11 @@ class AgentService:
         return agent
     
     async def get_agent(self, agent_id: UUID7Str) -> Agent:
-        """Retrieves an Agent or raises 404."""
+        """
+        Retrieves an Agent or raises 404, read from the database so its counters (and ETag)
+        are current; the agent cache is for the chat path.
+        """
+        await message_persister.flush()  # read-your-writes for the counters, a no-op when nothing is queued
         agent = await self.repository.get_by_id(agent_id)
         if not agent:
             logger.warning(f"Agent ID {agent_id} not found.")
@@ -29,13 +40,17 @@ class AgentService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Agent with ID {agent_id} not found."
             )
-        logger.debug(f"Agent with id {agent_id} exist abd returned")
+        logger.debug("Agent with id %s exist abd returned", agent_id)
         return agent
 
     async def update_agent(self, agent_id: UUID7Str, agent_data: AgentUpdate) -> Agent:
         """Updates an Agent, ensuring it exists first."""
         await self.get_agent(agent_id) 
-        update_dict = agent_data.model_dump(exclude_none=True)
+        # an explicit null puts an optional field (model, quota...) back to the platform default
+        update_dict = {
+            field: value for field, value in agent_data.model_dump(exclude_unset=True).items()
+            if value is not None or not AgentBase.model_fields[field].is_required()
+        }
         if not update_dict:
             logger.error(f"Agent id {agent_id} parsed Agent data {update_dict} not include fields for agent")
             raise HTTPException(
@@ -44,19 +59,42 @@ class AgentService:
             )
         update_dict["updated_at"] = get_cairo_time()
         updated_agent = await self.repository.update(agent_id, update_dict)
+        await self._invalidate_cache(agent_id)
         logger.info(f"agent id {agent_id} updated with data {update_dict}")
         return updated_agent
 
     async def delete_agent(self, agent_id: UUID7Str) -> None:
         """Deletes an Agent, raising 404 if it did not exist."""
         deleted = await self.repository.delete_by_id(agent_id)
+        await self._invalidate_cache(agent_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Agent with ID {agent_id} not found."
             )
 
+    async def _invalidate_cache(self, agent_id: UUID7Str) -> None:
+        """Drops the cached agent and the cached sessions, which embed their agent."""
+        await agent_cache.invalidate(agent_id)
+        await session_cache.clear()
+
+    async def get_agent_stats(self, agent_id: UUID7Str):
+        """Counters of an Agent, always read from the database rather than the agent cache."""
+        await message_persister.flush()
+        stats = await self.repository.get_stats(agent_id)
+        if stats is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Agent with ID {agent_id} not found."
+            )
+        return stats
+
     async def list_agents(self, skip: int = 0, limit: int = 100) -> Sequence[Agent]:
         """Lists all Agents with pagination."""
-        logger.debug(f"list agent with skip {skip} limit {limit}")
-        return await self.repository.get_all(skip=skip, limit=limit)
\ No newline at end of file
+        logger.debug("list agent with skip %s limit %s", skip, limit)
+        return await self.repository.get_all(skip=skip, limit=limit)
+
+    async def list_agents_json(self, skip: int = 0, limit: int = 100) -> bytes:
+        """The `list_agents` page already rendered as `AgentRead` JSON, straight from column tuples."""
+        rows = await self.repository.get_all_rows(LIST_COLUMNS, skip=skip, limit=limit)
+        return dump_rows(LIST_KEYS, rows)
\ No newline at end of file
@@ -1,6 +1,20 @@
 from src.common.repository_base import AbstractRepository
 from src.common.orm_base import Base
 from src.common.schemas import UUID7Str
-from src.common.utils import get_cairo_time
+from src.common.utils import get_cairo_time, uuid7_lower_bound
+from src.common.types import BinaryUUID, uuid_column_type
+from src.common.serialization import schema_columns, dump_rows
+from src.common.lazy import lazy_exports
+from src.common.etag import make_etag, entity_etag, etag_matches, conditional_response
+from src.common.cache import (
+    TTLCache, NOT_FOUND, Cache, CacheBackend, MemoryBackend, InvalidationListener,
+    cache_backend, agent_cache, session_cache, cache_invalidation_listener,
+)
 
-__all__ = ["AbstractRepository", "Base", "UUID7Str", "get_cairo_time"]
\ No newline at end of file
+__all__ = [
+    "AbstractRepository", "Base", "UUID7Str", "get_cairo_time", "uuid7_lower_bound",
+    "BinaryUUID", "uuid_column_type", "schema_columns", "dump_rows", "lazy_exports",
+    "make_etag", "entity_etag", "etag_matches", "conditional_response",
+    "TTLCache", "NOT_FOUND", "Cache", "CacheBackend", "MemoryBackend", "InvalidationListener",
+    "cache_backend", "agent_cache", "session_cache", "cache_invalidation_listener",
+]
\ No newline at end of file
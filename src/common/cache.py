@@ -0,0 +1,383 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Hashable, Optional, Protocol
+from sqlalchemy import inspect
+from sqlalchemy.orm import InstanceState
+from src.core import settings, logger
+from src.core.metrics import CACHE_BACKEND_ERRORS
+
+# Sentinel returned for keys cached as "known missing" (negative caching)
+NOT_FOUND = object()
+
+
+def detach(value: Any) -> Any:
+    """
+    Takes an ORM row, and the many-to-one rows loaded with it (a session's agent), out of
+    its DB session: a rollback of the request that loaded it would expire the cached copy.
+    """
+    state = inspect(value, raiseerr=False)
+    if not isinstance(state, InstanceState):
+        return value
+    if state.session is not None:
+        state.session.expunge(value)
+    for relationship in state.mapper.relationships:
+        if not relationship.uselist and state.dict.get(relationship.key) is not None:
+            detach(state.dict[relationship.key])
+    return value
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with per-entry TTL.
+
+    Missing rows can be cached as well with a shorter TTL via `set_missing`,
+    so repeated lookups for unknown ids are answered without hitting the DB.
+    """
+
+    def __init__(self, name: str, max_size: int = 10_000, ttl: float = 60.0, negative_ttl: float = 5.0) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value, `NOT_FOUND` for a negative entry,
+        or None when the key is not cached (or expired).
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Caches a value for `ttl` seconds (the cache default when omitted), evicting the least recently used entry if full."""
+        self._store(key, value, self.ttl if ttl is None else ttl)
+
+    def set_missing(self, key: Hashable) -> None:
+        """Caches the fact that `key` does not exist for `negative_ttl` seconds."""
+        self._store(key, NOT_FOUND, self.negative_ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drops a single entry."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        self._entries.clear()
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheBackend(Protocol):
+    """
+    Key/value store behind `Cache`, with pub/sub to spread invalidations between processes.
+
+    `shared` backends are seen by every worker (Redis), their values are kept in a short
+    lived in-process copy as well, which invalidation messages drop.
+    """
+    shared: bool
+
+    async def get(self, key: str) -> Optional[Any]:
+        """The value, `NOT_FOUND` for a negative entry, None when missing or expired."""
+        ...
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def incr(self, key: str) -> int:
+        """Increments a counter and returns its new value."""
+        ...
+
+    async def counter(self, key: str) -> int:
+        """Current value of a counter, 0 when it was never incremented."""
+        ...
+
+    async def publish(self, channel: str, message: str) -> None:
+        ...
+
+    def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """Messages published on `channel` from now on, by any process sharing the backend."""
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+class MemoryBackend:
+    """Per-process backend, the default for a single worker. Pub/sub only reaches this process."""
+    shared = False
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self._entries = TTLCache("memory", max_size=max_size)
+        self._counters: dict[str, int] = {}
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._entries.invalidate(key)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    async def aclose(self) -> None:
+        self._entries.clear()
+
+
+class Cache:
+    """
+    Namespaced cache on top of a `CacheBackend`.
+
+    Keys are stored as `{prefix}:{namespace}:{generation}:{key}`: `clear()` bumps the
+    generation instead of deleting keys one by one, older entries simply expire. With a
+    shared backend, hits are also kept in process for `local_ttl` seconds, and every
+    `invalidate`/`clear` is published so the other workers drop their copy right away.
+    Backend errors are logged and counted, never raised: a failed read is a miss and
+    callers go to the database.
+
+        agent_cache = Cache("agents", backend, ttl=60)
+        agent = await agent_cache.get(agent_id)
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        backend: CacheBackend,
+        prefix: str = "cache",
+        ttl: float = 60.0,
+        negative_ttl: float = 5.0,
+        local_ttl: float = 5.0,
+        max_local_entries: int = 10_000,
+    ) -> None:
+        self.namespace = namespace
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = TTLCache(namespace, max_size=max_local_entries, ttl=local_ttl, negative_ttl=min(local_ttl, negative_ttl)) \
+            if backend.shared else None
+        self._generation: Optional[int] = None
+
+    @property
+    def channel(self) -> str:
+        return invalidation_channel(self.prefix)
+
+    async def _key(self, key: Hashable) -> str:
+        if self._generation is None:
+            self._generation = await self.backend.counter(f"{self.prefix}:{self.namespace}:generation")
+        return f"{self.prefix}:{self.namespace}:{self._generation}:{key}"
+
+    def _backend_failed(self, operation: str, exc: Exception) -> None:
+        CACHE_BACKEND_ERRORS.inc(operation=operation)
+        logger.error(f"{self.namespace} cache {operation} failed on the backend: {exc!r}")
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value, `NOT_FOUND` for a negative entry,
+        or None when the key is not cached (or expired, or the backend failed).
+        """
+        if self._local is not None:
+            value = self._local.get(key)
+            if value is not None:
+                return value
+        try:
+            value = await self.backend.get(await self._key(key))
+        except Exception as exc:
+            self._backend_failed("get", exc)
+            return None
+        if value is not None:
+            self._store_local(key, value)
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        """Caches a value for `ttl` seconds."""
+        await self._store(key, value, self.ttl)
+
+    async def set_missing(self, key: Hashable) -> None:
+        """Caches the fact that `key` does not exist for `negative_ttl` seconds."""
+        await self._store(key, NOT_FOUND, self.negative_ttl)
+
+    async def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        value = detach(value)
+        self._store_local(key, value)
+        try:
+            await self.backend.set(await self._key(key), value, ttl)
+        except Exception as exc:
+            self._backend_failed("set", exc)
+
+    def _store_local(self, key: Hashable, value: Any) -> None:
+        if self._local is None:
+            return
+        if value is NOT_FOUND:
+            self._local.set_missing(key)
+        else:
+            self._local.set(key, value)
+
+    async def invalidate(self, key: Hashable) -> None:
+        """Drops a single entry, in every worker."""
+        self.drop_local(key)
+        try:
+            await self.backend.delete(await self._key(key))
+            await self.backend.publish(self.channel, f"invalidate {self.namespace} {key}")
+        except Exception as exc:
+            self._backend_failed("invalidate", exc)
+
+    async def clear(self) -> None:
+        """Drops every entry of the namespace, in every worker."""
+        try:
+            generation = await self.backend.incr(f"{self.prefix}:{self.namespace}:generation")
+        except Exception as exc:
+            self._backend_failed("clear", exc)
+            self.drop_local()
+            return
+        self.drop_local(generation=generation)
+        try:
+            await self.backend.publish(self.channel, f"clear {self.namespace} {generation}")
+        except Exception as exc:
+            self._backend_failed("clear", exc)
+
+    def drop_local(self, key: Optional[Hashable] = None, generation: Optional[int] = None) -> None:
+        """
+        Applies an invalidation to the in-process copy: one `key`, everything for a new
+        `generation`, or without arguments everything, re-reading the generation.
+        """
+        if key is not None:
+            if self._local is not None:
+                self._local.invalidate(key)
+            return
+        self._generation = None if generation is None else max(self._generation or 0, generation)
+        if self._local is not None:
+            self._local.clear()
+
+
+def invalidation_channel(prefix: str) -> str:
+    return f"{prefix}:invalidations"
+
+
+class InvalidationListener:
+    """
+    Background task applying the invalidations published by any worker to the
+    in-process copies of `caches`. Reconnects after backend errors.
+    """
+
+    def __init__(self, backend: CacheBackend, caches: list[Cache], prefix: str = "cache", retry_delay: float = 1.0) -> None:
+        self.backend = backend
+        self.caches = {cache.namespace: cache for cache in caches}
+        self.channel = invalidation_channel(prefix)
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts listening, must be called from the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="cache-invalidations")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def handle(self, message: str) -> None:
+        action, _, rest = message.partition(" ")
+        namespace, _, argument = rest.partition(" ")
+        cache = self.caches.get(namespace)
+        if cache is None:
+            return
+        if action == "clear":
+            cache.drop_local(generation=int(argument))
+        elif action == "invalidate":
+            cache.drop_local(argument)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async for message in self.backend.subscribe(self.channel):
+                    self.handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # messages missed meanwhile are covered by the short local TTL
+                logger.error(f"cache invalidation subscription failed: {exc}, retrying")
+                for cache in self.caches.values():
+                    cache.drop_local()
+                await asyncio.sleep(self.retry_delay)
+
+
+def build_cache_backend() -> CacheBackend:
+    """The backend selected by `CACHE_BACKEND`: `memory` (per process) or `redis` (shared)."""
+    kind = settings.CACHE_BACKEND.lower()
+    if kind == "memory":
+        return MemoryBackend(max_size=settings.CACHE_MAX_ENTRIES * 2)
+    if kind == "redis":
+        from .redis_cache import RedisBackend
+        logger.info(f"cache entries are shared through redis, keys prefixed with {settings.CACHE_KEY_PREFIX}")
+        return RedisBackend(settings.CACHE_REDIS_URL)
+    raise ValueError(f"unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}, expected memory or redis")
+
+
+def _cache(namespace: str) -> Cache:
+    return Cache(
+        namespace,
+        cache_backend,
+        prefix=settings.CACHE_KEY_PREFIX,
+        ttl=settings.CACHE_TTL_SECONDS,
+        negative_ttl=settings.CACHE_NEGATIVE_TTL_SECONDS,
+        local_ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+        max_local_entries=settings.CACHE_MAX_ENTRIES,
+    )
+
+
+cache_backend = build_cache_backend()
+# Caches for rows that are read on every request but rarely change.
+# Session entries embed their agent, so agent changes must clear the session cache too.
+agent_cache = _cache("agents")
+session_cache = _cache("sessions")
+cache_invalidation_listener = InvalidationListener(cache_backend, [agent_cache, session_cache], prefix=settings.CACHE_KEY_PREFIX)
@@ -0,0 +1,45 @@
+import hashlib
+from typing import TYPE_CHECKING, Any, Optional
+from src.core import settings
+
+if TYPE_CHECKING:  # FastAPI stays out of the imports of models and scripts
+    from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for a representation identified by its version `parts`."""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def entity_etag(entity: Any) -> str:
+    """
+    ETag of a single row, changes with its `updated_at` (`created_at` until first updated)
+    and, for rows keeping message counters, with every new message.
+    """
+    return make_etag(entity.id, entity.updated_at or entity.created_at, getattr(entity, "message_count", None))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` uses the weak comparison: `W/` prefixes are ignored and `*` matches any ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def conditional_response(request: "Request", response: "Response", etag: str) -> Optional["Response"]:
+    """
+    A `304 Not Modified` when the client already has `etag`, otherwise None after setting
+    the `ETag` and `Cache-Control` headers on the endpoint's `response`.
+
+        if (not_modified := conditional_response(request, response, etag)) is not None:
+            return not_modified
+    """
+    from fastapi import Response, status
+    headers = {"ETag": etag, "Cache-Control": settings.HTTP_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
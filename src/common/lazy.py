@@ -0,0 +1,23 @@
+import importlib
+import sys
+from typing import Any, Callable
+
+
+def lazy_exports(module_name: str, exports: dict[str, tuple[str, str]]) -> Callable[[str], Any]:
+    """
+    A module `__getattr__` importing `exports` (name -> (module, attribute)) on first access,
+    then kept as a regular module attribute:
+
+        __getattr__ = lazy_exports(__name__, {"agent_router": ("src.agent.api", "router")})
+    """
+    module = sys.modules[module_name]
+
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        source, attribute = exports[name]
+        value = getattr(importlib.import_module(source), attribute)
+        setattr(module, name, value)
+        return value
+
+    return __getattr__
@@ -5,14 +5,15 @@ from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import event
 from .utils import get_cairo_time
+from .types import uuid_column_type
 
 class Base(AsyncAttrs, DeclarativeBase):
     """
     Base class for all SQLAlchemy ORM models, providing common async features.
     """
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid7()), index=True)
-    created_at = Column(DateTime, default=get_cairo_time())
+    id = Column(uuid_column_type(), primary_key=True, default=lambda: str(uuid7()))
+    created_at = Column(DateTime, default=get_cairo_time) # callable, evaluated per insert
     updated_at = Column(DateTime, default=None, nullable=True)
 
     def __repr__(self):
@@ -0,0 +1,125 @@
+import datetime
+import json
+from typing import Any, AsyncIterator, Optional
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from .cache import NOT_FOUND
+from .orm_base import Base
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional dependency, only needed with CACHE_BACKEND=redis
+    redis = None
+
+# stored for negative entries, never a valid JSON document
+MISSING = b"\x00"
+
+
+def _models() -> dict[str, type]:
+    return {mapper.class_.__name__: mapper.class_ for mapper in Base.registry.mappers}
+
+
+def encode_instance(instance: Base) -> dict:
+    """
+    Column values of an ORM instance, with its loaded many-to-one relationships
+    (a session's agent) nested the same way.
+    """
+    state = inspect(instance)
+    columns = {}
+    for column in state.mapper.column_attrs:
+        value = state.dict.get(column.key)
+        columns[column.key] = value.isoformat() if isinstance(value, datetime.datetime) else value
+    related = {}
+    for relationship in state.mapper.relationships:
+        if relationship.uselist or relationship.key not in state.dict:
+            continue
+        value = state.dict[relationship.key]
+        related[relationship.key] = None if value is None else encode_instance(value)
+    return {"model": state.mapper.class_.__name__, "columns": columns, "related": related}
+
+
+def decode_instance(data: dict, models: Optional[dict[str, type]] = None) -> Base:
+    """
+    Rebuilds a detached ORM instance from `encode_instance` output, as if it had been
+    loaded by a session that is closed since; collections are left unloaded.
+    """
+    models = models or _models()
+    cls = models[data["model"]]
+    mapper = inspect(cls)
+    instance = mapper.class_manager.new_instance()
+    for column in mapper.column_attrs:
+        value = data["columns"].get(column.key)
+        if value is not None and isinstance(column.columns[0].type, DateTime):
+            value = datetime.datetime.fromisoformat(value)
+        set_committed_value(instance, column.key, value)
+    for key, related in data["related"].items():
+        set_committed_value(instance, key, None if related is None else decode_instance(related, models))
+    make_transient_to_detached(instance)
+    return instance
+
+
+def encode_value(value: Any) -> bytes:
+    if value is NOT_FOUND:
+        return MISSING
+    if isinstance(value, Base):
+        value = {"instance": encode_instance(value)}
+    else:
+        value = {"value": value}
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def decode_value(raw: bytes) -> Any:
+    if raw == MISSING:
+        return NOT_FOUND
+    data = json.loads(raw)
+    return decode_instance(data["instance"]) if "instance" in data else data["value"]
+
+
+class RedisBackend:
+    """
+    Cache backend shared by all workers through Redis (or any server speaking its protocol).
+
+    ORM instances are stored as JSON of their column values and come back detached,
+    other values must be JSON serializable. Entries expire with Redis' own TTL.
+    """
+    shared = True
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client=None) -> None:
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND is redis but the redis package is not installed")
+            client = redis.from_url(url)
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return None if raw is None else decode_value(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.client.set(key, encode_value(value), px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(key))
+
+    async def counter(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                data = message["data"]
+                yield data.decode() if isinstance(data, bytes) else data
+        finally:
+            await pubsub.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
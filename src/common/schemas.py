@@ -1,16 +1,17 @@
 from typing import Annotated
-from fastapi import FastAPI, Path
 from pydantic import Field, AfterValidator
 import re
 
+# compiled once, validation runs for every id in every request
+UUID7_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$', re.IGNORECASE)
+
+
 def validate_uuid7(value: str) -> str:
     """Custom validator with friendly error message"""
-    uuid7_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$'
-    
-    if not re.match(uuid7_pattern, value.lower()):
+    if not UUID7_PATTERN.match(value):
         raise ValueError('Invalid UUID7 format. Expected format: xxxxxxxx-xxxx-7xxx-xxxx-xxxxxxxxxxxx')
-    
-    return value
+    # ids are generated and stored lower case, text and binary storage alike
+    return value.lower()
 
 UUID7Str = Annotated[
     str, 
@@ -0,0 +1,18 @@
+from typing import Any, Iterable, Sequence
+import orjson
+from pydantic import BaseModel
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def schema_columns(model: type, schema: type[BaseModel]) -> list[InstrumentedAttribute]:
+    """The ORM columns of `model` named like the fields of `schema`, in the schema's field order."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def dump_rows(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    JSON array of objects built from column tuples, as the response model would have
+    rendered them: orjson writes datetimes in ISO 8601 and enums as their value.
+    Values are trusted as read from the database, nothing is validated.
+    """
+    return orjson.dumps([dict(zip(keys, row)) for row in rows], option=orjson.OPT_UTC_Z)
@@ -0,0 +1,31 @@
+import uuid
+from sqlalchemy import String, LargeBinary
+from sqlalchemy.types import TypeDecorator, TypeEngine
+from src.core import settings
+
+
+class BinaryUUID(TypeDecorator):
+    """
+    Stores a UUID as 16 raw bytes instead of its 36 character text form.
+
+    Values are bound and returned as canonical UUID strings, so the rest of the
+    application (schemas, services, API) keeps working with `str` ids.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return uuid.UUID(str(value)).bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
+def uuid_column_type() -> TypeEngine:
+    """Column type for ids and foreign keys, binary when `DB_BINARY_UUID` is enabled."""
+    return BinaryUUID() if settings.DB_BINARY_UUID else String(36)
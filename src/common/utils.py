@@ -5,4 +5,11 @@ cairo_tz = ZoneInfo('Africa/Cairo')
 
 def get_cairo_time():
     """Get current datetime in Cairo timezone using zoneinfo"""
-    return datetime.datetime.now(cairo_tz)
\ No newline at end of file
+    return datetime.datetime.now(cairo_tz)
+
+
+def uuid7_lower_bound(moment: datetime.datetime) -> str:
+    """Smallest UUID7 that can be generated at `moment`, ids created before it compare lower."""
+    millis = int(moment.timestamp() * 1000)
+    hex_millis = f"{millis:012x}"
+    return f"{hex_millis[:8]}-{hex_millis[8:]}-7000-8000-000000000000"
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+On-disk format of ids: 36 character text, or 16 raw bytes with `DB_BINARY_UUID`.
+
+The format is chosen when migrating (revision 9b3f6e1d2c47) and the app refuses to start
+when the stored ids do not match the setting. Switching later converts the database in place:
+
+    DB_BINARY_UUID=true python -m src.common.uuid_storage
+"""
+import asyncio
+import uuid
+from typing import Callable, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from src.core import settings
+from src.core.database import async_engine
+
+# (table, uuid columns) of every table holding ids, tables not created yet are skipped;
+# SQLite keeps whatever value is stored in a column, so only the values are converted
+UUID_COLUMNS = (
+    ("agents", ("id",)),
+    ("sessions", ("id", "agent_id")),
+    ("messages", ("id", "session_id")),
+    ("messages_fts_keys", ("message_id",)),
+    ("message_archives", ("id", "session_id", "last_message_id")),
+)
+
+
+def _to_binary(value):
+    return value if isinstance(value, bytes) else uuid.UUID(value).bytes
+
+
+def _to_text(value):
+    return value if isinstance(value, str) else str(uuid.UUID(bytes=bytes(value)))
+
+
+def stored_as_binary(connection: Connection) -> Optional[bool]:
+    """Whether the stored ids are binary, None while there is no agent to tell from (or not on SQLite)."""
+    if connection.dialect.name != "sqlite" or "agents" not in inspect(connection).get_table_names():
+        return None
+    stored = connection.execute(text("SELECT typeof(id) FROM agents LIMIT 1")).scalar()
+    return None if stored is None else stored == "blob"
+
+
+def convert_uuid_storage(connection: Connection, binary: bool) -> int:
+    """
+    Rewrites every id and foreign key of a SQLite database into the binary (or text) form,
+    values already in that form are left alone. Returns the number of values converted. Foreign keys are not
+    enforced by SQLite unless enabled, parents and children are converted one after the other.
+    """
+    convert: Callable = _to_binary if binary else _to_text
+    stored_type = "text" if binary else "blob"
+    tables = set(inspect(connection).get_table_names())
+    converted = 0
+    for table, columns in UUID_COLUMNS:
+        if table not in tables:
+            continue
+        for column in columns:
+            rows = connection.execute(
+                text(f"SELECT DISTINCT {column} FROM {table} WHERE typeof({column}) = :stored_type"),
+                {"stored_type": stored_type},
+            ).all()
+            params = [{"new": convert(value), "old": value} for (value,) in rows]
+            if params:
+                connection.execute(text(f"UPDATE {table} SET {column} = :new WHERE {column} = :old"), params)
+                converted += len(params)
+    return converted
+
+
+async def check_uuid_storage() -> None:
+    """Fails the startup when the stored ids are not in the form selected by `DB_BINARY_UUID`."""
+    async with async_engine.connect() as connection:
+        binary = await connection.run_sync(stored_as_binary)
+    if binary is not None and binary != settings.DB_BINARY_UUID:
+        raise RuntimeError(
+            f"ids are stored as {'binary' if binary else 'text'} but DB_BINARY_UUID is {settings.DB_BINARY_UUID}, "
+            "fix the setting or convert the database with `python -m src.common.uuid_storage`"
+        )
+
+
+async def _convert() -> int:
+    async with async_engine.begin() as connection:
+        return await connection.run_sync(convert_uuid_storage, settings.DB_BINARY_UUID)
+
+
+if __name__ == "__main__":
+    print(asyncio.run(_convert()))
@@ -0,0 +1,145 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Optional
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from src.core.configs import settings
+from src.core.logger import logger
+from src.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT_DURATION
+
+
+class AdmissionController:
+    """
+    Limits how many requests of one endpoint class run at once, in this process.
+
+    Up to `limit` requests run, the next `queue_size` wait in arrival order for one of them
+    to finish (at most `queue_timeout` seconds), anything beyond is refused right away with
+    503 and a `Retry-After` estimated from recent request durations. A limit of 0 admits
+    everything. Requests are admitted by `AdmissionMiddleware`, before their body is read.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int = 100, queue_timeout: float = 10) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._average_duration = 1.0  # seconds a request holds its slot, moving average
+
+    def _publish(self) -> None:
+        ADMISSION_IN_FLIGHT.set(self._active, endpoint=self.name)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), endpoint=self.name)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to admit a new request."""
+        return max(1, math.ceil(self._average_duration * (len(self._waiters) + 1) / max(1, self.limit)))
+
+    def _reject(self, reason: str) -> HTTPException:
+        ADMISSION_REJECTIONS.inc(endpoint=self.name, reason=reason)
+        logger.warning(f"{self.name} request refused ({reason}), {self._active} running and {len(self._waiters)} queued")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Too many {self.name} requests in progress, try again later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    async def acquire(self) -> None:
+        """Takes a slot, waiting in the queue if needed; raises 503 when the queue is full or the wait too long."""
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self._publish()
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._reject("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        queued = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # handed a slot just as the wait ended, pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._publish()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            raise self._reject("timeout") from None
+        finally:
+            ADMISSION_WAIT_DURATION.observe(time.perf_counter() - queued, endpoint=self.name)
+
+    def release(self, held: Optional[float] = None) -> None:
+        """
+        Gives the slot back, straight to the longest waiting request if there is one.
+        `held` is how long the request ran, it feeds the `Retry-After` estimate.
+        """
+        if held is not None:
+            self._average_duration += 0.1 * (held - self._average_duration)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot changes hands, `_active` stays the same
+                self._publish()
+                return
+        self._active -= 1
+        self._publish()
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware running requests through the `AdmissionController` of their route.
+
+    `routes` are `(method, path, controller)`, paths relative to `path_prefix` where `*`
+    matches one segment. Admission happens before anything reads the request, so queued
+    and refused requests (voice uploads...) do not have their body buffered; the arrival
+    time is left in `scope["state"]["received_at"]` so the request deadline covers the wait.
+    """
+
+    def __init__(self, app, path_prefix: str = "", routes: tuple[tuple[str, str, AdmissionController], ...] = ()) -> None:
+        self.app = app
+        self.path_prefix = path_prefix
+        self.routes = [(method, path.strip("/").split("/"), controller) for method, path, controller in routes]
+
+    def _controller(self, scope) -> Optional[AdmissionController]:
+        segments = scope["path"][len(self.path_prefix):].strip("/").split("/")
+        for method, pattern, controller in self.routes:
+            if method == scope["method"] and len(pattern) == len(segments) \
+                    and all(part in ("*", segment) for part, segment in zip(pattern, segments)):
+                return controller
+        return None
+
+    async def __call__(self, scope, receive, send):
+        controller = None
+        if scope["type"] == "http" and scope["path"].startswith(self.path_prefix):
+            controller = self._controller(scope)
+        if controller is None or controller.limit <= 0:
+            await self.app(scope, receive, send)
+            return
+        scope.setdefault("state", {})["received_at"] = time.monotonic()
+        try:
+            await controller.acquire()
+        except HTTPException as exc:
+            await JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - started)
+
+
+def _controller(name: str, limit: int) -> AdmissionController:
+    return AdmissionController(
+        name, limit, queue_size=settings.ADMISSION_QUEUE_SIZE, queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+    )
+
+
+text_admission = _controller("text", settings.ADMISSION_TEXT_CONCURRENCY)
+voice_admission = _controller("voice", settings.ADMISSION_VOICE_CONCURRENCY)
+list_admission = _controller("list", settings.ADMISSION_LIST_CONCURRENCY)
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,8 +11,102 @@ class Settings(BaseSettings):
     ENV: str = "Development" 
     DATABASE_URL: str  
     OPENAI_API_KEY: str
-    LOG_LEVEL: str = "DEBUG" if ENV == "Development" else "INFO" # logging level as per environment
+    OPENAI_BASE_URL: Optional[str] = None # OpenAI compatible endpoint, e.g. the fake server in benchmarks/
+    # LLM backend: "openai", "record" (call OpenAI and save every exchange) or "replay" (serve saved exchanges only)
+    LLM_PROVIDER: str = "openai"
+    LLM_CASSETTE_DIR: str = "cassettes" # where record/replay keeps exchanges, one JSON file each
+    LLM_REPLAY_SPEED: float = 1.0 # replay delay multiplier, 1 keeps the recorded timings, 0 replays instantly
+    # route simple turns (short, no code) of agents without their own model to a faster model
+    LLM_ROUTING_FAST_MODEL: Optional[str] = None # e.g. gpt-4.1-mini, routing is off when empty
+    LLM_ROUTING_MAX_CHARS: int = 200 # longest message still considered simple
+    # hedged LLM requests: a second attempt is fired when the first is slower than recent requests
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95 # hedge after this percentile of recent first-token latencies
+    LLM_HEDGE_BUDGET: float = 0.05 # at most this share of requests is hedged
+    LLM_HEDGE_INITIAL_DELAY_MS: float = 2000 # hedge delay until enough latencies are known
+    LLM_HEDGE_MIN_DELAY_MS: float = 50
+    LLM_HEDGE_FALLBACK_MODEL: Optional[str] = None # send hedges to another model, the same one by default
+    LLM_HEDGE_FALLBACK_BASE_URL: Optional[str] = None # or to another OpenAI compatible endpoint
+    LOG_LEVEL: Optional[str] = None # logging level, defaults to DEBUG in Development and INFO otherwise
+    LOG_FORMAT: str = "json" # "json" for one JSON object per line, "text" for the classic format
+    LOG_MAX_MESSAGE_CHARS: int = 2000 # longer log messages (prompts, responses) are truncated, 0 disables
+    LOG_QUEUE_SIZE: int = 10_000 # records waiting for the log writer thread, extra records are dropped
+    # write-behind message persistence, messages are queued in-process and flushed in batches
+    MESSAGE_WRITE_BEHIND: bool = False
+    MESSAGE_FLUSH_INTERVAL_MS: int = 50 # flush the queue at least every N milliseconds
+    MESSAGE_FLUSH_MAX_ROWS: int = 500 # or as soon as M rows are waiting
+    MESSAGE_FLUSH_MAX_QUEUED: int = 10_000 # rows buffered at most, writers wait for a flush beyond
+    # store ids and foreign keys as 16-byte binary UUIDs instead of 36-char strings,
+    # must be set before running the compact uuid keys migration
+    DB_BINARY_UUID: bool = False
+    # archival of inactive sessions into compressed cold storage
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_INACTIVE_DAYS: float = 30 # sessions without messages for this long are archived
+    ARCHIVE_INTERVAL_SECONDS: float = 3600 # how often the archiver looks for inactive sessions
+    ARCHIVE_BATCH_SESSIONS: int = 50 # max sessions archived per run
+    ARCHIVE_PAUSE_SECONDS: float = 0.2 # pause between two sessions, keeps the archiver off live writes
+    ARCHIVE_CODEC: str = "zlib" # "zlib" or "zstd" (needs the zstandard package)
+    # background recount of the session and agent message counters from the messages
+    COUNTER_REPAIR_ENABLED: bool = False
+    COUNTER_REPAIR_INTERVAL_SECONDS: float = 86400
+    COUNTER_REPAIR_BATCH_SIZE: int = 200 # sessions (then agents) recomputed per transaction
+    COUNTER_REPAIR_PAUSE_SECONDS: float = 0.2 # pause between two batches, keeps the job off live writes
+    # request tracing, every message response carries Server-Timing, sampled requests export spans
+    TRACE_SAMPLE_ALL: bool = False # sample every request, otherwise only `X-Trace: 1` or a sampled `traceparent`
+    TRACE_EXPORT_FILE: Optional[str] = None # append OTLP/JSON traces to this file, one per line
+    TRACE_EXPORT_ENDPOINT: Optional[str] = None # OTLP/HTTP JSON collector, e.g. http://localhost:4318/v1/traces
+    TRACE_SERVICE_NAME: str = "ai-agent-platform"
+    # POST /message/text/batch
+    BATCH_MAX_ITEMS: int = 1000 # items accepted per batch request
+    BATCH_CONCURRENCY: int = 16 # LLM calls running at once per batch request
+    # /message/ws/{session_id} chat WebSockets
+    WS_MAX_CONNECTIONS: int = 1000 # per process, further connections are refused with close code 1013
+    WS_IDLE_TIMEOUT_SECONDS: float = 300 # close connections that send nothing for this long
+    WS_MAX_FRAME_BYTES: int = 10_000_000 # largest accepted text message or voice note
+    # shared pool for blocking and CPU-bound work (audio sniffing), keeps it off the event loop
+    EXECUTOR_KIND: str = "thread" # "thread" or "process"
+    EXECUTOR_MAX_WORKERS: int = 4
+    LOOP_LAG_INTERVAL_MS: float = 100 # event loop lag sampling interval, 0 disables the monitor
+    # list endpoints (agents, sessions, messages) read column tuples and write them with orjson,
+    # skipping ORM objects and response model validation
+    FAST_LIST_SERIALIZATION: bool = False
+    # sent with the ETag of conversations, agents and sessions, clients revalidate with If-None-Match
+    HTTP_CACHE_CONTROL: str = "private, no-cache"
+    # /message/conversation/{session_id}/since/{message_id} long-polling
+    LONG_POLL_MAX_WAIT_SECONDS: float = 30 # largest accepted `wait`, the request holds no DB connection meanwhile
+    # admission control, requests running at once per endpoint class (per process), 0 is unlimited
+    ADMISSION_TEXT_CONCURRENCY: int = 64 # POST /message/text and /message/text/batch
+    ADMISSION_VOICE_CONCURRENCY: int = 16 # POST /message/voice
+    ADMISSION_LIST_CONCURRENCY: int = 128 # conversation, search and agent/session list reads
+    ADMISSION_QUEUE_SIZE: int = 100 # requests waiting per class for a free slot, further ones get 503 right away
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10 # a request waiting longer gets 503
+    # end-to-end deadlines of API requests, `X-Request-Timeout` (seconds) overrides the default;
+    # the request is cancelled when it passes or the client disconnects
+    REQUEST_TIMEOUT_SECONDS: float = 60
+    REQUEST_TIMEOUT_VOICE_SECONDS: float = 120 # POST /message/voice, STT + LLM + TTS
+    REQUEST_TIMEOUT_BATCH_SECONDS: float = 600 # POST /message/text/batch
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 600 # largest accepted X-Request-Timeout
+    # LLM token quotas per agent, in memory per worker (sliding window)
+    AGENT_TOKEN_QUOTA: int = 0 # tokens per window for agents without their own token_quota, 0 is unlimited
+    TOKEN_QUOTA_WINDOW_SECONDS: float = 3600
+    # startup warm-up, /health/ready only passes once it is done
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 5 # pooled connections opened and primed ahead of traffic, capped at the pool size
+    WARMUP_LLM_CONNECT: bool = True # open the LLM HTTP connection (DNS, TCP, TLS) before the first request
+    WARMUP_TIMEOUT_SECONDS: float = 30 # a step still running after this is given up, readiness is not held back
+    # cache for agent and session lookups
+    CACHE_BACKEND: str = "memory" # "memory" (per process) or "redis" (shared by all workers, needs the redis package)
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "aiap" # namespaces every cache key and the invalidation channel
+    CACHE_TTL_SECONDS: float = 60
+    CACHE_NEGATIVE_TTL_SECONDS: float = 5 # how long a missing id is remembered, 0 disables negative caching
+    CACHE_LOCAL_TTL_SECONDS: float = 5 # with redis, hits are also kept in process this long unless invalidated
+    CACHE_MAX_ENTRIES: int = 10_000
     model_config = SettingsConfigDict(
         env_file=str(Path(__file__).parent.parent.parent / '.env'),extra='ignore')
 
+    def model_post_init(self, __context) -> None:
+        if self.LOG_LEVEL is None:
+            self.LOG_LEVEL = "DEBUG" if self.ENV == "Development" else "INFO"
+
 settings = Settings()
@@ -1,8 +1,12 @@
 
-from typing import AsyncGenerator
+import asyncio
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from src.core import settings, logger
+from src.core.metrics import track_stage
+from src.core.deadline import remaining
 
 
 DATABASE_URL = settings.DATABASE_URL
@@ -19,6 +23,29 @@ async_engine = create_async_engine(
     pool_recycle=3600 # Recycle connections every hour
 )
 
+# --- Query metrics ---
+# every statement is recorded as the "db_query" stage (and span), timed around the DBAPI cursor call;
+# none is started once the request's deadline passed, running ones are cancelled with the request
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    remaining()
+    stage = track_stage("db_query")
+    stage.__enter__()
+    conn.info.setdefault("query_stages", []).append(stage)
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_stages"].pop().__exit__(None, None, None)
+
+
+@event.listens_for(async_engine.sync_engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_stages"):
+        exc = exception_context.original_exception
+        conn.info["query_stages"].pop().__exit__(type(exc), exc, None)
+
 # Create a session factory
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -27,6 +54,26 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+async def warm_up_database(connections: int, prime: Optional[Callable[[AsyncSession], Awaitable]] = None) -> None:
+    """
+    Opens up to `connections` pooled connections at once and runs `prime` on each of them,
+    so the first requests find the pool connected and their statements already compiled
+    (SQLAlchemy's cache) and prepared (the driver's per-connection statement cache).
+    """
+    pool_size = getattr(async_engine.pool, "size", lambda: 1)()
+    connections = max(1, min(connections, pool_size))
+
+    async def open_connection() -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+            if prime is not None:
+                await prime(session)
+
+    # the sessions run side by side, each holds its own connection until all are open
+    await asyncio.gather(*(open_connection() for _ in range(connections)))
+    logger.info(f"database pool warmed up with {connections} connections")
+
+
 # --- Dependency Injection Utility ---
 async def get_db_async_session() -> AsyncGenerator[AsyncSession, None]:
     """
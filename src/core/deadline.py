@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+from contextvars import ContextVar, copy_context
+from typing import Any, Coroutine, Optional, TypeVar
+from src.core.logger import logger
+from src.core.metrics import REQUESTS_CANCELLED
+
+T = TypeVar("T")
+
+# monotonic time the current request must be answered by, None outside of requests
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current request ran out of time, answered with 504."""
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the current request's deadline, None without one. Raises
+    `DeadlineExceeded` once it passed, so no new upstream call or query is started.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left
+
+
+async def finish_before_cancel(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs `coroutine` to the end even when the caller is cancelled meanwhile (client gone,
+    deadline passed), then lets the cancellation through. For writes that must not be cut
+    halfway, e.g. a message insert and its counters. The request deadline does not apply
+    to it, or a query of the write could still fail with `DeadlineExceeded`.
+    """
+    context = copy_context()
+    context.run(_deadline.set, None)
+    task = asyncio.get_running_loop().create_task(coroutine, context=context)
+    cancelled = False
+    while True:
+        try:
+            result = await asyncio.shield(task)
+            break
+        except asyncio.CancelledError:
+            if task.done():
+                raise
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError()
+    return result
+
+
+class RequestDeadlineMiddleware:
+    """
+    ASGI middleware giving requests under `path_prefix` an end-to-end deadline and
+    cancelling them when the client goes away.
+
+    The deadline is `X-Request-Timeout` (seconds, capped at `max_timeout`) or the default
+    of the endpoint: `timeouts` maps paths (relative to `path_prefix`) to their own default.
+    It starts when the request arrived, `scope["state"]["received_at"]` when an outer
+    middleware (admission) held it, and is available to the request through `remaining()`,
+    which bounds every OpenAI call.
+    When the client disconnects or the deadline passes before the response is complete, the
+    request task is cancelled, which cancels the upstream calls in flight; a deadline that
+    passes before the response started is answered with 504.
+    """
+
+    def __init__(self, app, path_prefix: str = "", default: float = 60, timeouts: Optional[dict[str, float]] = None, max_timeout: float = 600) -> None:
+        self.app = app
+        self.path_prefix = path_prefix
+        self.default = default
+        self.timeouts = timeouts or {}
+        self.max_timeout = max_timeout
+
+    def _timeout(self, scope) -> float:
+        default = self.timeouts.get(scope["path"][len(self.path_prefix):].rstrip("/"), self.default)
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout":
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, self.max_timeout)
+        return default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        timeout = self._timeout(scope)
+        response = {"started": False, "complete": False}
+        # the client is read here only, so a disconnect is seen whatever the endpoint is doing
+        messages: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def read_client() -> None:
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        async def receive_from_client():
+            if disconnected.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def send_to_client(message) -> None:
+            if message["type"] == "http.response.start":
+                response["started"] = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response["complete"] = True
+            await send(message)
+
+        deadline = scope.get("state", {}).get("received_at", time.monotonic()) + timeout
+        token = _deadline.set(deadline)
+        try:
+            request = asyncio.create_task(self.app(scope, receive_from_client, send_to_client))
+        finally:
+            _deadline.reset(token)
+        reader = asyncio.create_task(read_client())
+        gone = asyncio.create_task(disconnected.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {request, gone}, timeout=max(0, deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if request in done or response["complete"]:
+                await request  # a disconnect after the response is only the connection closing
+                return
+            reason = "disconnect" if gone in done else "deadline"
+            request.cancel()
+            try:
+                await request
+            except asyncio.CancelledError:
+                pass
+            REQUESTS_CANCELLED.inc(reason=reason)
+            logger.warning(f"{scope['method']} {scope['path']} cancelled on {reason}, its deadline was {timeout:g}s")
+            if reason == "deadline" and not response["started"]:
+                body = json.dumps({"detail": "Request deadline exceeded"}).encode()
+                await send({
+                    "type": "http.response.start", "status": 504,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+        except asyncio.CancelledError:
+            request.cancel()
+            raise
+        finally:
+            reader.cancel()
+            gone.cancel()
@@ -0,0 +1,82 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+from src.core.configs import settings
+from src.core.logger import logger
+from src.core.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_TASK_DURATION, EXECUTOR_WAIT_DURATION
+
+T = TypeVar("T")
+
+
+def _timed(func: Callable[..., T], args: tuple, kwargs: dict) -> tuple[float, float, T]:
+    # runs in the worker, monotonic time is system wide so process workers can be compared too
+    started = time.monotonic()
+    result = func(*args, **kwargs)
+    return started, time.monotonic() - started, result
+
+
+class BlockingExecutor:
+    """
+    Shared pool for blocking and CPU-bound work, so it does not stall the event loop.
+
+    `kind` is "thread" (default, fine for C code releasing the GIL such as libmagic) or
+    "process" for pure Python CPU work; process workers are spawned, not forked, and only
+    take picklable module level functions and arguments. Every task records how long it
+    waited for a worker and how long it ran, `executor_queue_depth` counts waiting tasks.
+
+        mime = await run_blocking(magic.from_buffer, header, mime=True)
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4) -> None:
+        if kind not in ("thread", "process"):
+            raise ValueError(f"unknown executor kind {kind!r}, expected thread or process")
+        self.kind = kind
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+
+    def start(self) -> Executor:
+        """Creates the pool, also done on first use outside of the app (scripts)."""
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="blocking")
+            logger.info(f"blocking work runs in a {self.kind} pool of {self.max_workers} workers")
+        return self._pool
+
+    async def stop(self) -> None:
+        """Waits for running tasks and shuts the pool down, queued tasks are cancelled."""
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    def _set_depth(self) -> None:
+        EXECUTOR_QUEUE_DEPTH.set(max(0, self._in_flight - self.max_workers))
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs `func(*args, **kwargs)` in the pool and returns its result."""
+        pool = self._pool or self.start()
+        task = getattr(func, "__name__", "task")
+        submitted = time.monotonic()
+        self._in_flight += 1
+        self._set_depth()
+        try:
+            started, duration, result = await asyncio.get_running_loop().run_in_executor(pool, _timed, func, args, kwargs)
+        finally:
+            self._in_flight -= 1
+            self._set_depth()
+        EXECUTOR_WAIT_DURATION.observe(max(0.0, started - submitted), task=task)
+        EXECUTOR_TASK_DURATION.observe(duration, task=task)
+        return result
+
+
+executor = BlockingExecutor(kind=settings.EXECUTOR_KIND, max_workers=settings.EXECUTOR_MAX_WORKERS)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs a blocking or CPU-bound call in the shared executor."""
+    return await executor.run(func, *args, **kwargs)
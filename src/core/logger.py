@@ -1,24 +1,145 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+from src.core.configs import settings
 
 # Define the log format
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+
+def truncate(text: str, limit: int) -> str:
+    """Cuts `text` to `limit` characters, noting how much was dropped."""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+
+class TextFormatter(logging.Formatter):
+    """Classic one line text format, with the message truncated to `max_chars`."""
+
+    def __init__(self, max_chars: int) -> None:
+        super().__init__(LOG_FORMAT, datefmt=DATE_FORMAT)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, self.max_chars)
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the message truncated to `max_chars`."""
+
+    def __init__(self, max_chars: int) -> None:
+        super().__init__(datefmt=DATE_FORMAT)
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage(), self.max_chars),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread, which only writes them out.
+
+    As with `QueueHandler`, records are formatted (and truncated) here, on the caller's
+    thread, so the queue never holds `%s` arguments that may change or keep large prompts
+    and API responses alive. When the queue is full the record is dropped and counted,
+    before being formatted, instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.queue.full():
+            self.dropped += 1
+            return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)  # formatted message, args and exc_info cleared
+        record.stack_info = None  # already part of the formatted message
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RestartableQueueListener(QueueListener):
+    """`QueueListener` whose `start` and `stop` may be called again, e.g. when the app restarts in-process."""
+
+    running = False
+
+    def start(self) -> None:
+        if not self.running:
+            super().start()
+            self.running = True
+
+    def stop(self) -> None:
+        if self.running:
+            super().stop()
+            self.running = False
+
+
 def setup_logger(name: str = "ai_agent_logger", level: str = "debug") -> logging.Logger:
     """
-    Sets up a stream logger that outputs to stdout.
+    Sets up a logger that writes to stdout from a background thread.
+
+    Callers format records (JSON or text as per `LOG_FORMAT`) and enqueue them,
+    a `QueueListener` thread writes them out.
     """
     logger = logging.getLogger(name)
     logger.setLevel(level.upper())
-    logger.propagate = False 
+    logger.propagate = False
     if not logger.handlers:
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        if settings.LOG_FORMAT.lower() == "json":
+            queue_handler.setFormatter(JsonFormatter(settings.LOG_MAX_MESSAGE_CHARS))
+        else:
+            queue_handler.setFormatter(TextFormatter(settings.LOG_MAX_MESSAGE_CHARS))
+        logger.addHandler(queue_handler)
         stream_handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
-        
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))  # records arrive formatted
+        listener = RestartableQueueListener(log_queue, stream_handler, respect_handler_level=False)
+        listener.start()
+        logger.listener = listener
+        atexit.register(stop_logger, logger)
+
     return logger
 
+
+def start_logger(logger: logging.Logger) -> None:
+    """(Re)starts the listener thread if it was stopped, e.g. when the app is started again in-process."""
+    listener = getattr(logger, "listener", None)
+    if listener is not None:
+        listener.start()
+
+
+def stop_logger(logger: logging.Logger) -> None:
+    """Flushes queued records and stops the listener thread, safe to call more than once."""
+    listener = getattr(logger, "listener", None)
+    if listener is not None:
+        listener.stop()
+
+
 # Global instance for use across modules
-logger = setup_logger(level="Debug")
\ No newline at end of file
+logger = setup_logger(level=settings.LOG_LEVEL)
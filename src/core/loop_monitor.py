@@ -0,0 +1,42 @@
+import asyncio
+import time
+from typing import Optional
+from src.core.logger import logger
+from src.core.metrics import EVENT_LOOP_LAG
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: sleeps `interval` seconds in a loop and records how much
+    later than asked it woke up. Anything blocking the loop (CPU work, blocking IO)
+    shows up as lag for every request in flight, so this should stay near zero.
+    """
+
+    def __init__(self, interval: float = 0.1, warn_after: float = 0.5) -> None:
+        self.interval = interval
+        self.warn_after = warn_after
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts sampling, must be called from the running event loop."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag > self.warn_after:
+                logger.warning("event loop was blocked for %.0f ms", lag * 1000)
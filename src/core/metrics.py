@@ -0,0 +1,256 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Iterable, Optional
+from src.core.tracing import span
+
+# seconds, covers fast DB queries up to slow LLM turns
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class, a named metric with a fixed set of label names."""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, float] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (last is +Inf)..., sum, count]
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[-1]) if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), series):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds every metric of the process and renders them in Prometheus text format.
+
+    Metrics are plain dicts keyed by label values and updated from the event loop,
+    so recording is a dict lookup and an addition, cheap enough to stay on in production.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "stage_duration_seconds", "Duration of request processing stages.", ["stage"]
+)
+STAGE_IN_FLIGHT = registry.gauge(
+    "stage_in_flight", "Stage executions currently running.", ["stage"]
+)
+OPENAI_ERRORS = registry.counter(
+    "openai_errors_total", "OpenAI errors surfaced to clients, by exception type.", ["type"]
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM token usage reported by the provider.", ["model", "kind"]
+)
+LLM_MODEL_ROUTING = registry.counter(
+    "llm_model_routing_total", "Text model chosen per turn, by route (agent, fast, default) and model.", ["route", "model"]
+)
+WEBSOCKET_CONNECTIONS = registry.gauge(
+    "websocket_connections", "Open chat WebSocket connections."
+)
+WEBSOCKET_MESSAGES = registry.counter(
+    "websocket_messages_total", "Frames received on chat WebSockets, by type (text, voice).", ["type"]
+)
+LLM_HEDGES = registry.counter(
+    "llm_hedges_total", "Hedged LLM requests by outcome: fired, won (backup first), lost (primary first), over_budget.", ["outcome"]
+)
+LLM_HEDGE_DELAY = registry.gauge(
+    "llm_hedge_delay_seconds", "Current wait before a hedged LLM attempt is fired."
+)
+WRITE_BEHIND_QUEUED = registry.gauge(
+    "message_write_behind_queued", "Messages waiting in the write-behind buffer."
+)
+WRITE_BEHIND_DROPPED = registry.counter(
+    "message_write_behind_dropped_total", "Queued messages dropped because their insert failed on its own."
+)
+CACHE_BACKEND_ERRORS = registry.counter(
+    "cache_backend_errors_total", "Cache backend calls that failed and fell back to the database, by operation.", ["operation"]
+)
+REQUESTS_CANCELLED = registry.counter(
+    "requests_cancelled_total", "Requests cancelled before their response was complete, by reason (disconnect, deadline).", ["reason"]
+)
+STAGES_CANCELLED = registry.counter(
+    "stage_cancelled_total", "Stage executions (LLM, STT, TTS, queries...) cancelled while running.", ["stage"]
+)
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "admission_in_flight", "Admitted requests running, by endpoint class.", ["endpoint"]
+)
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "admission_queue_depth", "Requests waiting for admission, by endpoint class.", ["endpoint"]
+)
+ADMISSION_WAIT_DURATION = registry.histogram(
+    "admission_wait_seconds", "Time queued requests waited for admission, by endpoint class.", ["endpoint"]
+)
+ADMISSION_REJECTIONS = registry.counter(
+    "admission_rejections_total", "Requests refused with 503 by endpoint class and reason (queue_full, timeout).", ["endpoint", "reason"]
+)
+TOKEN_QUOTA_REJECTIONS = registry.counter(
+    "token_quota_rejections_total", "Turns refused because their agent used up its token quota."
+)
+LONG_POLL_WAITING = registry.gauge(
+    "long_poll_waiting", "Requests long-polling a conversation for new messages."
+)
+WARMUP_DURATION = registry.gauge(
+    "warmup_duration_seconds", "How long each startup warm-up step took.", ["step"]
+)
+EXECUTOR_QUEUE_DEPTH = registry.gauge(
+    "executor_queue_depth", "Blocking tasks waiting for a free executor worker."
+)
+EXECUTOR_WAIT_DURATION = registry.histogram(
+    "executor_wait_seconds", "Time blocking tasks waited for an executor worker.", ["task"]
+)
+EXECUTOR_TASK_DURATION = registry.histogram(
+    "executor_task_seconds", "Run time of blocking tasks in the executor.", ["task"]
+)
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke up a sleeping task.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class track_stage:
+    """
+    Times a block as a stage, updating `stage_duration_seconds` and `stage_in_flight`
+    and recording it as a span of the current request trace.
+
+        with track_stage("llm"):
+            await client.responses.create(...)
+    """
+    __slots__ = ("stage", "started", "_span")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.started: Optional[float] = None
+        self._span = span(stage)
+
+    def __enter__(self) -> "track_stage":
+        STAGE_IN_FLIGHT.inc(stage=self.stage)
+        self._span.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        STAGE_DURATION.observe(time.perf_counter() - self.started, stage=self.stage)
+        STAGE_IN_FLIGHT.dec(stage=self.stage)
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            STAGES_CANCELLED.inc(stage=self.stage)
+        self._span.__exit__(exc_type, exc, tb)
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from src.core.configs import settings
+from src.core.logger import logger
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation inside a request trace, with OpenTelemetry compatible ids."""
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Optional[dict] = None) -> None:
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+
+class RequestTrace:
+    """
+    Spans recorded while serving one request.
+
+    Top level stages (direct children of the root span) are summed per name for the
+    `Server-Timing` header; the whole span tree is exported only when `sampled`.
+    """
+
+    def __init__(self, name: str, sampled: bool = False, trace_id: Optional[str] = None, parent_id: Optional[str] = None) -> None:
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.sampled = sampled
+        self.root = Span(name, parent_id)
+        self.spans: list[Span] = []
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value: top level stages in first-seen order, plus the total so far."""
+        totals: dict[str, float] = {}
+        for child in self.spans:
+            if child.parent_id == self.root.span_id and child.end_ns is not None:
+                totals[child.name] = totals.get(child.name, 0.0) + child.duration_ms
+        entries = [f"{name};dur={duration:.1f}" for name, duration in totals.items()]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def to_otlp(self) -> dict:
+        """The trace as an OTLP/JSON `ExportTraceServiceRequest`."""
+        def encode(span: Span, kind: int) -> dict:
+            encoded = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or time.time_ns()),
+                "attributes": [
+                    {"key": key, "value": {"stringValue": str(value)}} for key, value in span.attributes.items()
+                ],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                encoded["parentSpanId"] = span.parent_id
+            return encoded
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}},
+                {"key": "service.version", "value": {"stringValue": settings.APP_VERSION}},
+                {"key": "deployment.environment", "value": {"stringValue": settings.ENV}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "src.core.tracing"},
+                # SPAN_KIND_SERVER for the request, SPAN_KIND_INTERNAL for stages
+                "spans": [encode(self.root, 2), *(encode(span, 1) for span in self.spans)],
+            }],
+        }]}
+
+
+class span:
+    """
+    Records a block as a span of the current request trace, a no-op outside traced requests.
+
+        with span("history"):
+            history = await repository.get_message_conversion_history(...)
+    """
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, **attributes) -> None:
+        self.name = name
+        self.attributes = attributes
+        self._span: Optional[Span] = None
+        self._token = None
+
+    def __enter__(self) -> Optional[Span]:
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        parent = _current_span.get() or trace.root
+        self._span = Span(self.name, parent.span_id, self.attributes)
+        trace.spans.append(self._span)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._span is None:
+            return
+        self._span.end_ns = time.time_ns()
+        if exc is not None:
+            self._span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def _parse_traceparent(value: str) -> Optional[tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a W3C `traceparent` header."""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 0x01)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+async def export_trace(trace: RequestTrace) -> None:
+    """Ships a sampled trace to the OTLP/HTTP collector and/or appends it to the trace file."""
+    payload = json.dumps(trace.to_otlp(), separators=(",", ":"))
+    try:
+        if settings.TRACE_EXPORT_FILE:
+            await asyncio.to_thread(_append_line, settings.TRACE_EXPORT_FILE, payload)
+        if settings.TRACE_EXPORT_ENDPOINT:
+            import httpx  # only needed when exporting to a collector
+
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.post(
+                    settings.TRACE_EXPORT_ENDPOINT, content=payload, headers={"Content-Type": "application/json"}
+                )
+                response.raise_for_status()
+    except Exception as exc:
+        logger.warning(f"failed to export trace {trace.trace_id}: {exc}")
+
+
+def _append_line(path: str, line: str) -> None:
+    with open(path, "a", encoding="utf-8") as trace_file:
+        trace_file.write(line + "\n")
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware tracing requests under `path_prefix`.
+
+    Every response gets a `Server-Timing` header with the request's top level stages.
+    A request is sampled (span tree exported) when it sends `X-Trace: 1`, a sampled
+    W3C `traceparent`, or when `TRACE_SAMPLE_ALL` is set; sampled responses carry `X-Trace-Id`.
+    """
+
+    def __init__(self, app, path_prefix: str = "") -> None:
+        self.app = app
+        self.path_prefix = path_prefix
+        self._exports: set[asyncio.Task] = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        sampled = settings.TRACE_SAMPLE_ALL or headers.get(b"x-trace", b"").lower() in (b"1", b"true")
+        trace_id = parent_id = None
+        traceparent = _parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        if traceparent:
+            trace_id, parent_id, parent_sampled = traceparent
+            sampled = sampled or parent_sampled
+        trace = RequestTrace(f"{scope['method']} {scope['path']}", sampled, trace_id, parent_id)
+        trace.root.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+        token = _current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                response_headers = list(message.get("headers", []))
+                response_headers.append((b"server-timing", trace.server_timing().encode()))
+                if trace.sampled:
+                    response_headers.append((b"x-trace-id", trace.trace_id.encode()))
+                message = {**message, "headers": response_headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception as exc:
+            trace.root.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            trace.root.end_ns = time.time_ns()
+            _current_trace.reset(token)
+            if trace.sampled:
+                task = asyncio.create_task(export_trace(trace))
+                self._exports.add(task)
+                task.add_done_callback(self._exports.discard)
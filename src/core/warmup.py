@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from src.core.logger import logger
+from src.core.metrics import WARMUP_DURATION
+
+
+class WarmUp:
+    """
+    Startup warm-up steps run in the background, and the readiness they gate.
+
+    `start()` runs every step concurrently (a step is an async callable, its own work is
+    sequential) so the process answers liveness checks right away while connections,
+    statements and libraries are prepared. `ready` turns true once all steps finished.
+    A failing or timed out step is logged and reported but does not hold readiness back,
+    the first requests then simply pay for it as they would without warm-up.
+
+        warmup = WarmUp(timeout=30)
+        warmup.add("database", open_connections)
+        warmup.start()
+    """
+
+    def __init__(self, timeout: float = 30) -> None:
+        self.timeout = timeout
+        self._steps: dict[str, Callable[[], Awaitable]] = {}
+        self._results: dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._done = asyncio.Event()
+
+    def add(self, name: str, step: Callable[[], Awaitable]) -> None:
+        self._steps[name] = step
+        self._results[name] = {"status": "pending"}
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def report(self) -> dict:
+        return {"status": "ready" if self.ready else "warming_up", "steps": self._results}
+
+    def start(self) -> None:
+        """Starts the warm-up, must be called from the running event loop."""
+        if self._task is None and not self.ready:
+            self._task = asyncio.create_task(self._run(), name="warm-up")
+
+    async def stop(self) -> None:
+        """Cancels a warm-up still running at shutdown."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout=self.timeout)
+            result = {"status": "ok"}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+            logger.warning(f"warm-up step {name} did not finish within {self.timeout}s")
+        except Exception as exc:
+            result = {"status": "failed", "error": str(exc)}
+            logger.warning(f"warm-up step {name} failed: {exc!r}")
+        elapsed = time.perf_counter() - started
+        WARMUP_DURATION.set(elapsed, step=name)
+        self._results[name] = {**result, "seconds": round(elapsed, 3)}
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_step(name, step) for name, step in self._steps.items()))
+        self._done.set()
+        logger.info(f"warm-up finished in {time.perf_counter() - started:.2f}s: {self._results}")
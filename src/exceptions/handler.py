@@ -3,8 +3,10 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from openai import OpenAIError, APIError, RateLimitError, APIConnectionError, AuthenticationError
+from openai import OpenAIError, APIError, RateLimitError, APIConnectionError, APITimeoutError, AuthenticationError
 from src.core import logger  
+from src.core.deadline import DeadlineExceeded
+from src.core.metrics import OPENAI_ERRORS
 
 async def global_exception_handler(request: Request, exc: Exception):
     """
@@ -23,9 +25,15 @@ async def global_exception_handler(request: Request, exc: Exception):
             }
         )
     
+    # Request deadline, passed before a query or an OpenAI call could start
+    elif isinstance(exc, DeadlineExceeded):
+        logger.warning(f"Request deadline exceeded on {request.url.path}: {exc!r}")
+        return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+
     # OpenAI Exceptions
     elif isinstance(exc, (OpenAIError, APIError, RateLimitError, APIConnectionError, AuthenticationError)):
         error_type = type(exc).__name__
+        OPENAI_ERRORS.inc(type=error_type)
         logger.error(f"OpenAI API error on {request.url.path}: {str(exc)}", exc_info=True)
         
         # Handle specific OpenAI errors
@@ -35,6 +43,10 @@ async def global_exception_handler(request: Request, exc: Exception):
         elif isinstance(exc, AuthenticationError):
             detail = "OpenAI authentication failed"
             status_code = 401
+        elif isinstance(exc, APITimeoutError):
+            # OpenAI calls are bounded by what is left of the request deadline
+            detail = "OpenAI API request timed out"
+            status_code = 504
         elif isinstance(exc, APIConnectionError):
             detail = "Failed to connect to OpenAI API"
             status_code = 503
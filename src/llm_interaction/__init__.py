@@ -0,0 +1,7 @@
+from .base import LLMProvider
+from .openai_client import AsyncOpenAIClient
+from .hedging import HedgedProvider
+from .recording import RecordReplayProvider, RecordingNotFoundError
+from .provider import build_llm_provider, get_llm_provider, close_llm_provider
+from .routing import choose_text_model
+from .usage import TokenUsage, track_usage, record_usage
@@ -0,0 +1,56 @@
+from typing import AsyncIterator, Optional, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class LLMProvider(Protocol):
+    """
+    What the message service needs from an LLM backend:
+      - text -> text conversation, whole or streamed
+      - audio -> text (STT)
+      - text -> audio (TTS)
+    """
+
+    async def send_text_message(
+        self,
+        content: str,
+        session_id: str,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        """Sends a user message with its context and returns the assistant reply, `model` overrides the default."""
+        ...
+
+    def stream_text_message(
+        self,
+        content: str,
+        session_id: str,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Same as `send_text_message` but yields the reply as text deltas."""
+        ...
+
+    async def speech_to_text(
+        self,
+        mime_type: str,
+        voice_note: bytes,
+        prompt: Optional[str] = None,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        """Transcribes a voice note."""
+        ...
+
+    async def text_to_speech(self, text: str, voice: str = "alloy", format: str = "mp3", model: Optional[str] = None) -> bytes:
+        """Synthesizes `text` and returns the audio bytes."""
+        ...
+
+    async def warm_up(self) -> None:
+        """Opens the connection to the backend ahead of the first request."""
+        ...
+
+    async def aclose(self) -> None:
+        """Releases connections held by the provider."""
+        ...
@@ -0,0 +1,193 @@
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+from src.core import logger
+from src.core.metrics import LLM_HEDGES, LLM_HEDGE_DELAY
+from .base import LLMProvider
+
+
+class HedgedProvider:
+    """
+    Cuts LLM tail latency by hedging text requests.
+
+    When the primary attempt has not produced its first token (the whole reply for
+    `send_text_message`) within the `percentile` of recent first-token latencies, a second
+    attempt is sent to `backup` (the same provider or a fallback model/endpoint). Whichever
+    finishes first wins and the other one is cancelled. Hedges are paid from a token bucket
+    refilled by `budget` per request, so at most that share of requests is ever sent twice.
+    Speech to text and text to speech are not hedged. A requested `model` is only passed to
+    the backup when it is the primary provider itself, a fallback keeps its own model.
+    """
+
+    def __init__(
+        self,
+        primary: LLMProvider,
+        backup: Optional[LLMProvider] = None,
+        percentile: float = 95,
+        budget: float = 0.05,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.05,
+        window: int = 500,
+        min_samples: int = 20,
+    ) -> None:
+        self.primary = primary
+        self.backup = backup or primary
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        # allows a short burst of hedges while keeping the long run rate at `budget`
+        self._budget_cap = max(1.0, budget * 100)
+        self._tokens = self._budget_cap
+
+    def hedge_delay(self) -> float:
+        """How long the primary attempt gets before a hedge is considered."""
+        if len(self._latencies) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            ordered = sorted(self._latencies)
+            delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+        delay = max(delay, self.min_delay)
+        LLM_HEDGE_DELAY.set(delay)
+        return delay
+
+    def _take_budget(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        LLM_HEDGES.inc(outcome="over_budget")
+        return False
+
+    def _start_request(self) -> float:
+        self._tokens = min(self._budget_cap, self._tokens + self.budget)
+        return self.hedge_delay()
+
+    def _backup_model(self, model: Optional[str]) -> Optional[str]:
+        return model if self.backup is self.primary else None
+
+    @staticmethod
+    async def _cancel(task: asyncio.Task) -> None:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await task
+
+    async def _race(self, primary: asyncio.Task, start_backup, started: float, delay: float):
+        """
+        Waits for `primary`, firing `start_backup()` once `delay` has passed without a result.
+        Returns (winning task, whether it is the backup); the losing attempt is cancelled.
+        """
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._take_budget():
+            await primary
+            self._latencies.append(time.perf_counter() - started)
+            return primary, False
+
+        LLM_HEDGES.inc(outcome="fired")
+        backup_started = time.perf_counter()
+        backup = asyncio.create_task(start_backup())
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        is_backup = task is backup
+                        LLM_HEDGES.inc(outcome="won" if is_backup else "lost")
+                        self._latencies.append(time.perf_counter() - (backup_started if is_backup else started))
+                        return task, is_backup
+                    logger.warning(f"{'hedged' if task is backup else 'primary'} LLM attempt failed: {task.exception()!r}")
+            # both attempts failed, surface the primary's error
+            return primary, False
+        finally:
+            for task in pending:
+                await self._cancel(task)
+
+    async def send_text_message(
+        self,
+        content: str,
+        session_id: str,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        delay = self._start_request()
+        started = time.perf_counter()
+        primary = asyncio.create_task(self.primary.send_text_message(content, session_id, prompt, conversation_history, model))
+        try:
+            winner, _ = await self._race(
+                primary,
+                lambda: self.backup.send_text_message(content, session_id, prompt, conversation_history, self._backup_model(model)),
+                started,
+                delay,
+            )
+        except asyncio.CancelledError:
+            await self._cancel(primary)
+            raise
+        return winner.result()
+
+    async def stream_text_message(
+        self,
+        content: str,
+        session_id: str,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        delay = self._start_request()
+        started = time.perf_counter()
+        streams = [self.primary.stream_text_message(content, session_id, prompt, conversation_history, model)]
+
+        async def first_backup_delta() -> str:
+            streams.append(self.backup.stream_text_message(content, session_id, prompt, conversation_history, self._backup_model(model)))
+            return await anext(streams[1])
+
+        primary = asyncio.create_task(anext(streams[0]))
+        winner_stream = streams[0]
+        try:
+            try:
+                winner, is_backup = await self._race(primary, first_backup_delta, started, delay)
+            except StopAsyncIteration:
+                return
+            error = winner.exception()
+            if isinstance(error, StopAsyncIteration):  # empty reply
+                return
+            if error is not None:
+                raise error
+            winner_stream = streams[1] if is_backup else streams[0]
+            for stream in streams:
+                if stream is not winner_stream:
+                    await stream.aclose()
+            yield winner.result()
+            async for delta in winner_stream:
+                yield delta
+        finally:
+            if not primary.done():
+                await self._cancel(primary)
+            await winner_stream.aclose()
+
+    async def speech_to_text(
+        self,
+        mime_type: str,
+        voice_note: bytes,
+        prompt: Optional[str] = None,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        return await self.primary.speech_to_text(mime_type, voice_note, prompt, language, model)
+
+    async def text_to_speech(self, text: str, voice: str = "alloy", format: str = "mp3", model: Optional[str] = None) -> bytes:
+        return await self.primary.text_to_speech(text, voice, format, model)
+
+    async def warm_up(self) -> None:
+        await self.primary.warm_up()
+        if self.backup is not self.primary:
+            await self.backup.warm_up()
+
+    async def aclose(self) -> None:
+        await self.primary.aclose()
+        if self.backup is not self.primary:
+            await self.backup.aclose()
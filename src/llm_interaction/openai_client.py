@@ -1,14 +1,23 @@
 import base64
-from io import BytesIO 
+import time
 from pathlib import Path
-from typing import Optional, Tuple
-from openai import AsyncOpenAI
+from typing import AsyncIterator, Optional, Tuple
+from openai import AsyncOpenAI, NOT_GIVEN
 from src.core import settings, logger
+from src.core.metrics import track_stage, LLM_TOKENS, STAGE_DURATION
+from src.core.deadline import remaining
+from .usage import record_usage
 
 
 OPEN_API_API_KEY = settings.OPENAI_API_KEY
 
 
+def _request_timeout():
+    """What is left of the current request's deadline for one OpenAI call, the client default outside of requests."""
+    left = remaining()
+    return NOT_GIVEN if left is None else left
+
+
 class AsyncOpenAIClient:
     """
     Async wrapper around OpenAI for:
@@ -30,10 +39,11 @@ class AsyncOpenAIClient:
         tts_model: str = "gpt-4o-mini-tts",  
         stt_model: str = "gpt-4o-mini-transcribe",
         max_retries: int = 3,
-        base_retry_delay: float = 0.5
+        base_retry_delay: float = 0.5,
+        base_url: Optional[str] = None,
     ) -> None:
         self.api_key = OPEN_API_API_KEY
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.client = AsyncOpenAI(api_key=self.api_key, base_url=base_url or settings.OPENAI_BASE_URL)
         self.text_model = text_model
         self.tts_model = tts_model
         self.stt_model = stt_model
@@ -54,7 +64,7 @@ class AsyncOpenAIClient:
         if conversation_history:
             messages.extend(conversation_history)
         messages.append({"role": "user", "content": user_message})
-        logger.debug(f"Generated LLM input messages for session {session_id}: {messages}")
+        logger.debug("Generated LLM input messages for session %s: %s", session_id, messages)
         return messages
     
 
@@ -64,6 +74,7 @@ class AsyncOpenAIClient:
         session_id: int,
         prompt: Optional[str] = "",
         conversation_history: Optional[list[dict]] =[],
+        model: Optional[str] = None,
     ) -> str:
         """
         Send a user message and get a text response.
@@ -75,25 +86,88 @@ class AsyncOpenAIClient:
                 {"role": "user", "content": "Hi"},
                 {"role": "assistant", "content": "Hello!"}
             ]
+        model: optional model, `text_model` by default
         :return: assistant response text
         """
         messages = await self._generate_llm_input(
             user_message=content,session_id=session_id,
             prompt=prompt, conversation_history=conversation_history)
-        logger.debug(f"Sending message to OpenAI: {content} within session {session_id} and system prompt: {prompt} including {len(conversation_history) if conversation_history else 0} previous messages")
-        response = await self.client.responses.create(
-            model=self.text_model,
-            input = messages
+        logger.debug(
+            "Sending message to OpenAI: %s within session %s and system prompt: %s including %d previous messages",
+            content, session_id, prompt, len(conversation_history) if conversation_history else 0,
         )
-        logger.debug(f"Received response from OpenAI for message {content} within session {session_id}: {response}")
-        return response.output_text 
+        with track_stage("llm"):
+            response = await self.client.responses.create(
+                model=model or self.text_model,
+                input = messages,
+                timeout=_request_timeout(),
+            )
+        self._record_usage(response)
+        logger.debug("Received response from OpenAI for message %s within session %s: %s", content, session_id, response)
+        return response.output_text
+
+    async def stream_text_message(
+        self,
+        content: str,
+        session_id: int,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = [],
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Send a user message and yield the response text as it is generated.
+
+        The whole stream is timed as the `llm` stage and the first delta as `llm_first_token`,
+        as metrics only: a span can not stay open across the consumer's `yield`s.
+        """
+        messages = await self._generate_llm_input(
+            user_message=content, session_id=session_id,
+            prompt=prompt, conversation_history=conversation_history)
+        started = time.perf_counter()
+        first_token = True
+        try:
+            stream = await self.client.responses.create(model=model or self.text_model, input=messages, stream=True, timeout=_request_timeout())
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    if first_token:
+                        STAGE_DURATION.observe(time.perf_counter() - started, stage="llm_first_token")
+                        first_token = False
+                    yield event.delta
+                elif event.type == "response.completed":
+                    self._record_usage(event.response)
+        finally:
+            STAGE_DURATION.observe(time.perf_counter() - started, stage="llm")
+
+    async def warm_up(self) -> None:
+        """
+        Lists the models once, which resolves the host, does the TLS handshake and checks the
+        API key, the connection then stays in the pool for the first real request.
+        """
+        await self.client.models.list()
+
+    async def aclose(self) -> None:
+        """Closes the underlying HTTP connection pool."""
+        await self.client.close()
+
+    def _record_usage(self, response) -> None:
+        """Adds the token usage reported in a Responses API result to the token counters and the tracked usage."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        model = getattr(response, "model", None) or self.text_model
+        LLM_TOKENS.inc(usage.input_tokens or 0, model=model, kind="input")
+        LLM_TOKENS.inc(usage.output_tokens or 0, model=model, kind="output")
+        details = getattr(usage, "input_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) if details else 0
+        LLM_TOKENS.inc(cached or 0, model=model, kind="cached")
+        record_usage(usage.input_tokens or 0, usage.output_tokens or 0, cached or 0)
 
-    
     async def text_to_speech(
         self,
         text: str,
         voice: str = "alloy",   
         format: str = "mp3",   
+        model: Optional[str] = None,
     ) -> bytes:
         """
         Convert text to speech and save to `output_path`.
@@ -101,17 +175,20 @@ class AsyncOpenAIClient:
             text: text to synthesize
             voice: voice name (depends on the model)
             format: output audio format (e.g. 'mp3', 'wav')
+            model: optional model, `tts_model` by default
         Returns: 
             Bytes of the synthesized audio file.
         """
-        result = await self.client.audio.speech.create(
-            model=self.tts_model,
-            voice=voice,
-            input=text,
-            response_format=format
-        )
-        audio_bytes = await result.aread()
-        logger.debug(f"TTS generated audio bytes length: {len(audio_bytes)} for text: {text!r}")
+        with track_stage("tts"):
+            result = await self.client.audio.speech.create(
+                model=model or self.tts_model,
+                voice=voice,
+                input=text,
+                response_format=format,
+                timeout=_request_timeout(),
+            )
+            audio_bytes = await result.aread()
+        logger.debug("TTS generated audio bytes length: %d for text: %r", len(audio_bytes), text)
         return audio_bytes
     
     async def speech_to_text(
@@ -120,6 +197,7 @@ class AsyncOpenAIClient:
         voice_note: bytes,
         prompt: Optional[str] = None,
         language: Optional[str] = None,
+        model: Optional[str] = None,
     ) -> str:
         """
         Transcribe speech from a local audio file to text.
@@ -127,19 +205,20 @@ class AsyncOpenAIClient:
             audio_path: path to an audio file (wav, mp3, m4a, etc.)
             prompt: optional transcription hint
             language: optional language hint (e.g. 'en', 'ar')
+            model: optional model, `stt_model` by default
         Returns:
             transcript text
         """
-        voice_note = BytesIO(voice_note)
-        voice_note.name = f"voice_note.{mime_type}"
-        transcription = await self.client.audio.transcriptions.create(
-            model=self.stt_model,
-            file= voice_note,
-            prompt=prompt,
-            language=language,
-        )
+        with track_stage("stt"):
+            transcription = await self.client.audio.transcriptions.create(
+                model=model or self.stt_model,
+                file=(f"voice_note.{mime_type}", voice_note), # the bytes are sent as they are, no file object copy
+                prompt=prompt,
+                language=language,
+                timeout=_request_timeout(),
+            )
       
         transcript = getattr(transcription, "text", None) or transcription.get("text")
-        logger.debug(f"STT transcript: {transcript}")
+        logger.debug("STT transcript: %s", transcript)
         return transcript
     
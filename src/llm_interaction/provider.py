@@ -0,0 +1,62 @@
+from pathlib import Path
+from typing import Optional
+from src.core import settings, logger
+from .base import LLMProvider
+from .hedging import HedgedProvider
+from .openai_client import AsyncOpenAIClient
+from .recording import RecordReplayProvider
+
+_provider: Optional[LLMProvider] = None
+
+
+def build_llm_provider() -> LLMProvider:
+    """Builds the provider selected by `LLM_PROVIDER`, hedged when `LLM_HEDGE_ENABLED`."""
+    provider = _build_base_provider()
+    if not settings.LLM_HEDGE_ENABLED:
+        return provider
+    backup = None
+    if settings.LLM_HEDGE_FALLBACK_MODEL or settings.LLM_HEDGE_FALLBACK_BASE_URL:
+        fallback = {"base_url": settings.LLM_HEDGE_FALLBACK_BASE_URL}
+        if settings.LLM_HEDGE_FALLBACK_MODEL:
+            fallback["text_model"] = settings.LLM_HEDGE_FALLBACK_MODEL
+        backup = AsyncOpenAIClient(**fallback)
+    logger.info(
+        f"LLM requests are hedged at p{settings.LLM_HEDGE_PERCENTILE:g} with a {settings.LLM_HEDGE_BUDGET:.0%} budget"
+        f" against {'a fallback' if backup else 'the same provider'}"
+    )
+    return HedgedProvider(
+        provider,
+        backup,
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        budget=settings.LLM_HEDGE_BUDGET,
+        initial_delay=settings.LLM_HEDGE_INITIAL_DELAY_MS / 1000,
+        min_delay=settings.LLM_HEDGE_MIN_DELAY_MS / 1000,
+    )
+
+
+def _build_base_provider() -> LLMProvider:
+    """The provider selected by `LLM_PROVIDER`: `openai`, `record` or `replay`."""
+    kind = settings.LLM_PROVIDER.lower()
+    if kind == "openai":
+        return AsyncOpenAIClient()
+    if kind in ("record", "replay"):
+        inner = AsyncOpenAIClient() if kind == "record" else None
+        logger.info(f"LLM calls are {kind}ed {'to' if kind == 'record' else 'from'} {settings.LLM_CASSETTE_DIR}")
+        return RecordReplayProvider(kind, Path(settings.LLM_CASSETTE_DIR), inner, settings.LLM_REPLAY_SPEED)
+    raise ValueError(f"unknown LLM_PROVIDER {settings.LLM_PROVIDER!r}, expected openai, record or replay")
+
+
+def get_llm_provider() -> LLMProvider:
+    """The process wide provider, created on first use so its connection pool is shared by all requests."""
+    global _provider
+    if _provider is None:
+        _provider = build_llm_provider()
+    return _provider
+
+
+async def close_llm_provider() -> None:
+    """Closes the provider's connections, the next `get_llm_provider` call builds a new one."""
+    global _provider
+    if _provider is not None:
+        provider, _provider = _provider, None
+        await provider.aclose()
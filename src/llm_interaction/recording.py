@@ -0,0 +1,199 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Optional
+from src.core import logger
+from .base import LLMProvider
+from .usage import TokenUsage, record_usage, track_usage
+
+
+class RecordingNotFoundError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+class RecordReplayProvider:
+    """
+    Records the exchanges of another provider to disk, or replays them without any network.
+
+    Every request is keyed by a hash of what is sent to the model (the session id is left out,
+    it is only used for logging), one JSON file per key in `cassette_dir`. Identical requests
+    keep all their replies, which are replayed in recorded order. Replies are replayed after
+    their original duration, and streamed replies with their original chunk timings, scaled
+    by `speed` (0 replays instantly). The token usage reported while recording a reply is
+    reported again when it is replayed, so quotas and usage columns behave the same offline.
+
+        provider = RecordReplayProvider("replay", Path("cassettes"))
+    """
+
+    def __init__(self, mode: str, cassette_dir: Path, inner: Optional[LLMProvider] = None, speed: float = 1.0) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown record/replay mode {mode!r}")
+        if mode == "record" and inner is None:
+            raise ValueError("record mode needs a provider to record")
+        self.mode = mode
+        self.cassette_dir = Path(cassette_dir)
+        self.inner = inner
+        self.speed = speed
+        self._cassettes: dict[str, dict] = {}
+        self._replayed: dict[str, int] = {}
+
+    @staticmethod
+    def _key(method: str, request: dict) -> str:
+        canonical = json.dumps({"method": method, **request}, sort_keys=True, ensure_ascii=False)
+        return f"{method}-{hashlib.sha256(canonical.encode()).hexdigest()[:32]}"
+
+    def _path(self, key: str) -> Path:
+        return self.cassette_dir / f"{key}.json"
+
+    async def _load(self, key: str) -> dict:
+        cassette = self._cassettes.get(key)
+        if cassette is None:
+            path = self._path(key)
+            try:
+                raw = await asyncio.to_thread(path.read_text, encoding="utf-8")
+            except FileNotFoundError:
+                raise RecordingNotFoundError(f"no recording for {key} in {self.cassette_dir}") from None
+            cassette = self._cassettes[key] = json.loads(raw)
+        return cassette
+
+    async def _save(self, key: str, method: str, request: dict, elapsed: float, reply: dict, usage: TokenUsage) -> None:
+        """Appends a reply to the cassette of `key`, a recording session starts every cassette afresh."""
+        cassette = self._cassettes.setdefault(key, {"method": method, "request": request, "replies": []})
+        cassette["replies"].append({"elapsed": elapsed, "reply": reply, "usage": asdict(usage)})
+        payload = json.dumps(cassette, ensure_ascii=False, indent=1)
+
+        def write() -> None:
+            self.cassette_dir.mkdir(parents=True, exist_ok=True)
+            self._path(key).write_text(payload, encoding="utf-8")
+
+        await asyncio.to_thread(write)
+        logger.debug("recorded LLM exchange %s", key)
+
+    async def _next_reply(self, key: str) -> dict:
+        """The next recorded reply of `key`, cycling when a request is replayed more often than recorded."""
+        replies = (await self._load(key))["replies"]
+        index = self._replayed.get(key, 0)
+        self._replayed[key] = index + 1
+        recorded = replies[index % len(replies)]
+        record_usage(**recorded.get("usage", {}))  # cassettes recorded before usage was kept report none
+        return recorded
+
+    @staticmethod
+    async def _tracked(awaitable: Awaitable[Any], usage: TokenUsage) -> Any:
+        """Awaits an inner provider call, adding the usage it reports to `usage` as well as to the usage tracked by the caller."""
+        try:
+            with track_usage() as reported:
+                return await awaitable
+        finally:  # a stream may report its usage in the step that ends it
+            for field, tokens in asdict(reported).items():
+                setattr(usage, field, getattr(usage, field) + tokens)
+            record_usage(reported.input_tokens, reported.output_tokens, reported.cached_tokens)
+
+    async def _sleep(self, seconds: float) -> None:
+        if self.speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds * self.speed)
+
+    async def _exchange(self, method: str, request: dict, call) -> dict:
+        """Replays the recorded reply of `request`, or runs `call()` and records its reply."""
+        key = self._key(method, request)
+        if self.mode == "replay":
+            recorded = await self._next_reply(key)
+            await self._sleep(recorded["elapsed"])
+            return recorded["reply"]
+        started = time.perf_counter()
+        usage = TokenUsage()
+        reply = await self._tracked(call(), usage)
+        await self._save(key, method, request, time.perf_counter() - started, reply, usage)
+        return reply
+
+    @staticmethod
+    def _chat_request(content: str, prompt: Optional[str], conversation_history: Optional[list[dict]], model: Optional[str]) -> dict:
+        return {"content": content, "prompt": prompt or "", "history": conversation_history or [], "model": model}
+
+    async def send_text_message(
+        self,
+        content: str,
+        session_id: str,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        async def call() -> dict:
+            return {"text": await self.inner.send_text_message(content, session_id, prompt, conversation_history, model)}
+
+        reply = await self._exchange("chat", self._chat_request(content, prompt, conversation_history, model), call)
+        return reply["text"]
+
+    async def stream_text_message(
+        self,
+        content: str,
+        session_id: str,
+        prompt: Optional[str] = "",
+        conversation_history: Optional[list[dict]] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        request = self._chat_request(content, prompt, conversation_history, model)
+        key = self._key("stream", request)
+        if self.mode == "replay":
+            recorded = await self._next_reply(key)
+            replayed = 0.0
+            for offset, delta in recorded["reply"]["chunks"]:
+                await self._sleep(offset - replayed)
+                replayed = offset
+                yield delta
+            return
+        started = time.perf_counter()
+        chunks = []
+        usage = TokenUsage()
+        # usage is tracked per chunk, the tracking must not stay set across our own yields
+        stream = self.inner.stream_text_message(content, session_id, prompt, conversation_history, model)
+        while True:
+            try:
+                delta = await self._tracked(anext(stream), usage)
+            except StopAsyncIteration:
+                break
+            chunks.append((time.perf_counter() - started, delta))
+            yield delta
+        await self._save(key, "stream", request, time.perf_counter() - started, {"chunks": chunks}, usage)
+
+    async def speech_to_text(
+        self,
+        mime_type: str,
+        voice_note: bytes,
+        prompt: Optional[str] = None,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        request = {
+            "audio_sha256": hashlib.sha256(voice_note).hexdigest(),
+            "mime_type": mime_type,
+            "prompt": prompt,
+            "language": language,
+            "model": model,
+        }
+
+        async def call() -> dict:
+            return {"text": await self.inner.speech_to_text(mime_type, voice_note, prompt, language, model)}
+
+        reply = await self._exchange("stt", request, call)
+        return reply["text"]
+
+    async def text_to_speech(self, text: str, voice: str = "alloy", format: str = "mp3", model: Optional[str] = None) -> bytes:
+        async def call() -> dict:
+            audio = await self.inner.text_to_speech(text, voice, format, model)
+            return {"audio": base64.b64encode(audio).decode()}
+
+        reply = await self._exchange("tts", {"text": text, "voice": voice, "format": format, "model": model}, call)
+        return base64.b64decode(reply["audio"])
+
+    async def warm_up(self) -> None:
+        if self.inner is not None:
+            await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        if self.inner is not None:
+            await self.inner.aclose()
@@ -0,0 +1,25 @@
+from typing import Optional
+from src.core import settings
+from src.core.metrics import LLM_MODEL_ROUTING
+
+
+def is_simple_turn(content: str) -> bool:
+    """A short message without code, cheap enough for the fast model."""
+    return len(content) <= settings.LLM_ROUTING_MAX_CHARS and "```" not in content
+
+
+def choose_text_model(agent, content: str) -> Optional[str]:
+    """
+    The text model for one turn of `agent`, None meaning the provider default.
+
+    An agent's own `model` always wins. Otherwise, when `LLM_ROUTING_FAST_MODEL` is set,
+    simple turns go to that model. Every decision is counted in `llm_model_routing_total`.
+    """
+    if agent.model:
+        route, model = "agent", agent.model
+    elif settings.LLM_ROUTING_FAST_MODEL and is_simple_turn(content):
+        route, model = "fast", settings.LLM_ROUTING_FAST_MODEL
+    else:
+        route, model = "default", None
+    LLM_MODEL_ROUTING.inc(route=route, model=model or "default")
+    return model
@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+@dataclass
+class TokenUsage:
+    """Tokens billed for the LLM calls made while it was tracked."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0 # part of input_tokens served from the provider's prompt cache
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("current_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """
+    Collects the token usage reported by every LLM call made inside the block, including
+    calls running in tasks started from it (hedged attempts), without changing what
+    providers return.
+
+        with track_usage() as usage:
+            reply = await client.send_text_message(...)
+        message.output_tokens = usage.output_tokens
+    """
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> None:
+    """Adds the usage of one LLM response to the usage being tracked, if any."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.input_tokens += input_tokens
+        usage.output_tokens += output_tokens
+        usage.cached_tokens += cached_tokens
@@ -1,21 +1,81 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from src.core import settings, logger
+from src.core.admission import AdmissionMiddleware, text_admission, voice_admission, list_admission
+from src.core.database import warm_up_database
+from src.core.deadline import RequestDeadlineMiddleware
+from src.core.executor import executor, run_blocking
+from src.core.loop_monitor import LoopLagMonitor
+from src.core.logger import start_logger, stop_logger
+from src.core.metrics import registry
+from src.core.tracing import ServerTimingMiddleware
+from src.core.warmup import WarmUp
+from src.common import cache_backend, cache_invalidation_listener
+from src.common.uuid_storage import check_uuid_storage
 #Routers
 from src.agent import  agent_router
 from src.session import session_router
-from src.message import message_router
+from src.message import message_router, message_persister, message_archiver, counter_repair_job
+from src.message.repository import MessageRepository
+from src.message.utils import sniff_audio_mime
+from src.llm_interaction import close_llm_provider, get_llm_provider
 # Exception Handlers
 from src.exceptions import register_global_exception_handlers
 
+
+async def warm_up_db():
+    await warm_up_database(settings.WARMUP_DB_CONNECTIONS, prime=lambda session: MessageRepository(session).warm_up())
+
+
+async def warm_up_libmagic():
+    # loads libmagic and its database where voice notes are sniffed, in the executor
+    await run_blocking(sniff_audio_mime, b"ID3")
+
+
+async def warm_up_llm():
+    await get_llm_provider().warm_up()
+
+
+loop_lag_monitor = LoopLagMonitor(interval=settings.LOOP_LAG_INTERVAL_MS / 1000)
+warmup = WarmUp(timeout=settings.WARMUP_TIMEOUT_SECONDS)
+if settings.WARMUP_ENABLED:
+    warmup.add("database", warm_up_db)
+    warmup.add("libmagic", warm_up_libmagic)
+    if settings.WARMUP_LLM_CONNECT:
+        warmup.add("llm", warm_up_llm)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application startup and shutdown events, ensuring database initialization.
     """
+    start_logger(logger)
     logger.info(f"Application starting in {settings.ENV} environment. Version: {settings.APP_VERSION}")
+    await check_uuid_storage() # ids in another form than DB_BINARY_UUID would match nothing
+    cache_invalidation_listener.start()
+    executor.start()
+    loop_lag_monitor.start()
+    if settings.MESSAGE_WRITE_BEHIND:
+        message_persister.start()
+    if settings.ARCHIVE_ENABLED:
+        message_archiver.start()
+    if settings.COUNTER_REPAIR_ENABLED:
+        counter_repair_job.start()
+    warmup.start() # runs while the app already answers, /health/ready waits for it
     yield # Application continues here, ready to serve requests
     logger.info("Application shutdown initiated.")
+    await warmup.stop()
+    await message_archiver.stop()
+    await counter_repair_job.stop()
+    await message_persister.stop() # drain queued messages before the process exits
+    await close_llm_provider()
+    await cache_invalidation_listener.stop()
+    await loop_lag_monitor.stop()
+    await executor.stop()
+    await cache_backend.aclose()
+    stop_logger(logger) # flush buffered log records
     
 
 app = FastAPI(
@@ -36,6 +96,31 @@ app.include_router(agent_router, prefix=API_PREFIX)
 app.include_router(session_router, prefix=API_PREFIX)
 app.include_router(message_router, prefix=API_PREFIX)
 
+# end-to-end deadlines, cancellation on client disconnect (inside the tracing middleware, so 504s are timed too)
+app.add_middleware(
+    RequestDeadlineMiddleware,
+    path_prefix=API_PREFIX,
+    default=settings.REQUEST_TIMEOUT_SECONDS,
+    timeouts={"/message/voice": settings.REQUEST_TIMEOUT_VOICE_SECONDS, "/message/text/batch": settings.REQUEST_TIMEOUT_BATCH_SECONDS},
+    max_timeout=settings.REQUEST_TIMEOUT_MAX_SECONDS,
+)
+# admission control per endpoint class, before the deadline middleware starts reading the request body
+app.add_middleware(
+    AdmissionMiddleware,
+    path_prefix=API_PREFIX,
+    routes=(
+        ("POST", "/message/text", text_admission),
+        ("POST", "/message/text/batch", text_admission),
+        ("POST", "/message/voice", voice_admission),
+        ("GET", "/message/conversation/*", list_admission),
+        ("GET", "/message/search", list_admission),
+        ("GET", "/agent", list_admission),
+        ("GET", "/session", list_admission),
+    ),
+)
+# Server-Timing and opt-in tracing for the chat endpoints
+app.add_middleware(ServerTimingMiddleware, path_prefix=f"{API_PREFIX}/message")
+
 # register exception handlers
 register_global_exception_handlers(app)
 
@@ -43,4 +128,18 @@ register_global_exception_handlers(app)
 @app.get("/health/check/", tags=["System"])
 async def health_check():
     """Simple endpoint to verify the service is up."""
-    return {"status": "ok", "version": settings.APP_VERSION, "environment": settings.ENV}
\ No newline at end of file
+    return {"status": "ok", "version": settings.APP_VERSION, "environment": settings.ENV}
+
+
+@app.get("/health/ready", tags=["System"])
+async def readiness_check():
+    """Passes once the startup warm-up is done, 503 before that so no traffic is routed here yet."""
+    if not warmup.ready:
+        return JSONResponse(warmup.report(), status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return warmup.report()
+
+
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+async def metrics():
+    """Process metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
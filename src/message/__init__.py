@@ -1,3 +1,13 @@
-from src.message.api import  message_router  
+from src.common.lazy import lazy_exports
 
-__all__ = ["message_router"]
\ No newline at end of file
+__all__ = ["message_router", "message_persister", "message_archiver", "message_notifier", "counter_repair_job"]
+
+# the router and the background workers pull in FastAPI and OpenAI, they are imported on
+# first access so that importing the models (alembic, scripts) stays cheap
+__getattr__ = lazy_exports(__name__, {
+    "message_router": ("src.message.api", "message_router"),
+    "message_persister": ("src.message.persister", "message_persister"),
+    "message_archiver": ("src.message.archiver", "message_archiver"),
+    "message_notifier": ("src.message.notifier", "message_notifier"),
+    "counter_repair_job": ("src.message.counter_repair", "counter_repair_job"),
+})
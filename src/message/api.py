@@ -1,10 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, File, UploadFile, Form
-from fastapi.responses import Response
-from src.common import AbstractRepository, UUID7Str
-from .schemas import MessageRequest, Message
+from typing import List, Optional
+from fastapi import APIRouter, Depends, status, File, UploadFile, Form, Query, WebSocket, Request
+from fastapi.responses import Response, StreamingResponse
+from src.common import AbstractRepository, UUID7Str, conditional_response
+from src.core import settings
+from .schemas import MessageRequest, Message, MessageSearchResult, BatchMessageRequest, BatchMessageResult
 from .dependency  import get_message_repository
 from .service import MessageService
+from .websocket import ChatConnection
 
 
 message_router = APIRouter(prefix="/message", tags=["Messages"])
@@ -23,6 +25,29 @@ async def receive_text_message(
     service: MessageService = MessageService(repository)
     return await service.receive_text_message(message_data.session_id, message_data.content)
 
+@message_router.post(
+    "/text/batch",
+    response_model=List[BatchMessageResult],
+    summary="Send many text messages at once"
+)
+async def receive_text_message_batch(
+    batch: BatchMessageRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON lines in completion order"),
+    repository: AbstractRepository = Depends(get_message_repository)
+):
+    """
+    Answers independent text turns concurrently. Every item gets its own result with
+    the assistant message or an error, results are ordered by item index unless streamed.
+    """
+    service: MessageService = MessageService(repository)
+    results = service.receive_text_message_batch(batch.items)
+    if stream:
+        async def ndjson():
+            async for result in results:
+                yield result.model_dump_json() + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    return sorted([result async for result in results], key=lambda result: result.index)
+
 @message_router.post(
     "/voice", 
     response_model=Message, 
@@ -55,12 +80,68 @@ async def receive_voice_message(
 )
 async def list_messages_within_session(
     session_id: UUID7Str,
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
     repository: AbstractRepository = Depends(get_message_repository)
     
 ):
-    """Retrieves a list of all defined AI Agents."""
+    """Retrieves a list of all defined AI Agents, `304` when `If-None-Match` has the current ETag."""
     service: MessageService = MessageService(repository)
+    # computed before the page is read, a message added meanwhile makes the next poll refetch
+    etag = await service.conversation_etag(session_id)
+    if (not_modified := conditional_response(request, response, etag)) is not None:
+        return not_modified
+    if settings.FAST_LIST_SERIALIZATION:
+        content = await service.list_session_messages_json(session_id=session_id, skip=skip, limit=limit)
+        return Response(content=content, media_type="application/json", headers=dict(response.headers))
     return await service.list_session_messages(session_id= session_id, skip=skip, limit=limit)
 
+
+
+@message_router.get(
+    "/conversation/{session_id}/since/{message_id}",
+    response_model=List[Message],
+    summary="List the messages of a session newer than a message, optionally long-polling"
+)
+async def list_messages_since(
+    session_id: UUID7Str,
+    message_id: UUID7Str,
+    wait: float = Query(0, ge=0, le=settings.LONG_POLL_MAX_WAIT_SECONDS, description="Seconds to wait for a new message when there is none yet"),
+    limit: int = Query(100, ge=1, le=100),
+    repository: AbstractRepository = Depends(get_message_repository)
+):
+    """Retrieves the messages added after `message_id`, oldest first; an empty list means none arrived within `wait`."""
+    service: MessageService = MessageService(repository)
+    return await service.list_messages_since(session_id, message_id, wait=wait, limit=limit)
+
+
+@message_router.get(
+    "/search",
+    response_model=List[MessageSearchResult],
+    summary="Full-text search over messages"
+)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=256, description="Search text, Arabic or English"),
+    session_id: Optional[UUID7Str] = None,
+    agent_id: Optional[UUID7Str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    repository: AbstractRepository = Depends(get_message_repository)
+):
+    """
+    Searches message content, best matches first with a highlighted snippet. Messages of
+    archived sessions are not searched until a new message moves them back.
+    """
+    service: MessageService = MessageService(repository)
+    return await service.search_messages(q, session_id=session_id, agent_id=agent_id, skip=skip, limit=limit)
+
+
+@message_router.websocket("/ws/{session_id}")
+async def chat_websocket(websocket: WebSocket, session_id: UUID7Str):
+    """
+    Chat over one WebSocket: text frames are messages, binary frames voice notes,
+    assistant tokens are streamed back as they are generated.
+    """
+    await ChatConnection(websocket, session_id).serve()
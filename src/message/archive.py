@@ -0,0 +1,69 @@
+import datetime
+import json
+import zlib
+from typing import Sequence
+from sqlalchemy import DateTime, Enum
+from src.core import logger
+from .models import Message
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, zlib is always available
+    zstandard = None
+
+# archived rows keep every column except the session id, which lives on the archive row
+ARCHIVED_COLUMNS = [column for column in Message.__table__.columns if column.key != "session_id"]
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compressed archive found but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def resolve_codec(codec: str) -> str:
+    """The configured codec, falling back to zlib when zstd is not installed."""
+    if codec == "zstd" and zstandard is None:
+        logger.warning("ARCHIVE_CODEC is zstd but the zstandard package is not installed, using zlib")
+        return "zlib"
+    return codec if codec in ("zlib", "zstd") else "zlib"
+
+
+def serialize_messages(messages: Sequence[Message]) -> bytes:
+    """Serializes messages to JSON rows, column by column, so new columns are archived too."""
+    rows = []
+    for message in messages:
+        row = {}
+        for column in ARCHIVED_COLUMNS:
+            value = getattr(message, column.key)
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            elif hasattr(value, "value"):  # enums
+                value = value.value
+            row[column.key] = value
+        rows.append(row)
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def deserialize_messages(session_id: str, data: bytes) -> list[Message]:
+    """Rebuilds transient Message objects from `serialize_messages` output."""
+    messages = []
+    for row in json.loads(data):
+        values = {"session_id": session_id}
+        for column in ARCHIVED_COLUMNS:
+            value = row.get(column.key)
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.datetime.fromisoformat(value)
+            elif value is not None and isinstance(column.type, Enum):
+                value = column.type.enum_class(value)
+            values[column.key] = value
+        messages.append(Message(**values))
+    return messages
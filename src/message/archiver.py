@@ -0,0 +1,105 @@
+import asyncio
+import datetime
+from typing import Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.core import settings, logger
+from src.core.database import AsyncSessionLocal
+from src.common import get_cairo_time
+from .archive import resolve_codec
+from .persister import message_persister
+from .repository import MessageRepository
+
+
+class MessageArchiver:
+    """
+    Background task moving the messages of inactive sessions into compressed cold storage.
+
+    Every `interval` seconds it archives up to `batch_sessions` sessions whose newest
+    message is older than `inactive_after`, one transaction per session with a pause
+    in between, so it never holds SQLite's writer lock for long.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        inactive_after: datetime.timedelta,
+        interval: float = 3600,
+        batch_sessions: int = 50,
+        pause: float = 0.2,
+        codec: str = "zlib",
+    ) -> None:
+        self.session_factory = session_factory
+        self.inactive_after = inactive_after
+        self.interval = interval
+        self.batch_sessions = batch_sessions
+        self.pause = pause
+        self.codec = codec
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts the archival loop, must be called from the running event loop."""
+        if self._task is None:
+            self.codec = resolve_codec(self.codec)
+            self._task = asyncio.create_task(self._run(), name="message-archiver")
+            logger.info(f"Message archiver started, sessions inactive for {self.inactive_after} are archived with {self.codec}")
+
+    async def stop(self) -> None:
+        """Stops the archival loop, a session being archived is rolled back."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def may_have_archive(self, session) -> bool:
+        """
+        Whether `session` may have archived messages, so chat turns only look for an archive
+        to rehydrate in sessions that were idle long enough. Archived sessions always had
+        their newest message before the cutoff and `last_message_at` only moves forward, so
+        a cached session is enough to tell.
+        """
+        last_message_at = session.last_message_at
+        if last_message_at is None:
+            return bool(session.message_count)  # not backfilled yet
+        cutoff = get_cairo_time() - self.inactive_after
+        if last_message_at.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=None)  # stored as naive Cairo time
+        return last_message_at < cutoff
+
+    async def run_once(self) -> int:
+        """Archives one batch of inactive sessions and returns how many were archived."""
+        cutoff = get_cairo_time() - self.inactive_after
+        async with self.session_factory() as session:
+            session_ids = await MessageRepository(session).get_inactive_session_ids(cutoff, self.batch_sessions)
+        archived = 0
+        for session_id in session_ids:
+            if message_persister.has_pending(session_id):
+                continue
+            async with self.session_factory() as session:
+                count = await MessageRepository(session).archive_session(session_id, cutoff, self.codec)
+            archived += 1 if count else 0
+            await asyncio.sleep(self.pause)
+        return archived
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                archived = await self.run_once()
+                if archived:
+                    logger.info(f"archived messages of {archived} inactive sessions")
+            except Exception as exc:
+                logger.error(f"message archival run failed: {exc}")
+            await asyncio.sleep(self.interval)
+
+
+message_archiver = MessageArchiver(
+    AsyncSessionLocal,
+    inactive_after=datetime.timedelta(days=settings.ARCHIVE_INACTIVE_DAYS),
+    interval=settings.ARCHIVE_INTERVAL_SECONDS,
+    batch_sessions=settings.ARCHIVE_BATCH_SESSIONS,
+    pause=settings.ARCHIVE_PAUSE_SECONDS,
+    codec=settings.ARCHIVE_CODEC,
+)
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Callable, Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.core import settings, logger
+from src.core.database import AsyncSessionLocal
+from .persister import message_persister
+from .repository import MessageRepository
+
+
+class CounterRepairJob:
+    """
+    Background task recomputing the session and agent message counters from the messages
+    themselves, fixing any drift (inserts made outside the app, bugs, restored backups).
+
+    Sessions are walked in id order `batch_size` at a time, one transaction per batch with
+    a pause in between, then agents are summed up from their sessions the same way.
+    Runs every `interval` seconds, or once with `python -m src.message.counter_repair`.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, interval: float = 86400, batch_size: int = 200, pause: float = 0.2) -> None:
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts the repair loop, must be called from the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="counter-repair")
+            logger.info(f"Counter repair started, every {self.interval:.0f}s in batches of {self.batch_size}")
+
+    async def stop(self) -> None:
+        """Stops the repair loop, the batch being recomputed is rolled back."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def run_once(self) -> tuple[int, int]:
+        """Recomputes every session then every agent, returns how many of each were processed."""
+        if message_persister.enabled:
+            await message_persister.flush()
+        sessions = await self._walk(MessageRepository.get_session_ids_after, MessageRepository.recount_sessions)
+        agents = await self._walk(MessageRepository.get_agent_ids_after, MessageRepository.recount_agents)
+        return sessions, agents
+
+    async def _walk(self, list_ids: Callable, recount: Callable) -> int:
+        after, processed = None, 0
+        while True:
+            async with self.session_factory() as session:
+                repository = MessageRepository(session)
+                ids = await list_ids(repository, after, self.batch_size)
+                if not ids:
+                    return processed
+                await recount(repository, ids)
+            processed += len(ids)
+            after = ids[-1]
+            await asyncio.sleep(self.pause)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sessions, agents = await self.run_once()
+                logger.info(f"recomputed the message counters of {sessions} sessions and {agents} agents")
+            except Exception as exc:
+                logger.error(f"counter repair run failed: {exc}")
+            await asyncio.sleep(self.interval)
+
+
+counter_repair_job = CounterRepairJob(
+    AsyncSessionLocal,
+    interval=settings.COUNTER_REPAIR_INTERVAL_SECONDS,
+    batch_size=settings.COUNTER_REPAIR_BATCH_SIZE,
+    pause=settings.COUNTER_REPAIR_PAUSE_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    print(asyncio.run(counter_repair_job.run_once()))
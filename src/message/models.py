@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Text, Index, LargeBinary, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from src.common.orm_base import Base
+from src.common.types import uuid_column_type
 from .types import MessageType, MessageRole
 class Message(Base):
     """
@@ -10,17 +11,47 @@ class Message(Base):
     Can be text or voice type
     """
     __tablename__ = "messages"
-
+    __table_args__ = (
+        # conversation reads are "messages of a session in id (UUID7 = time) order"
+        Index("ix_messages_session_id_id", "session_id", "id"),
+    )
 
     session_id = Column(
-        String(36), 
+        uuid_column_type(),
         ForeignKey("sessions.id", ondelete="CASCADE"),  
         nullable=False,
-        index=True  
     )
     role = Column(SQLEnum(MessageRole), nullable=False)  # "user" or "assistant"
     content = Column(Text, nullable=False)  # The actual text content
     type = Column(SQLEnum(MessageType), default=MessageType.TEXT, nullable=False)  # "text" or "voice"
+    # LLM usage billed for an assistant reply, NULL for user messages
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    cached_tokens = Column(Integer, nullable=True)  # part of input_tokens served from the prompt cache
+    # length of the voice note (user) or of the spoken reply (assistant), when it could be measured
+    audio_seconds = Column(Float, nullable=True)
     session = relationship("Session", back_populates="messages")
     def __repr__(self):
         return f"<Message(id={self.id}, session_id={self.session_id}, role='{self.role}', type='{self.type}')>"
+
+
+class MessageArchive(Base):
+    """
+    MessageArchive - cold storage for the messages of an inactive session
+    All messages of the session are serialized and compressed into one blob,
+    and removed from the hot `messages` table until the session is rehydrated
+    """
+    __tablename__ = "message_archives"
+
+    session_id = Column(
+        uuid_column_type(),
+        ForeignKey("sessions.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    codec = Column(String(8), nullable=False)  # "zlib" or "zstd"
+    message_count = Column(Integer, nullable=False)
+    last_message_id = Column(uuid_column_type(), nullable=False)  # newest archived message
+    payload = Column(LargeBinary, nullable=False)  # compressed JSON list of message rows
+    def __repr__(self):
+        return f"<MessageArchive(id={self.id}, session_id={self.session_id}, messages={self.message_count}, codec='{self.codec}')>"
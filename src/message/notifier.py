@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Iterator
+from src.core.metrics import LONG_POLL_WAITING
+
+
+class MessageNotifier:
+    """
+    Wakes up the requests long-polling a session when a message is added to it.
+
+    In process only: `MessageRepository.create` notifies the requests of the worker that
+    wrote the message, the others see it when their wait ends and they read again.
+
+        with message_notifier.listen(session_id) as added:
+            ...  # read, and if there is nothing new yet
+            await asyncio.wait_for(added.wait(), timeout)
+    """
+
+    def __init__(self) -> None:
+        self._events: dict[str, asyncio.Event] = {}
+        self._listeners: dict[str, int] = {}
+
+    def notify(self, session_id: str) -> None:
+        """Sets the event of everyone listening on `session_id`, later listeners get a new one."""
+        event = self._events.pop(session_id, None)
+        if event is not None:
+            event.set()
+
+    @contextmanager
+    def listen(self, session_id: str) -> Iterator[asyncio.Event]:
+        """
+        Registers a listener and yields the event set by the next `notify`. Listen before
+        reading, so a message added between the read and the wait is not missed.
+        """
+        event = self._events.setdefault(session_id, asyncio.Event())
+        self._listeners[session_id] = self._listeners.get(session_id, 0) + 1
+        LONG_POLL_WAITING.inc()
+        try:
+            yield event
+        finally:
+            LONG_POLL_WAITING.dec()
+            self._listeners[session_id] -= 1
+            if not self._listeners[session_id]:
+                del self._listeners[session_id]
+                self._events.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return sum(self._listeners.values())
+
+
+message_notifier = MessageNotifier()
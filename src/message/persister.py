@@ -0,0 +1,179 @@
+import asyncio
+from collections import Counter
+from typing import Optional
+from uuid_utils import uuid7
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.core import settings, logger
+from src.core.database import AsyncSessionLocal
+from src.core.metrics import WRITE_BEHIND_DROPPED, WRITE_BEHIND_QUEUED
+from src.common import get_cairo_time
+from src.session.counters import message_counter_updates
+from .models import Message
+
+
+class MessageWriteBehindPersister:
+    """
+    Write-behind persister for messages.
+
+    Messages are queued in-process and flushed in batched `INSERT ... VALUES`
+    transactions every `flush_interval_ms` or as soon as `max_rows` are waiting,
+    so chat requests no longer wait on SQLite's single writer to commit.
+
+    - one FIFO buffer flushed in order by a single task keeps per-session ordering
+    - ids and timestamps are assigned on enqueue so the caller can answer right away
+    - readers call `flush_session` first to get read-your-writes for a session
+    - at most `max_queued` rows wait, writers call `make_room` first and wait for a flush beyond
+    - a batch failing on a row (constraint, bad value) is retried row by row and the rows failing
+      on their own are dropped, other failures (database unavailable) keep the batch for a retry
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        flush_interval_ms: int = 50,
+        max_rows: int = 500,
+        max_queued: int = 10_000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_rows = max_rows
+        self.max_queued = max_queued
+        self._buffer: list[dict] = []
+        self._pending: Counter[str] = Counter()
+        # bound to the event loop using them, created by `start` (or the first flush) and dropped by `stop`
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the background flusher is running and messages should be queued."""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Starts the background flush loop, must be called from the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run(), name="message-write-behind")
+            logger.info(
+                f"Message write-behind started, flush every {self.flush_interval * 1000:.0f}ms "
+                f"or {self.max_rows} rows"
+            )
+
+    async def stop(self) -> None:
+        """Stops the flush loop and drains whatever is still queued."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await self.flush()
+        self._wakeup = self._flush_lock = None
+        logger.info("Message write-behind stopped and queue drained.")
+
+    def enqueue(self, entity: Message) -> Message:
+        """Queues a message for the next batch and returns it with its id and timestamp set."""
+        if entity.id is None:
+            entity.id = str(uuid7())
+        if entity.created_at is None:
+            entity.created_at = get_cairo_time()
+        row = {column.key: getattr(entity, column.key) for column in Message.__table__.columns}
+        self._buffer.append(row)
+        self._pending[entity.session_id] += 1
+        WRITE_BEHIND_QUEUED.set(len(self._buffer))
+        if len(self._buffer) >= self.max_rows and self._wakeup is not None:
+            self._wakeup.set()
+        logger.debug("message %s queued for write-behind, %d rows waiting", entity.id, len(self._buffer))
+        return entity
+
+    async def make_room(self, rows: int = 1) -> None:
+        """Backpressure: flushes first when `rows` more would not fit in the buffer."""
+        if self._buffer and len(self._buffer) + rows > self.max_queued:
+            logger.warning(f"write-behind buffer full ({len(self._buffer)} rows), writer waits for a flush")
+            await self.flush()
+
+    def has_pending(self, session_id: str) -> bool:
+        """Whether the session has queued messages that are not committed yet."""
+        return self._pending.get(session_id, 0) > 0
+
+    async def flush_session(self, session_id: str) -> None:
+        """Flushes the queue if the session has pending messages (read-your-writes)."""
+        if self.has_pending(session_id):
+            await self.flush()
+
+    async def _write(self, rows: list[dict]) -> None:
+        async with self.session_factory() as session:
+            await session.execute(insert(Message), rows)
+            for statement in message_counter_updates(rows):
+                await session.execute(statement)
+            await session.commit()
+
+    async def _write_one_by_one(self, rows: list[dict]) -> None:
+        """Writes rows in their own transactions, dropping those that fail on their own."""
+        for position, row in enumerate(rows):
+            try:
+                await self._write([row])
+            except (IntegrityError, DataError) as exc:
+                WRITE_BEHIND_DROPPED.inc()
+                logger.error(f"write-behind dropped message {row['id']} of session {row['session_id']}: {exc}")
+            except Exception:
+                self._requeue(rows[position:])
+                raise
+            self._done([row])
+
+    def _requeue(self, rows: list[dict]) -> None:
+        # in front of anything queued meanwhile, to keep the order
+        self._buffer[:0] = rows
+        WRITE_BEHIND_QUEUED.set(len(self._buffer))
+
+    def _done(self, rows: list[dict]) -> None:
+        self._pending.subtract(row["session_id"] for row in rows)
+        self._pending += Counter()  # drop sessions that reached zero
+
+    async def flush(self) -> None:
+        """Writes every queued message in a single batched transaction."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            rows, self._buffer = self._buffer, []
+            WRITE_BEHIND_QUEUED.set(0)
+            if not rows:
+                return
+            try:
+                await self._write(rows)
+            except (IntegrityError, DataError) as exc:
+                logger.warning(f"write-behind batch of {len(rows)} rows failed ({exc}), retrying row by row")
+                await self._write_one_by_one(rows)
+                return
+            except Exception:
+                self._requeue(rows)
+                raise
+            self._done(rows)
+            logger.debug("write-behind flushed %d messages", len(rows))
+
+    async def _run(self) -> None:
+        """Flush loop, wakes up on the interval or when the buffer is full."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.error(f"write-behind flush failed, {len(self._buffer)} rows kept for retry: {exc}")
+
+
+message_persister = MessageWriteBehindPersister(
+    AsyncSessionLocal,
+    flush_interval_ms=settings.MESSAGE_FLUSH_INTERVAL_MS,
+    max_rows=settings.MESSAGE_FLUSH_MAX_ROWS,
+    max_queued=settings.MESSAGE_FLUSH_MAX_QUEUED,
+)
@@ -1,11 +1,19 @@
+import datetime
 from typing import Sequence, Optional
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, insert, func, text, bindparam, column, Float, String
+from sqlalchemy.orm import joinedload, raiseload
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.common import AbstractRepository, UUID7Str
-from .models import Message
+from src.common import AbstractRepository, UUID7Str, uuid7_lower_bound
+from .models import Message, MessageArchive
+from .archive import compress, decompress, serialize_messages, deserialize_messages
 from .schemas import MessageRequest
 from src.core import logger
 from src.session import Session
+from src.session.counters import message_counter_updates, recount_agents
+from src.agent import Agent
+from .persister import message_persister
+from .notifier import message_notifier
+from .search import build_fts_query
 
 
 class MessageRepository(AbstractRepository[Message, int]):
@@ -28,32 +36,113 @@ class MessageRepository(AbstractRepository[Message, int]):
         Returns:
             The newly created message object with generated IDs/timestamps.
         """
-        
+        if message_persister.enabled:
+            await message_persister.make_room()
+            message = message_persister.enqueue(entity)
+            message_notifier.notify(message.session_id)
+            return message
         self.session.add(entity)
         await self.session.flush() 
         await self.session.refresh(entity)
+        await self._update_counters([entity])
         await self.session.commit()
         logger.info(f"message created successfully with ID: {entity.id}")
+        message_notifier.notify(entity.session_id)
         return entity
        
     
     
-    async def get_message_conversion_history(self, session_id: UUID7Str, number_of_messages: int = 1) -> list[dict]:
+    async def create_many(self, entities: Sequence[Message]) -> Sequence[Message]:
+        """Inserts several messages in one transaction (or queues them for write-behind)."""
+        if not entities:
+            return entities
+        if message_persister.enabled:
+            await message_persister.make_room(len(entities))
+            entities = [message_persister.enqueue(entity) for entity in entities]
+        else:
+            self.session.add_all(entities)
+            await self.session.flush()
+            await self._update_counters(entities)
+            await self.session.commit()
+            logger.info(f"{len(entities)} messages created in bulk")
+        for session_id in {entity.session_id for entity in entities}:
+            message_notifier.notify(session_id)
+        return entities
+
+    async def _update_counters(self, messages: Sequence[Message]) -> None:
+        """Adds inserted messages to their session and agent counters, in the inserting transaction."""
+        for statement in message_counter_updates(messages):
+            await self.session.execute(statement)
+
+    async def get_message_conversion_history(
+        self, session_id: UUID7Str, number_of_messages: int = 1, before_id: Optional[UUID7Str] = None
+    ) -> list[dict]:
         """
-        retrieve all messages in the database and return as list of dict with role and content keys
+        retrieve the last `number_of_messages` messages of a session (older than `before_id` if given)
+        and return them in chronological order as list of dict with role and content keys
         """
-        stmt = select(Message.role, Message.content).where(Message.session_id == session_id).order_by(Message.created_at.desc())
+        await message_persister.flush_session(session_id)
+        stmt = select(Message.role, Message.content).where(Message.session_id == session_id)
+        if before_id is not None:
+            stmt = stmt.where(Message.id < before_id)
+        # UUID7 ids are time ordered, reverse index scan on (session_id, id)
+        stmt = stmt.order_by(Message.id.desc()).limit(number_of_messages)
         result = await self.session.execute(stmt)
-        rows = result.all()[:number_of_messages]
-        return [ {"role": r.role.value, "content": r.content} for r in rows ]
+        rows = result.all()
+        return [ {"role": r.role.value, "content": r.content} for r in reversed(rows) ]
     
 
+    async def get_latest_messages(self, session_ids: Sequence[UUID7Str], number_of_messages: int = 1) -> dict[str, list[dict]]:
+        """
+        The last `number_of_messages` messages of each session in one query, as
+        `get_message_conversion_history` returns them, keyed by session id.
+        """
+        if any(message_persister.has_pending(session_id) for session_id in session_ids):
+            await message_persister.flush()
+        position = func.row_number().over(partition_by=Message.session_id, order_by=Message.id.desc())
+        ranked = (
+            select(Message.session_id, Message.role, Message.content, Message.id, position.label("position"))
+            .where(Message.session_id.in_(session_ids))
+            .subquery()
+        )
+        stmt = (
+            select(ranked.c.session_id, ranked.c.role, ranked.c.content)
+            .where(ranked.c.position <= number_of_messages)
+            .order_by(ranked.c.session_id, ranked.c.id)
+        )
+        history: dict[str, list[dict]] = {session_id: [] for session_id in session_ids}
+        for row in (await self.session.execute(stmt)).all():
+            history[row.session_id].append({"role": row.role.value, "content": row.content})
+        return history
+
+    async def get_sessions_by_ids(self, session_ids: Sequence[UUID7Str]) -> list[Session]:
+        """Retrieves several Sessions with their agents in one query, unknown ids are skipped."""
+        stmt = select(Session).where(Session.id.in_(session_ids)).options(
+            raiseload(Session.messages),
+            joinedload(Session.agent).raiseload(Agent.sessions),
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
     async def get_session_by_id(self, entity_id: UUID7Str) -> Optional[Session]:
-        """Retrieves a Session by its primary key (ID)."""
-        stmt = select(Session).where(Session.id == entity_id)
+        """Retrieves a Session and its agent by primary key (ID), without the message history."""
+        stmt = select(Session).where(Session.id == entity_id).options(
+            raiseload(Session.messages),
+            joinedload(Session.agent).raiseload(Agent.sessions),
+        )
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
+    async def warm_up(self) -> None:
+        """
+        Runs the reads of a chat turn once for a session that cannot exist, so their SQL is
+        compiled and prepared on this connection before the first real request.
+        """
+        session_id = "00000000-0000-7000-8000-000000000000"
+        await self.get_session_by_id(session_id)
+        await self.get_archive(session_id)
+        await self.get_message_conversion_history(session_id)
+
     async def get_by_id(self, entity_id):
         pass 
 
@@ -64,8 +153,249 @@ class MessageRepository(AbstractRepository[Message, int]):
         pass
 
     async def get_all(self, session_id: UUID7Str,  skip: int = 0, limit: int = 100) -> Sequence[Message]:
-        """Retrieves a list of messages with pagination. for specfic session"""
-        stmt = select(Message).offset(skip).limit(limit).order_by(Message.id).where(Message.session_id == session_id)
+        """
+        Retrieves a list of messages with pagination. for specfic session
+        archived messages are read from cold storage and come before the hot ones
+        """
+        await message_persister.flush_session(session_id)
+        archived = await self.get_archived_messages(session_id)
+        page = archived[skip:skip + limit]
+        if len(page) == limit:
+            return page
+        stmt = (
+            select(Message)
+            .where(Message.session_id == session_id)
+            .order_by(Message.id)
+            .offset(max(0, skip - len(archived)))
+            .limit(limit - len(page))
+        )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return [*page, *result.scalars().all()]
+
+    async def get_all_rows(self, session_id: UUID7Str, columns: Sequence, skip: int = 0, limit: int = 100) -> list[tuple]:
+        """Same page as `get_all` as plain tuples of `columns`, archived messages included."""
+        await message_persister.flush_session(session_id)
+        archived = await self.get_archived_messages(session_id)
+        page = [tuple(getattr(m, c.key) for c in columns) for m in archived[skip:skip + limit]]
+        if len(page) == limit:
+            return page
+        stmt = (
+            select(*columns)
+            .where(Message.session_id == session_id)
+            .order_by(Message.id)
+            .offset(max(0, skip - len(archived)))
+            .limit(limit - len(page))
+        )
+        result = await self.session.execute(stmt)
+        return [*page, *result.all()]
+
+    async def get_since(self, session_id: UUID7Str, message_id: UUID7Str, limit: int = 100) -> list[Message]:
+        """
+        Messages of a session newer than `message_id`, oldest first: a range scan on the
+        (session_id, id) index since UUID7 ids are time ordered. Archived messages are only
+        decompressed when the archive holds newer ones. Ends the read transaction, so the
+        pooled connection is free while a long-poll waits.
+        """
+        await message_persister.flush_session(session_id)
+        archived_last_id = (await self.session.execute(
+            select(MessageArchive.last_message_id).where(MessageArchive.session_id == session_id)
+        )).scalar()
+        archived = []
+        if archived_last_id is not None and archived_last_id > message_id:
+            archived = [m for m in await self.get_archived_messages(session_id) if m.id > message_id][:limit]
+        stmt = (
+            select(Message)
+            .where(Message.session_id == session_id, Message.id > message_id)
+            .order_by(Message.id)
+            .limit(limit - len(archived))
+        )
+        messages = [*archived, *(await self.session.execute(stmt)).scalars().all()]
+        await self.session.commit()
+        return messages
+
+    async def get_conversation_version(self, session_id: UUID7Str) -> tuple[Optional[str], int]:
+        """
+        Newest message id and message count of a session, archived messages included,
+        in one query on the (session_id, id) index and the archive row, no message is read.
+        """
+        await message_persister.flush_session(session_id)
+        in_session = Message.session_id == session_id
+        archived = MessageArchive.session_id == session_id
+        stmt = select(
+            select(func.max(Message.id)).where(in_session).scalar_subquery(),
+            select(func.count()).select_from(Message).where(in_session).scalar_subquery(),
+            select(MessageArchive.last_message_id).where(archived).scalar_subquery(),
+            select(MessageArchive.message_count).where(archived).scalar_subquery(),
+        )
+        last_id, count, archived_last_id, archived_count = (await self.session.execute(stmt)).one()
+        return last_id or archived_last_id, count + (archived_count or 0)
+
+    async def get_archive(self, session_id: UUID7Str) -> Optional[MessageArchive]:
+        """Retrieves the cold storage row of a session, if it has been archived."""
+        stmt = select(MessageArchive).where(MessageArchive.session_id == session_id)
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
 
+    async def get_archived_messages(self, session_id: UUID7Str) -> list[Message]:
+        """Decompresses the archived messages of a session, empty if it is not archived."""
+        archive = await self.get_archive(session_id)
+        if archive is None:
+            return []
+        return deserialize_messages(session_id, decompress(archive.payload, archive.codec))
+
+    async def get_inactive_session_ids(self, inactive_since: datetime.datetime, limit: int = 50) -> list[str]:
+        """
+        Ids of sessions with hot messages and no message since `inactive_since`, driven by the
+        indexed `sessions.last_message_at` counter with one existence probe per candidate.
+        """
+        has_hot_messages = select(Message.id).where(Message.session_id == Session.id).exists()
+        stmt = (
+            select(Session.id)
+            .where(Session.last_message_at < inactive_since, has_hot_messages)
+            .order_by(Session.last_message_at)
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def archive_session(self, session_id: UUID7Str, inactive_since: datetime.datetime, codec: str) -> int:
+        """
+        Moves the hot messages of a session into its compressed archive row, in one transaction.
+        Returns the number of messages moved, 0 if the session became active again meanwhile.
+        """
+        stmt = select(Message).where(Message.session_id == session_id).order_by(Message.id)
+        messages = list((await self.session.execute(stmt)).scalars().all())
+        if not messages or messages[-1].id >= uuid7_lower_bound(inactive_since):
+            return 0
+        archive = await self.get_archive(session_id)
+        archived = deserialize_messages(session_id, decompress(archive.payload, archive.codec)) if archive else []
+        all_messages = [*archived, *messages]
+        if archive is None:
+            archive = MessageArchive(session_id=session_id)
+            self.session.add(archive)
+        archive.codec = codec
+        archive.message_count = len(all_messages)
+        archive.last_message_id = all_messages[-1].id
+        archive.payload = compress(serialize_messages(all_messages), codec)
+        await self.session.execute(
+            delete(Message).where(Message.session_id == session_id, Message.id <= messages[-1].id)
+        )
+        await self.session.commit()
+        logger.info(f"archived {len(messages)} messages of session {session_id} ({len(archive.payload)} bytes {codec})")
+        return len(messages)
+
+    async def get_session_ids_after(self, after: Optional[str], limit: int) -> list[str]:
+        """Session ids in id order, the next `limit` after `after` (keyset pagination)."""
+        stmt = select(Session.id).order_by(Session.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(Session.id > after)
+        return list((await self.session.execute(stmt)).scalars().all())
+
+    async def get_agent_ids_after(self, after: Optional[str], limit: int) -> list[str]:
+        """Agent ids in id order, the next `limit` after `after` (keyset pagination)."""
+        stmt = select(Agent.id).order_by(Agent.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(Agent.id > after)
+        return list((await self.session.execute(stmt)).scalars().all())
+
+    async def recount_sessions(self, session_ids: Sequence[UUID7Str]) -> None:
+        """
+        Recomputes the counters of sessions from their messages, in one transaction. Hot
+        messages are counted by the UPDATE itself, archives are decompressed and added.
+        """
+        def hot(aggregate):
+            return select(aggregate).where(Message.session_id == Session.id).scalar_subquery()
+        archived = {}
+        for archive in (await self.session.execute(
+            select(MessageArchive).where(MessageArchive.session_id.in_(session_ids))
+        )).scalars().all():
+            messages = deserialize_messages(archive.session_id, decompress(archive.payload, archive.codec))
+            archived[archive.session_id] = {
+                "message_count": len(messages),
+                "last_message_at": max((m.created_at for m in messages if m.created_at is not None), default=None),
+                "input_tokens": sum(m.input_tokens or 0 for m in messages),
+                "output_tokens": sum(m.output_tokens or 0 for m in messages),
+            }
+        empty = {"message_count": 0, "last_message_at": None, "input_tokens": 0, "output_tokens": 0}
+        for session_id in session_ids:
+            base = archived.get(session_id, empty)
+            stmt = update(Session).where(Session.id == session_id).values(
+                message_count=hot(func.count()) + base["message_count"],
+                last_message_at=func.coalesce(hot(func.max(Message.created_at)), base["last_message_at"]),
+                input_tokens=hot(func.coalesce(func.sum(Message.input_tokens), 0)) + base["input_tokens"],
+                output_tokens=hot(func.coalesce(func.sum(Message.output_tokens), 0)) + base["output_tokens"],
+            ).execution_options(synchronize_session=False)
+            await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def recount_agents(self, agent_ids: Sequence[UUID7Str]) -> None:
+        """Recomputes the counters of agents from their sessions' counters."""
+        await self.session.execute(recount_agents(agent_ids))
+        await self.session.commit()
+
+    async def get_archived_session_ids(self, session_ids: Sequence[UUID7Str]) -> list[str]:
+        """Which of the given sessions currently have an archive row."""
+        stmt = select(MessageArchive.session_id).where(MessageArchive.session_id.in_(session_ids))
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def rehydrate_session(self, session_id: UUID7Str) -> int:
+        """Moves the archived messages of a session back into the hot table, returns how many."""
+        archive = await self.get_archive(session_id)
+        if archive is None:
+            return 0
+        messages = deserialize_messages(session_id, decompress(archive.payload, archive.codec))
+        if messages:
+            rows = [{c.key: getattr(m, c.key) for c in Message.__table__.columns} for m in messages]
+            await self.session.execute(insert(Message), rows)
+        await self.session.delete(archive)
+        await self.session.commit()
+        logger.info(f"rehydrated {len(messages)} archived messages of session {session_id}")
+        return len(messages)
+
+
+    async def search(
+        self,
+        query: str,
+        session_id: Optional[UUID7Str] = None,
+        agent_id: Optional[UUID7Str] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> Sequence:
+        """
+        Full-text search over message content through the `messages_fts` FTS5 index,
+        best matches first (bm25) with a highlighted snippet, optionally scoped to a session or an agent.
+        """
+        match = build_fts_query(query)
+        if not match:
+            return []
+        if session_id is not None:
+            await message_persister.flush_session(session_id)
+        messages = Message.__table__
+        filters = ""
+        params = {"match": match, "skip": skip, "limit": limit}
+        binds = []
+        if session_id is not None:
+            filters += " AND m.session_id = :session_id"
+            params["session_id"] = session_id
+            binds.append(bindparam("session_id", type_=messages.c.session_id.type))
+        if agent_id is not None:
+            filters += " AND m.session_id IN (SELECT s.id FROM sessions s WHERE s.agent_id = :agent_id)"
+            params["agent_id"] = agent_id
+            binds.append(bindparam("agent_id", type_=Session.__table__.c.agent_id.type))
+        stmt = text(f"""
+            SELECT m.id, m.session_id, m.role, m.content, m.type, m.created_at,
+                   snippet(messages_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet,
+                   bm25(messages_fts) AS rank
+            FROM messages_fts
+            JOIN messages_fts_keys k ON k.rowid = messages_fts.rowid
+            JOIN messages m ON m.id = k.message_id
+            WHERE messages_fts MATCH :match{filters}
+            ORDER BY rank
+            LIMIT :limit OFFSET :skip
+        """).bindparams(*binds).columns(
+            messages.c.id, messages.c.session_id, messages.c.role, messages.c.content,
+            messages.c.type, messages.c.created_at, column("snippet", String), column("rank", Float),
+        )
+        result = await self.session.execute(stmt, params)
+        return result.all()
@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from .types import MessageType, MessageRole
 from src.common import UUID7Str
+from src.core import settings
 class MessageRequest(BaseModel):
     content: str = Field(..., min_length=2)
     session_id: UUID7Str
@@ -19,3 +20,23 @@ class Message(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class MessageSearchResult(Message):
+    """A message matching a full-text search, with its highlighted snippet and bm25 rank (lower is better)."""
+    snippet: str
+    rank: float
+
+
+class BatchMessageRequest(BaseModel):
+    """Independent text turns, each answered with its session's history as it was before the batch."""
+    items: List[MessageRequest] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+
+class BatchMessageResult(BaseModel):
+    """Outcome of one batch item: the assistant message, or the error with an HTTP like status."""
+    index: int
+    session_id: UUID7Str
+    status: int
+    message: Optional[Message] = None
+    error: Optional[str] = None
@@ -0,0 +1,33 @@
+import re
+
+# Same normalization the FTS index applies through the `messages_fts_source` view
+# (see the "messages full text search" migration), queries must match indexed tokens.
+ARABIC_NORMALIZATION = str.maketrans({
+    **{chr(code_point): None for code_point in range(0x064B, 0x0653)},  # tashkeel
+    "ٰ": None,  # superscript alef
+    "ـ": None,  # tatweel
+    "آ": "ا",  # alef with madda -> alef
+    "أ": "ا",  # alef with hamza above -> alef
+    "إ": "ا",  # alef with hamza below -> alef
+    "ى": "ي",  # alef maksura -> yeh
+    "ة": "ه",  # teh marbuta -> heh
+})
+
+_TERM_SPLIT = re.compile(r"\s+")
+
+
+def build_fts_query(text: str) -> str:
+    """
+    Turns free user text into a safe FTS5 MATCH expression.
+
+    Every term is normalized and quoted, so FTS5 operators typed by the user
+    are searched literally, and all terms must match. The last term also
+    matches as a prefix to support search-as-you-type.
+    Returns an empty string when there is nothing to search for.
+    """
+    terms = [term for term in _TERM_SPLIT.split(text.translate(ARABIC_NORMALIZATION).strip()) if term]
+    if not terms:
+        return ""
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
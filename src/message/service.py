@@ -1,72 +1,147 @@
-from typing import Sequence
-from io import BytesIO
+import asyncio
+from typing import AsyncIterator, Sequence, Optional
 from .repository import MessageRepository
 from .models import Message as MessageModel
-from .schemas import Message, MessageRequest, MessageRole, MessageType
+from .schemas import Message, MessageRequest, MessageRole, MessageType, BatchMessageResult
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from src.core import logger
-from src.common import AbstractRepository, UUID7Str
-from src.llm_interaction.openai_client import AsyncOpenAIClient
+from src.core import settings, logger
+from src.core.metrics import track_stage
+from src.core.deadline import finish_before_cancel
+from src.core.tracing import span
+from src.common import AbstractRepository, UUID7Str, session_cache, NOT_FOUND, schema_columns, dump_rows, make_etag
+from src.llm_interaction import LLMProvider, get_llm_provider, choose_text_model, TokenUsage, track_usage
 from src.session.service import SessionService
-from .utils import ensure_valid_audio, get_audio_extension
+from src.agent.quota import token_quota, check_token_quota, quota_retry_after
+from .utils import detect_audio_extension, measure_audio_duration
+from .notifier import message_notifier
+from .archiver import message_archiver
+
+# fields of the list response model, read as plain columns by the fast list path
+LIST_COLUMNS = schema_columns(MessageModel, Message)
+LIST_KEYS = [column.key for column in LIST_COLUMNS]
+
+
 class MessageService:
     """
     Service layer for Message business logic, orchestrating Repository calls.
     """
-    def __init__(self, repository: AbstractRepository):
+    def __init__(self, repository: AbstractRepository, client: Optional[LLMProvider] = None):
         self.repository = repository
-        self.client = AsyncOpenAIClient()
+        self.client = client or get_llm_provider()
 
 
-    def _generate_assistant_message(self, session_id: UUID7Str, content: str, type: MessageType) -> MessageModel:
-        """Creates a new assistant message. save llm responses"""
+    def _generate_assistant_message(
+        self, session_id: UUID7Str, content: str, type: MessageType, usage: Optional[TokenUsage] = None,
+        audio_seconds: Optional[float] = None,
+    ) -> MessageModel:
+        """Creates a new assistant message. save llm responses with the tokens they were billed"""
         message_data = {
             "session_id":session_id,
             "role": MessageRole.ASSISTANT,
             "type":MessageType.TEXT if type == MessageType.TEXT else MessageType.VOICE,
-            "content":content
+            "content":content,
+            "input_tokens": usage.input_tokens if usage else None,
+            "output_tokens": usage.output_tokens if usage else None,
+            "cached_tokens": usage.cached_tokens if usage else None,
+            "audio_seconds": audio_seconds,
         }
         return MessageModel(**message_data)
 
-    def _generate_user_message(self, session_id: UUID7Str,type: MessageType, content: str) -> MessageModel:
+    def _generate_user_message(
+        self, session_id: UUID7Str,type: MessageType, content: str, audio_seconds: Optional[float] = None
+    ) -> MessageModel:
         """Creates a new user message."""
         message_data = {
             "session_id":session_id,
             "role": MessageRole.USER,
             "type":MessageType.TEXT if type == MessageType.TEXT else MessageType.VOICE,
-            "content":content
+            "content":content,
+            "audio_seconds": audio_seconds,
         }
         return MessageModel(**message_data)
     
         
     async def _add_message(self, role: MessageRole, kwargs) -> Message:
 
-        """Creates a new message with basic validation."""
+        """Creates a new message with basic validation. a write already started is finished when the request is cancelled"""
         message = self._generate_user_message(** kwargs) if role == MessageRole.USER else self._generate_assistant_message(**kwargs)
-        return await self.repository.create(message)
+        with span("persist"):
+            return await finish_before_cancel(self.repository.create(message))
 
 
     async def list_session_messages(self,session_id: UUID7Str, skip: int = 0, limit: int = 100) -> Sequence[Message]:
         """Lists all messages by session id with pagination."""
-        return await self.repository.get_all(session_id = session_id, skip=skip, limit=limit)
+        with span("history"):
+            return await self.repository.get_all(session_id = session_id, skip=skip, limit=limit)
+
+    async def list_session_messages_json(self, session_id: UUID7Str, skip: int = 0, limit: int = 100) -> bytes:
+        """The `list_session_messages` page already rendered as `Message` JSON, straight from column tuples."""
+        with span("history"):
+            rows = await self.repository.get_all_rows(session_id, LIST_COLUMNS, skip=skip, limit=limit)
+        return dump_rows(LIST_KEYS, rows)
     
 
+    async def list_messages_since(
+        self, session_id: UUID7Str, message_id: UUID7Str, wait: float = 0, limit: int = 100
+    ) -> Sequence[Message]:
+        """
+        Messages of a session newer than `message_id`. With `wait`, when there are none yet
+        the request parks up to `wait` seconds until one is added, then reads once more.
+        Unknown sessions get a 404 instead of parking.
+        """
+        # ids are stored and notified lower-case
+        session_id, message_id = session_id.lower(), message_id.lower()
+        await self._get_session_object(session_id)
+        with message_notifier.listen(session_id) as added:
+            with span("history"):
+                messages = await self.repository.get_since(session_id, message_id, limit)
+            if messages or wait <= 0:
+                return messages
+            try:
+                await asyncio.wait_for(added.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        # added here, or by another worker (seen only now, when the wait is over)
+        with span("history"):
+            return await self.repository.get_since(session_id, message_id, limit)
+
+    async def conversation_etag(self, session_id: UUID7Str) -> str:
+        """ETag of a session's conversation, it only changes when a message is added (messages are never edited)."""
+        last_id, count = await self.repository.get_conversation_version(session_id)
+        return make_etag(session_id, last_id, count)
+
+    async def search_messages(
+        self, query: str, session_id: Optional[UUID7Str] = None, agent_id: Optional[UUID7Str] = None,
+        skip: int = 0, limit: int = 20,
+    ) -> Sequence:
+        """Full-text search over messages, optionally within a session or an agent's sessions."""
+        logger.debug("search messages for %r session %s agent %s skip %s limit %s", query, session_id, agent_id, skip, limit)
+        with span("search"):
+            return await self.repository.search(query, session_id=session_id, agent_id=agent_id, skip=skip, limit=limit)
+
     async def _get_session_object(self, session_id: UUID7Str):
-        """Fetches the session object by ID."""
-        session = await self.repository.get_session_by_id(session_id)   
-        if session is None:
-            logger.error(f"parsed session id {session_id} not exists ")
-            raise HTTPException(
-                status_code= 404, 
-                detail = f"Session Object with id {session_id} not exists"
-            )
-        return session
+        """Fetches the session object by ID, served from the session cache when possible."""
+        with span("session_lookup"):
+            session = await session_cache.get(session_id)
+            if session is None:
+                session = await self.repository.get_session_by_id(session_id)
+                if session is not None:
+                    await session_cache.set(session_id, session)
+                else:
+                    await session_cache.set_missing(session_id)
+            if session is None or session is NOT_FOUND:
+                logger.error(f"parsed session id {session_id} not exists ")
+                raise HTTPException(
+                    status_code= 404, 
+                    detail = f"Session Object with id {session_id} not exists"
+                )
+            return session
     
-    async def _get_conversion_history(self, session_id: UUID7Str) -> list[dict]:
-        """Fetches the conversation history for a session."""
-
-        conversation_history = await self.repository.get_message_conversion_history(session_id)
+    async def _get_conversion_history(self, session_id: UUID7Str, before_id: UUID7Str) -> list[dict]:
+        """Fetches the conversation history for a session, preceding the message `before_id`."""
+        with span("history"):
+            conversation_history = await self.repository.get_message_conversion_history(session_id, before_id=before_id)
         return conversation_history
 
     async def receive_text_message(self, session_id: UUID7Str, content: str) -> Message:
@@ -74,20 +149,27 @@ class MessageService:
         
         
         session_object =  await self._get_session_object(session_id)   
+        agent = session_object.agent
+        check_token_quota(agent)
+        if message_archiver.may_have_archive(session_object):
+            await self.repository.rehydrate_session(session_id)
         created_message = await self._add_message(MessageRole.USER, {"session_id": session_id, "type":MessageType.TEXT, "content":content})
-        agent_prompt = session_object.agent.prompt
-        conversation_history = await self._get_conversion_history(session_id)
-        ai_content = await self.client.send_text_message(
-            session_id = created_message.session_id, 
-            content =  created_message.content,
-            prompt = agent_prompt, 
-            conversation_history= conversation_history
-        )
-        logger.debug(f"Generated AI text response: {ai_content} for session {session_id}")
+        conversation_history = await self._get_conversion_history(session_id, before_id=created_message.id)
+        with track_usage() as usage:
+            ai_content = await self.client.send_text_message(
+                session_id = created_message.session_id, 
+                content =  created_message.content,
+                prompt = agent.prompt, 
+                conversation_history= conversation_history,
+                model = choose_text_model(agent, created_message.content),
+            )
+        token_quota.add(agent.id, usage.total_tokens)
+        logger.debug("Generated AI text response: %s for session %s", ai_content, session_id)
         ai_message = await self._add_message(MessageRole.ASSISTANT, {
             "session_id": session_id, 
             "type":MessageType.TEXT, 
-            "content":ai_content
+            "content":ai_content,
+            "usage": usage,
         })
         return ai_message
        
@@ -96,32 +178,137 @@ class MessageService:
     async def receive_voice_message(self, session_id: UUID7Str, voice_note: bytes) -> Message:
         """Handles receiving a new voice note message and returns the created message."""
         session_object =  await self._get_session_object(session_id) 
-        if not ensure_valid_audio(voice_note):
+        agent = session_object.agent
+        check_token_quota(agent)
+        with track_stage("audio_validation"):
+            mime_type = await detect_audio_extension(voice_note)
+        if mime_type is None:
             logger.error(f"Invalid audio file format or corrupted file for session {session_id}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid audio file format or corupted file."
             )
-        mime_type = get_audio_extension(voice_note)
-        logger.debug(f"uploaded file is valid audio for session {session_id} with mime type {mime_type}")
-       
-        llm_stt = await self.client.speech_to_text(voice_note = voice_note, mime_type= mime_type)
-          
-        stt_message = await self._add_message(MessageRole.USER , {"session_id": session_id,  "type": MessageType.VOICE, "content": llm_stt})
-        logger.debug(f"Transcribed voice note to text: {stt_message}")
-        agent_prompt = session_object.agent.prompt
-        conversation_history = await self._get_conversion_history(session_id)
-        text = await self.client.send_text_message(
-            session_id = stt_message.session_id, 
-            content =  stt_message.content,
-            prompt = agent_prompt, 
-            conversation_history= conversation_history
-        )
-        logger.debug(f"Generated AI text response: {text} and audio response for session {session_id}")
-        await self._add_message(MessageRole.ASSISTANT,{"session_id": session_id, "type": MessageType.TEXT, "content": text})
-        speech_bytes = await self.client.text_to_speech(
-            text = text[:4000],
-            voice = "alloy",   
-            format = "mp3"  
-        )
-        return speech_bytes
\ No newline at end of file
+        logger.debug("uploaded file is valid audio for session %s with mime type %s", session_id, mime_type)
+
+        llm_stt = await self.client.speech_to_text(voice_note = voice_note, mime_type= mime_type, model = agent.stt_model)
+        voice_seconds = await measure_audio_duration(voice_note, mime_type)
+        if message_archiver.may_have_archive(session_object):
+            await self.repository.rehydrate_session(session_id)
+        stt_message = await self._add_message(MessageRole.USER , {
+            "session_id": session_id, "type": MessageType.VOICE, "content": llm_stt, "audio_seconds": voice_seconds,
+        })
+        logger.debug("Transcribed voice note to text: %s", stt_message)
+        conversation_history = await self._get_conversion_history(session_id, before_id=stt_message.id)
+        with track_usage() as usage:
+            text = await self.client.send_text_message(
+                session_id = stt_message.session_id, 
+                content =  stt_message.content,
+                prompt = agent.prompt, 
+                conversation_history= conversation_history,
+                model = choose_text_model(agent, stt_message.content),
+            )
+        token_quota.add(agent.id, usage.total_tokens)
+        logger.debug("Generated AI text response: %s and audio response for session %s", text, session_id)
+        reply = {"session_id": session_id, "type": MessageType.TEXT, "content": text, "usage": usage}
+        try:
+            speech_bytes = await self.client.text_to_speech(
+                text = text[:4000],
+                voice = agent.tts_voice or "alloy",   
+                format = "mp3",
+                model = agent.tts_model,
+            )
+        except (Exception, asyncio.CancelledError):
+            # the reply is already paid for, it is kept without audio
+            await self._add_message(MessageRole.ASSISTANT, reply)
+            raise
+        # stored once spoken, so the reply records the length of its audio
+        await self._add_message(MessageRole.ASSISTANT, {**reply, "audio_seconds": await measure_audio_duration(speech_bytes, "mp3")})
+        return speech_bytes
+
+    async def receive_text_message_batch(self, items: Sequence[MessageRequest]) -> AsyncIterator[BatchMessageResult]:
+        """
+        Answers a batch of independent text turns, yielding every result once it is persisted.
+
+        Sessions are validated and their history loaded with one query each, LLM calls run
+        concurrently (`BATCH_CONCURRENCY` at most) and replies completing together are
+        inserted in one transaction. Items do not see each other, even within a session.
+        """
+        session_ids = list({item.session_id for item in items})
+        with span("session_lookup"):
+            sessions = {session.id: session for session in await self.repository.get_sessions_by_ids(session_ids)}
+        valid = []
+        for index, item in enumerate(items):
+            if item.session_id in sessions:
+                retry_after = quota_retry_after(sessions[item.session_id].agent)
+                if retry_after is None:
+                    valid.append((index, item))
+                    continue
+                yield BatchMessageResult(
+                    index=index, session_id=item.session_id, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    error=f"Agent {sessions[item.session_id].agent.id} used up its token quota, retry in {max(1, round(retry_after))}s",
+                )
+            else:
+                yield BatchMessageResult(
+                    index=index, session_id=item.session_id, status=status.HTTP_404_NOT_FOUND,
+                    error=f"Session Object with id {item.session_id} not exists",
+                )
+        if not valid:
+            return
+
+        with span("history"):
+            idle = [session.id for session in sessions.values() if message_archiver.may_have_archive(session)]
+            for session_id in await self.repository.get_archived_session_ids(idle) if idle else []:
+                await self.repository.rehydrate_session(session_id)
+            history = await self.repository.get_latest_messages(list(sessions))
+        with span("persist"):
+            await finish_before_cancel(self.repository.create_many([
+                self._generate_user_message(session_id=item.session_id, type=MessageType.TEXT, content=item.content)
+                for _, item in valid
+            ]))
+
+        semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+        async def answer(index: int, item: MessageRequest):
+            agent = sessions[item.session_id].agent
+            async with semaphore:
+                try:
+                    with track_usage() as usage:
+                        reply = await self.client.send_text_message(
+                            session_id=item.session_id,
+                            content=item.content,
+                            prompt=agent.prompt,
+                            conversation_history=history[item.session_id],
+                            model=choose_text_model(agent, item.content),
+                        )
+                except Exception as exc:
+                    return index, item, exc, None
+            token_quota.add(agent.id, usage.total_tokens)
+            return index, item, reply, usage
+
+        pending = {asyncio.create_task(answer(index, item)) for index, item in valid}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                outcomes = [task.result() for task in done]
+                replies = [
+                    (index, self._generate_assistant_message(item.session_id, reply, MessageType.TEXT, usage))
+                    for index, item, reply, usage in outcomes if not isinstance(reply, Exception)
+                ]
+                with span("persist"):
+                    await finish_before_cancel(self.repository.create_many([message for _, message in replies]))
+                for index, message in replies:
+                    yield BatchMessageResult(
+                        index=index, session_id=message.session_id, status=status.HTTP_201_CREATED,
+                        message=Message.model_validate(message),
+                    )
+                for index, item, error, _ in outcomes:
+                    if isinstance(error, Exception):
+                        logger.warning(f"batch item {index} for session {item.session_id} failed: {error!r}")
+                        yield BatchMessageResult(
+                            index=index, session_id=item.session_id,
+                            status=getattr(error, "status_code", None) or status.HTTP_502_BAD_GATEWAY,
+                            error=getattr(error, "detail", None) or f"{type(error).__name__}: {error}",
+                        )
+        finally:
+            for task in pending:
+                task.cancel()
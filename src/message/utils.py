@@ -1,6 +1,8 @@
-import magic   
-from typing import Iterable
+import io
+import wave
+from typing import Optional
 from src.core import logger
+from src.core.executor import run_blocking
 
 ALLOWED_AUDIO_MIME: set[str] = {
     'audio/mpeg': 'mp3',
@@ -17,39 +19,126 @@ ALLOWED_AUDIO_MIME: set[str] = {
 }
 
 
-def ensure_valid_audio(
-    audio_bytes: bytes,
-    chunk_size: int = 4096,
-) -> bool:
+def load_magic():
     """
-    Validate that the given in-memory bytes look like a supported audio file.
-    Raises ValueError if invalid.
+    python-magic, imported on first use: only voice notes need it and loading libmagic
+    with its database is one of the slowest imports of the app.
     """
+    import magic
+    return magic
 
+
+def sniff_audio_mime(header: bytes) -> str:
+    """MIME type of a file header as libmagic sees it. Blocking, run it through the executor."""
+    return load_magic().from_buffer(header, mime=True)
+
+
+async def detect_audio_extension(audio_bytes: bytes, chunk_size: int = 4096) -> Optional[str]:
+    """
+    Extension ('mp3', 'wav', ...) of a supported audio file, None when the data is empty,
+    corrupted or not a supported audio format. Only the first `chunk_size` bytes are
+    inspected, in the shared executor so voice bursts do not stall the event loop.
+    """
+    if not audio_bytes:
+        logger.error("Error validating audio data: Empty audio data")
+        return None
     try:
-        if not audio_bytes:
-            raise ValueError("Empty audio data")
-        header = audio_bytes[:chunk_size]
-        mime = magic.from_buffer(header, mime=True)
-        logger.debug(f"Detected audio MIME type: {mime}")
-        if mime not in ALLOWED_AUDIO_MIME:
-            raise ValueError(f"Invalid audio MIME type: {mime} and not in allowed types: {ALLOWED_AUDIO_MIME}")
-        return True
+        mime = await run_blocking(sniff_audio_mime, bytes(audio_bytes[:chunk_size]))
     except Exception as exc:
         logger.error(f"Error validating audio data: {str(exc)}")
-        return False
-    
+        return None
+    extension = ALLOWED_AUDIO_MIME.get(mime)
+    if extension is None:
+        logger.error(f"Invalid audio MIME type: {mime} and not in allowed types: {ALLOWED_AUDIO_MIME}")
+    else:
+        logger.debug("Detected audio MIME type: %s", mime)
+    return extension
 
-def get_audio_extension(
-    audio_bytes: bytes,
-    chunk_size: int = 4096,
-) -> bool:
-    """
-    Validate that the given in-memory bytes look like a supported audio file.
-    Raises ValueError if invalid.
-    """
 
-    header = audio_bytes[:chunk_size]
-    mime = magic.from_buffer(header, mime=True)
-    logger.debug(f"Detected audio MIME type: {mime}")
-    return ALLOWED_AUDIO_MIME.get(mime)
+# MPEG audio frame header tables, indexed by version (1, 2, 2.5) and layer (1, 2, 3)
+_MPEG_VERSIONS = {0b11: "1", 0b10: "2", 0b00: "2.5"}
+_MPEG_LAYERS = {0b11: 1, 0b10: 2, 0b01: 3}
+_MPEG_SAMPLE_RATES = {"1": (44100, 48000, 32000), "2": (22050, 24000, 16000), "2.5": (11025, 12000, 8000)}
+_MPEG_BITRATES = {
+    ("1", 1): (32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    ("1", 2): (32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    ("1", 3): (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    ("2", 1): (32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    ("2", 2): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+
+def _mpeg_frame(header: int) -> Optional[tuple[int, int, int]]:
+    """(frame length in bytes, samples, sample rate) of a 4 byte MPEG audio frame header, None if invalid."""
+    if header >> 21 != 0x7FF:
+        return None
+    version = _MPEG_VERSIONS.get((header >> 19) & 0b11)
+    layer = _MPEG_LAYERS.get((header >> 17) & 0b11)
+    bitrate_index, rate_index = (header >> 12) & 0xF, (header >> 10) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrates = _MPEG_BITRATES[(version if version == "1" else "2", layer if version == "1" or layer == 1 else 2)]
+    bitrate = bitrates[bitrate_index - 1] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    samples = 576 if layer == 3 and version != "1" else 1152
+    return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate
+
+
+def mp3_duration(data: bytes) -> Optional[float]:
+    """Duration of an MP3 (any MPEG audio layer) in seconds, summed frame by frame so VBR is exact."""
+    position = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F)
+        position = 10 + size + (10 if data[5] & 0x10 else 0)
+    seconds, frames = 0.0, 0
+    while position + 4 <= len(data):
+        frame = _mpeg_frame(int.from_bytes(data[position:position + 4], "big"))
+        if frame is None:
+            position += 1  # resynchronize on the next frame header
+            continue
+        length, samples, sample_rate = frame
+        seconds += samples / sample_rate
+        frames += 1
+        position += length
+    return seconds if frames else None
+
+
+def wav_duration(data: bytes) -> Optional[float]:
+    try:
+        with wave.open(io.BytesIO(data)) as audio:
+            return audio.getnframes() / audio.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+
+def flac_duration(data: bytes) -> Optional[float]:
+    # STREAMINFO is always the first metadata block: 20 bit sample rate, 36 bit total samples
+    if data[:4] != b"fLaC" or len(data) < 26:
+        return None
+    info = int.from_bytes(data[18:26], "big")
+    sample_rate, total_samples = info >> 44, info & 0xFFFFFFFFF
+    return total_samples / sample_rate if sample_rate and total_samples else None
+
+
+AUDIO_DURATION = {"mp3": mp3_duration, "wav": wav_duration, "flac": flac_duration}
+
+
+def audio_duration(data: bytes, extension: str) -> Optional[float]:
+    """Length in seconds of an mp3, wav or flac file, None for other formats or unreadable data. Blocking."""
+    measure = AUDIO_DURATION.get(extension)
+    return measure(data) if measure else None
+
+
+async def measure_audio_duration(data: bytes, extension: Optional[str]) -> Optional[float]:
+    """`audio_duration` in the shared executor, a long voice note has thousands of frames to walk."""
+    if not data or extension not in AUDIO_DURATION:
+        return None
+    try:
+        seconds = await run_blocking(audio_duration, data, extension)
+    except Exception as exc:
+        logger.warning(f"could not measure the duration of {extension} audio: {exc}")
+        return None
+    return round(seconds, 3) if seconds is not None else None
@@ -0,0 +1,242 @@
+import asyncio
+import json
+from collections import deque
+from typing import Optional
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from openai import OpenAIError
+from sqlalchemy.exc import SQLAlchemyError
+from src.core import settings, logger
+from src.core.database import AsyncSessionLocal
+from src.core.metrics import OPENAI_ERRORS, WEBSOCKET_CONNECTIONS, WEBSOCKET_MESSAGES, track_stage
+from src.common import UUID7Str, session_cache, NOT_FOUND
+from src.llm_interaction import get_llm_provider, choose_text_model, TokenUsage, track_usage
+from .models import Message as MessageModel
+from .repository import MessageRepository
+from .schemas import Message
+from .types import MessageRole, MessageType
+from src.agent.quota import token_quota, check_token_quota
+from .utils import detect_audio_extension, measure_audio_duration
+from .archiver import message_archiver
+
+# close codes, 4000-4999 are free for applications
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_SESSION_NOT_FOUND = 4404
+CLOSE_IDLE_TIMEOUT = 4408
+
+_open_connections = 0
+
+
+class ChatConnection:
+    """
+    One chat WebSocket bound to a session.
+
+    The session, its agent and the recent history are loaded once when the socket opens
+    and kept in memory, every turn only writes its two messages (each with a short lived
+    DB session). Text frames are user messages, binary frames are voice notes. The server
+    answers with JSON frames:
+
+        {"type": "ready", "session_id": ...}
+        {"type": "user_message", "message": {...}}       # after it is stored, with the transcript for voice
+        {"type": "delta", "content": "..."}              # assistant tokens as they are generated
+        {"type": "assistant_message", "message": {...}}
+        {"type": "error", "status": 4xx/5xx, "detail": "..."}
+
+    followed by a binary MP3 frame with the spoken reply for voice notes.
+    Messages posted to the same session over HTTP meanwhile are not part of the warm history.
+    """
+
+    # same window as `MessageRepository.get_message_conversion_history`
+    history_size = 1
+
+    def __init__(self, websocket: WebSocket, session_id: UUID7Str) -> None:
+        self.websocket = websocket
+        self.session_id = session_id
+        self.client = get_llm_provider()
+        self.session = None
+        self.history: deque[dict] = deque(maxlen=self.history_size)
+
+    async def _load_session(self, repository: MessageRepository):
+        """The session with its agent, from the session cache or the database."""
+        session = await session_cache.get(self.session_id)
+        if session is None:
+            session = await repository.get_session_by_id(self.session_id)
+            if session is None:
+                await session_cache.set_missing(self.session_id)
+            else:
+                await session_cache.set(self.session_id, session)
+        return None if session is NOT_FOUND else session
+
+    async def open(self) -> bool:
+        """Loads the session context once, False when the session does not exist."""
+        async with AsyncSessionLocal() as db:
+            repository = MessageRepository(db)
+            self.session = await self._load_session(repository)
+            if self.session is None:
+                return False
+            if message_archiver.may_have_archive(self.session):
+                await repository.rehydrate_session(self.session_id)
+            self.history.extend(
+                await repository.get_message_conversion_history(self.session_id, number_of_messages=self.history_size)
+            )
+        return True
+
+    async def _refresh_session(self) -> bool:
+        """
+        Picks up agent changes: updates and deletes clear the session cache, only then is
+        the session read again. False when it was deleted meanwhile.
+        """
+        cached = await session_cache.get(self.session_id)
+        if cached is NOT_FOUND:
+            return False
+        if cached is not None:
+            return True
+        async with AsyncSessionLocal() as db:
+            session = await self._load_session(MessageRepository(db))
+        if session is None:
+            return False
+        self.session = session
+        return True
+
+    async def _store(
+        self, role: MessageRole, type: MessageType, content: str,
+        usage: Optional[TokenUsage] = None, audio_seconds: Optional[float] = None,
+    ) -> MessageModel:
+        async with AsyncSessionLocal() as db:
+            message = MessageModel(
+                session_id=self.session_id, role=role, type=type, content=content,
+                input_tokens=usage.input_tokens if usage else None,
+                output_tokens=usage.output_tokens if usage else None,
+                cached_tokens=usage.cached_tokens if usage else None,
+                audio_seconds=audio_seconds,
+            )
+            return await MessageRepository(db).create(message)
+
+    async def _send(self, kind: str, **data) -> None:
+        await self.websocket.send_text(json.dumps({"type": kind, **data}, ensure_ascii=False, default=str))
+
+    async def _send_message(self, kind: str, message: MessageModel) -> None:
+        await self._send(kind, message=Message.model_validate(message).model_dump(mode="json"))
+
+    async def _answer(self, user_message: MessageModel, speak: bool = False) -> Optional[bytes]:
+        """
+        Streams the assistant reply to `user_message` and stores it. With `speak` the reply
+        is also spoken (before it is stored, with the length of its audio) and the MP3 returned;
+        when speaking fails the reply is stored without audio.
+        """
+        agent = self.session.agent
+        parts = []
+        with track_usage() as usage:
+            async for delta in self.client.stream_text_message(
+                session_id=self.session_id,
+                content=user_message.content,
+                prompt=agent.prompt,
+                conversation_history=list(self.history),
+                model=choose_text_model(agent, user_message.content),
+            ):
+                parts.append(delta)
+                await self._send("delta", content=delta)
+        token_quota.add(agent.id, usage.total_tokens)
+        reply = "".join(parts)
+        speech = audio_seconds = None
+        try:
+            if speak:
+                speech = await self.client.text_to_speech(
+                    text=reply[:4000], voice=agent.tts_voice or "alloy", format="mp3", model=agent.tts_model
+                )
+                audio_seconds = await measure_audio_duration(speech, "mp3")
+        finally:
+            assistant_message = await self._store(MessageRole.ASSISTANT, MessageType.TEXT, reply, usage, audio_seconds)
+            self.history.append({"role": MessageRole.USER.value, "content": user_message.content})
+            self.history.append({"role": MessageRole.ASSISTANT.value, "content": reply})
+        await self._send_message("assistant_message", assistant_message)
+        return speech
+
+    async def handle_text(self, content: str) -> None:
+        if len(content) < 2:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Message content must be at least 2 characters.")
+        check_token_quota(self.session.agent)
+        user_message = await self._store(MessageRole.USER, MessageType.TEXT, content)
+        await self._send_message("user_message", user_message)
+        await self._answer(user_message)
+
+    async def handle_voice(self, voice_note: bytes) -> None:
+        check_token_quota(self.session.agent)
+        with track_stage("audio_validation"):
+            mime_type = await detect_audio_extension(voice_note)
+        if mime_type is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid audio file format or corupted file.")
+        agent = self.session.agent
+        transcript = await self.client.speech_to_text(voice_note=voice_note, mime_type=mime_type, model=agent.stt_model)
+        user_message = await self._store(
+            MessageRole.USER, MessageType.VOICE, transcript, audio_seconds=await measure_audio_duration(voice_note, mime_type)
+        )
+        await self._send_message("user_message", user_message)
+        await self.websocket.send_bytes(await self._answer(user_message, speak=True))
+
+    async def _receive(self) -> Optional[dict]:
+        """Next frame, None once the idle timeout passed without one."""
+        try:
+            return await asyncio.wait_for(self.websocket.receive(), timeout=settings.WS_IDLE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _handle(self, frame: dict) -> None:
+        text, data = frame.get("text"), frame.get("bytes")
+        size = len(data) if data is not None else len(text or "")
+        if size > settings.WS_MAX_FRAME_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Frames are limited to {settings.WS_MAX_FRAME_BYTES} bytes.")
+        if data is not None:
+            WEBSOCKET_MESSAGES.inc(type="voice")
+            await self.handle_voice(data)
+        else:
+            WEBSOCKET_MESSAGES.inc(type="text")
+            await self.handle_text(text or "")
+
+    async def serve(self) -> None:
+        """Accepts the socket and answers frames one at a time until it closes or idles out."""
+        global _open_connections
+        # before any close, a socket closed during the handshake only gets an HTTP 403
+        await self.websocket.accept()
+        if _open_connections >= settings.WS_MAX_CONNECTIONS:
+            logger.warning(f"websocket for session {self.session_id} refused, {_open_connections} connections open")
+            await self.websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="too many connections")
+            return
+        _open_connections += 1
+        WEBSOCKET_CONNECTIONS.inc()
+        try:
+            if not await self.open():
+                await self.websocket.close(code=CLOSE_SESSION_NOT_FOUND, reason="session not found")
+                return
+            await self._send("ready", session_id=self.session_id)
+            while True:
+                frame = await self._receive()
+                if frame is None:
+                    await self.websocket.close(code=CLOSE_IDLE_TIMEOUT, reason="idle timeout")
+                    return
+                if frame["type"] == "websocket.disconnect":
+                    return
+                if not await self._refresh_session():
+                    await self.websocket.close(code=CLOSE_SESSION_NOT_FOUND, reason="session deleted")
+                    return
+                try:
+                    await self._handle(frame)
+                except HTTPException as exc:
+                    await self._send("error", status=exc.status_code, detail=exc.detail)
+                except OpenAIError as exc:
+                    OPENAI_ERRORS.inc(type=type(exc).__name__)
+                    logger.error(f"OpenAI API error on websocket of session {self.session_id}: {exc}")
+                    await self._send("error", status=getattr(exc, "status_code", None) or status.HTTP_502_BAD_GATEWAY, detail="LLM integration error")
+                except WebSocketDisconnect:
+                    raise
+                except SQLAlchemyError as exc:
+                    logger.error(f"Database error on websocket of session {self.session_id}: {exc}", exc_info=True)
+                    await self._send("error", status=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="A database error occurred. Please try again later.")
+                except Exception as exc:
+                    # one failed turn does not drop the connection
+                    logger.critical(f"Unexpected error on websocket of session {self.session_id}: {exc}", exc_info=True)
+                    await self._send("error", status=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred. Please try again later.")
+        except WebSocketDisconnect:
+            pass
+        finally:
+            _open_connections -= 1
+            WEBSOCKET_CONNECTIONS.dec()
@@ -1,3 +1,6 @@
-from src.session.api import router as session_router  
+from src.common.lazy import lazy_exports
 from src.session.models import Session
-__all__ = ["session_router", "Session"]
\ No newline at end of file
+
+__all__ = ["session_router", "Session"]
+
+__getattr__ = lazy_exports(__name__, {"session_router": ("src.session.api", "router")})
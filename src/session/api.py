@@ -1,12 +1,14 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from .schemas import (
     SessionCreate,
     SessionUpdate,
     Session
 )
-from src.common import UUID7Str, AbstractRepository
+from src.common import UUID7Str, AbstractRepository, entity_etag, conditional_response
+from src.core import settings
 from .dependancy import get_session_repository
 from .service import SessionService
 
@@ -40,13 +42,18 @@ async def create_session(
 )
 async def get_session(
     session_id: UUID7Str, 
+    request: Request,
+    response: Response,
     repository: AbstractRepository = Depends(get_session_repository)
 ):
     """
-    Retrieves the metadata for a specific chat session.
+    Retrieves the metadata for a specific chat session, `304` when `If-None-Match` has the current ETag.
     """
     service: SessionService = SessionService(repository)
-    return await service.get_session_by_id(session_id)
+    session = await service.get_session_by_id(session_id)
+    if (not_modified := conditional_response(request, response, entity_etag(session))) is not None:
+        return not_modified
+    return session
 
 
 @router.get(
@@ -62,6 +69,8 @@ async def list_sessions(
     Retrieves a list of all chat sessions for the current user (simulated).
     """
     service: SessionService = SessionService(repository)
+    if settings.FAST_LIST_SERIALIZATION:
+        return Response(content=await service.list_sessions_json(skip, limit), media_type="application/json")
     return await service.list_sessions(skip, limit)
 
 
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Any, Iterable, Mapping
+from sqlalchemy import Update, func, select, update
+from src.agent.models import Agent
+from .models import Session
+
+COUNTERS = ("message_count", "last_message_at", "input_tokens", "output_tokens")
+
+
+def _value(message: Any, key: str) -> Any:
+    # messages are ORM objects, or column dicts in the write-behind buffer
+    return message.get(key) if isinstance(message, Mapping) else getattr(message, key, None)
+
+
+def message_counter_updates(messages: Iterable[Any]) -> list[Update]:
+    """
+    Statements adding newly inserted `messages` to the counters of their sessions and
+    agents, one pair per session. Run them in the transaction inserting the messages.
+    """
+    totals: dict[str, dict] = defaultdict(lambda: {"message_count": 0, "last_message_at": None, "input_tokens": 0, "output_tokens": 0})
+    for message in messages:
+        total = totals[_value(message, "session_id")]
+        total["message_count"] += 1
+        created_at = _value(message, "created_at")
+        if created_at is not None and (total["last_message_at"] is None or created_at > total["last_message_at"]):
+            total["last_message_at"] = created_at
+        total["input_tokens"] += _value(message, "input_tokens") or 0
+        total["output_tokens"] += _value(message, "output_tokens") or 0
+    statements = []
+    for session_id, total in totals.items():
+        for model, row in ((Session, Session.id == session_id), (Agent, Agent.id == _agent_of(session_id))):
+            values = {
+                "message_count": model.message_count + total["message_count"],
+                "input_tokens": model.input_tokens + total["input_tokens"],
+                "output_tokens": model.output_tokens + total["output_tokens"],
+            }
+            if total["last_message_at"] is not None:
+                values["last_message_at"] = _latest(model.last_message_at, total["last_message_at"])
+            statements.append(update(model).where(row).values(**values).execution_options(synchronize_session=False))
+    return statements
+
+
+def agent_counter_delta(session_id: str, sign: int) -> Update:
+    """
+    Adds (`sign=1`) or removes (`sign=-1`) a session's counters to those of its current
+    agent, for sessions that are deleted or moved to another agent.
+    """
+    def session_value(column):
+        return select(column).where(Session.id == session_id).scalar_subquery()
+    values = {
+        key: getattr(Agent, key) + sign * session_value(getattr(Session, key))
+        for key in ("message_count", "input_tokens", "output_tokens")
+    }
+    if sign > 0:
+        values["last_message_at"] = _latest(Agent.last_message_at, session_value(Session.last_message_at))
+    return update(Agent).where(Agent.id == _agent_of(session_id)).values(**values).execution_options(synchronize_session=False)
+
+
+def recount_agents(agent_ids: Iterable[str]) -> Update:
+    """Sets the counters of agents to the totals of their sessions."""
+    def total(aggregate):
+        return select(aggregate).where(Session.agent_id == Agent.id).scalar_subquery()
+    return update(Agent).where(Agent.id.in_(list(agent_ids))).values(
+        message_count=total(func.coalesce(func.sum(Session.message_count), 0)),
+        last_message_at=total(func.max(Session.last_message_at)),
+        input_tokens=total(func.coalesce(func.sum(Session.input_tokens), 0)),
+        output_tokens=total(func.coalesce(func.sum(Session.output_tokens), 0)),
+    ).execution_options(synchronize_session=False)
+
+
+def _latest(column, value):
+    # SQLite's scalar max() is NULL as soon as one side is, keep whichever is set
+    return func.coalesce(func.max(column, value), column, value)
+
+
+def _agent_of(session_id: str):
+    return select(Session.agent_id).where(Session.id == session_id).scalar_subquery()
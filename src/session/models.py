@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from src.common.orm_base import Base
+from src.common.types import uuid_column_type
 
 class Session(Base):
     """
@@ -13,11 +14,16 @@ class Session(Base):
     
     title = Column(String, default="New Chat Session")
     agent_id = Column(
-        String(36),
+        uuid_column_type(),
         ForeignKey("agents.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
     )
+    # counters maintained with every message insert (src/session/counters.py), archived messages included
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime, nullable=True, index=True)  # archiver scans sessions by it
+    input_tokens = Column(Integer, nullable=False, default=0, server_default="0")
+    output_tokens = Column(Integer, nullable=False, default=0, server_default="0")
     agent = relationship(
         "Agent",
         back_populates="sessions",
@@ -28,7 +34,7 @@ class Session(Base):
         "Message", 
         back_populates="session",
         cascade="all, delete-orphan",  # If session deleted, delete all messages
-        order_by="Message.created_at",  # Always return messages in chronological order
+        order_by="Message.id",  # UUID7 ids are time ordered, so this is chronological order
         lazy="selectin"
     )
     
@@ -1,9 +1,11 @@
 import datetime
 from typing import Sequence, Optional
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, func, Row
+from sqlalchemy.orm import joinedload, raiseload
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.common import AbstractRepository, UUID7Str
 from .models import Session
+from .counters import agent_counter_delta
 from src.core import logger
 from src.agent import Agent
 
@@ -39,8 +41,11 @@ class SessionRepository(AbstractRepository[Session, int]):
         
 
     async def get_by_id(self, entity_id: UUID7Str) -> Optional[Session]:
-        """Retrieves a Session by its primary key (ID)."""
-        stmt = select(Session).where(Session.id == entity_id)
+        """Retrieves a Session and its agent by primary key (ID), without the message history."""
+        stmt = select(Session).where(Session.id == entity_id).options(
+            raiseload(Session.messages),
+            joinedload(Session.agent).raiseload(Agent.sessions),
+        )
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
@@ -57,8 +62,13 @@ class SessionRepository(AbstractRepository[Session, int]):
             .values(**update_data)
             .execution_options(synchronize_session="fetch")
         )
-        
+        moved = "agent_id" in update_data
+        if moved:
+            # the session's messages now count for its new agent
+            await self.session.execute(agent_counter_delta(session_id, -1))
         result = await self.session.execute(stmt)
+        if moved:
+            await self.session.execute(agent_counter_delta(session_id, 1))
         await self.session.commit() 
         
         if result.rowcount == 0:
@@ -69,7 +79,8 @@ class SessionRepository(AbstractRepository[Session, int]):
         
 
     async def delete_by_id(self, entity_id: UUID7Str) -> bool:
-        """Deletes a Session by ID."""
+        """Deletes a Session by ID, its messages no longer count for its agent."""
+        await self.session.execute(agent_counter_delta(entity_id, -1))
         stmt = delete(Session).where(Session.id == entity_id)
         result = await self.session.execute(stmt)
         await self.session.commit() 
@@ -83,9 +94,15 @@ class SessionRepository(AbstractRepository[Session, int]):
         stmt = select(Session).offset(skip).limit(limit).order_by(Session.id)
         result = await self.session.execute(stmt)
         return result.scalars().all()
+
+    async def get_all_rows(self, columns: Sequence, skip: int = 0, limit: int = 100) -> Sequence[Row]:
+        """Same page as `get_all` as plain tuples of `columns`, without loading agents or messages."""
+        stmt = select(*columns).offset(skip).limit(limit).order_by(Session.id)
+        result = await self.session.execute(stmt)
+        return result.all()
     
     async def get_agent(self, entity_id: UUID7Str) -> Optional[Session]:
         """Retrieves a agent by its primary key (ID)."""
-        stmt = select(Agent).where(Agent.id == str(entity_id))
+        stmt = select(Agent).where(Agent.id == str(entity_id)).options(raiseload(Agent.sessions))
         result = await self.session.execute(stmt)
         return result.scalars().first()
@@ -26,4 +26,8 @@ class Session(SessionBase):
     id: UUID7Str
     created_at: datetime.datetime
     updated_at: Optional[datetime.datetime] = None
+    message_count: int = 0
+    last_message_at: Optional[datetime.datetime] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
 
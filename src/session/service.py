@@ -3,7 +3,15 @@ from fastapi import HTTPException, status
 from src.core import logger
 from .schemas import SessionCreate, SessionUpdate, Session
 from .models import Session
-from src.common import UUID7Str, get_cairo_time, AbstractRepository
+from . import schemas
+from src.message.persister import message_persister
+from src.common import UUID7Str, get_cairo_time, AbstractRepository, agent_cache, session_cache, NOT_FOUND, schema_columns, dump_rows
+
+# fields of the list response model, read as plain columns by the fast list path
+LIST_COLUMNS = schema_columns(Session, schemas.Session)
+LIST_KEYS = [column.key for column in LIST_COLUMNS]
+
+
 class SessionService:
     """
     Handles the business logic for Session resources, coordinating data access
@@ -20,7 +28,7 @@ class SessionService:
         """
         create session
         """
-        agent = await self.session_repo.get_agent(session_data.agent_id)
+        agent = await self._get_agent(session_data.agent_id)
         if not agent:
             logger.error(f"Failed to create session: Agent ID {session_data.agent_id} not found.")
             raise HTTPException(status_code=404, detail = f"agent with id {session_data.agent_id} not found")
@@ -30,12 +38,27 @@ class SessionService:
             title=session_data.title,
         )
         created_session = await self.session_repo.create(session)
-        logger.debug(f"session object created as {created_session}")
+        logger.debug("session object created as %s", created_session)
         return created_session
     
 
+    async def _get_agent(self, agent_id: UUID7Str):
+        """Looks up an agent through the agent cache, returns None if it does not exist."""
+        agent = await agent_cache.get(agent_id)
+        if agent is None:
+            agent = await self.session_repo.get_agent(agent_id)
+            if agent:
+                await agent_cache.set(agent_id, agent)
+            else:
+                await agent_cache.set_missing(agent_id)
+        return None if agent is NOT_FOUND else agent
+
     async def get_session_by_id(self, session_id: UUID7Str) -> Session:
-        """Retrieves a single session by ID."""
+        """
+        Retrieves a single session by ID, read from the database so its counters (and ETag)
+        are current; the session cache is for the chat path.
+        """
+        await message_persister.flush_session(session_id)  # read-your-writes for the counters
         session = await self.session_repo.get_by_id(session_id)
         if not session:
             logger.error(f"session with id {session_id} not exists")
@@ -52,7 +75,7 @@ class SessionService:
             logger.warning(f"No update data provided for Session ID {session_id}.")
             return session_object
         agent_id = update_dict.get("agent_id", None)
-        if agent_id is not None and (await self.session_repo.get_agent(agent_id)) is None:
+        if agent_id is not None and (await self._get_agent(agent_id)) is None:
                 logger.error(f"failed to update session {session_id} parsed agent id {agent_id} is not exists")
                 raise HTTPException(
                     status_code= 400, 
@@ -60,6 +83,7 @@ class SessionService:
                 )
         update_dict["updated_at"] = get_cairo_time()
         updated_session = await self.session_repo.update(session_id, update_dict)
+        await session_cache.invalidate(session_id)
         logger.info(f"session object with id {session_id} updated with {update_dict}")
         return updated_session
     
@@ -67,12 +91,18 @@ class SessionService:
     async def delete_session(self, session_id: UUID7Str):
         """Deletes a session by ID."""
         await self.get_session_by_id(session_id)
-        logger.debug(f"start delete session object {session_id}")
+        logger.debug("start delete session object %s", session_id)
         await self.session_repo.delete_by_id(session_id)
+        await session_cache.invalidate(session_id)
         
     async def list_sessions(self, skip: int = 0, limit: int = 100) -> List[Session]:
         """Lists all sessions with pagination."""
         
         logger.info(f"list session objects with skip {skip} and limit {limit}")
         sessions = await self.session_repo.get_all(skip=skip, limit=limit)
-        return sessions 
\ No newline at end of file
+        return sessions
+
+    async def list_sessions_json(self, skip: int = 0, limit: int = 100) -> bytes:
+        """The `list_sessions` page already rendered as `Session` JSON, straight from column tuples."""
+        rows = await self.session_repo.get_all_rows(LIST_COLUMNS, skip=skip, limit=limit)
+        return dump_rows(LIST_KEYS, rows) 
\ No newline at end of file
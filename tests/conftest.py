@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# settings are read at import time, point them at a throwaway database before `src` is imported
+_database = Path(tempfile.mkdtemp(prefix="aiap-tests-")) / "test.db"
+os.environ.update({
+    "APP_VERSION": "v1",
+    "OPENAI_API_KEY": "test",
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_database}",
+    "LOG_LEVEL": "WARNING",
+    "WARMUP_ENABLED": "false",
+    "CACHE_BACKEND": "memory",
+})
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from src.llm_interaction.openai_client import AsyncOpenAIClient  # noqa: E402
+from src.llm_interaction.usage import record_usage  # noqa: E402
+
+API = "/api/v1"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """The schema of the migrations (full-text search included), once per test run."""
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+    yield _database
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeLLM:
+    """Stands in for OpenAI: echoes the message back, reporting 10 input and 5 output tokens."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def send_text_message(self, content, session_id, prompt="", conversation_history=None, model=None):
+        self.calls += 1
+        record_usage(10, 5)
+        return f"echo:{content}"
+
+    async def speech_to_text(self, mime_type, voice_note, prompt=None, language=None, model=None):
+        self.calls += 1
+        return "transcript"
+
+    async def text_to_speech(self, text, voice="alloy", format="mp3", model=None):
+        self.calls += 1
+        return b""
+
+
+@pytest.fixture
+def llm(monkeypatch) -> FakeLLM:
+    fake = FakeLLM()
+    for name in ("send_text_message", "speech_to_text", "text_to_speech"):
+        monkeypatch.setattr(AsyncOpenAIClient, name, lambda self, *args, _name=name, **kwargs: getattr(fake, _name)(*args, **kwargs))
+    return fake
+
+
+@pytest.fixture(params=["direct", "write_behind"])
+def client(request, llm, monkeypatch):
+    """The app with its lifespan, once writing messages directly and once through the write-behind buffer."""
+    from src.core import settings
+    from src.main import app
+    monkeypatch.setattr(settings, "MESSAGE_WRITE_BEHIND", request.param == "write_behind")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def chat_session(client) -> dict:
+    """A fresh agent with one session, as returned by the API."""
+    agent = client.post(f"{API}/agent/", json={"name": "tester", "prompt": "You are a test agent."}).json()
+    return client.post(f"{API}/session/", json={"agent_id": agent["id"]}).json()
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.admission import AdmissionController, AdmissionMiddleware
+
+
+async def _queued(controller: AdmissionController) -> asyncio.Task:
+    task = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    return task
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_refused_right_away():
+    controller = AdmissionController("test", limit=1, queue_size=1, queue_timeout=5)
+    await controller.acquire()
+    waiting = await _queued(controller)
+
+    with pytest.raises(HTTPException) as refused:
+        await controller.acquire()
+    assert refused.value.status_code == 503
+    assert int(refused.value.headers["Retry-After"]) >= 1
+
+    controller.release(0.1)  # handed over to the queued request
+    await waiting
+    assert (controller._active, len(controller._waiters)) == (1, 0)
+
+
+@pytest.mark.anyio
+async def test_queue_timeout_is_refused():
+    controller = AdmissionController("test", limit=1, queue_size=10, queue_timeout=0.05)
+    await controller.acquire()
+
+    with pytest.raises(HTTPException) as refused:
+        await controller.acquire()
+    assert refused.value.status_code == 503
+    assert (controller._active, len(controller._waiters)) == (1, 0)
+
+
+@pytest.mark.anyio
+async def test_cancelled_while_queued_gives_up_its_place():
+    controller = AdmissionController("test", limit=1, queue_size=10, queue_timeout=5)
+    await controller.acquire()
+    waiting = await _queued(controller)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert len(controller._waiters) == 0
+    controller.release()
+    assert controller._active == 0
+
+
+@pytest.mark.anyio
+async def test_refused_request_body_is_never_read():
+    controller = AdmissionController("voice", limit=1, queue_size=0, queue_timeout=5)
+    await controller.acquire()
+    reads, sent = [], []
+
+    async def app(scope, receive, send):
+        raise AssertionError("a refused request must not reach the app")
+
+    async def receive():
+        reads.append(1)
+        return {"type": "http.request", "body": b"voice note", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = AdmissionMiddleware(app, path_prefix="/api/v1", routes=(("POST", "/message/voice", controller),))
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/message/voice", "headers": []}
+    await middleware(scope, receive, send)
+
+    assert reads == []
+    assert sent[0]["status"] == 503
+    assert (b"retry-after", b"1") in sent[0]["headers"]
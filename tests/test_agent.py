@@ -0,0 +1,34 @@
+from conftest import API
+
+
+def test_explicit_null_resets_agent_overrides(client):
+    agent = client.post(
+        f"{API}/agent/", json={"name": "overrides", "prompt": "p", "model": "gpt-4.1-mini", "tts_voice": "nova", "token_quota": 1000}
+    ).json()
+
+    response = client.put(f"{API}/agent/{agent['id']}", json={"model": None, "token_quota": None, "name": None})
+    assert response.status_code == 200
+    updated = response.json()
+    assert (updated["name"], updated["model"], updated["token_quota"], updated["tts_voice"]) == ("overrides", None, None, "nova")
+
+
+def test_agent_etag_revalidation(client):
+    agent = client.post(f"{API}/agent/", json={"name": "cached", "prompt": "p"}).json()
+    url = f"{API}/agent/{agent['id']}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.content == b""
+    # If-None-Match compares weakly
+    assert client.get(url, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    client.put(url, json={"prompt": "changed"})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["prompt"] == "changed"
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from uuid_utils import uuid7
+from conftest import API
+
+
+def slow_llm(llm, monkeypatch):
+    """Makes the fake LLM slow and failing for 'fail', returning the peak number of concurrent calls."""
+    running, peak = 0, [0]
+
+    async def send_text_message(content, session_id, prompt="", conversation_history=None, model=None):
+        nonlocal running
+        running += 1
+        peak[0] = max(peak[0], running)
+        try:
+            await asyncio.sleep(0.02)
+            if content == "fail":
+                raise ConnectionError("upstream reset")
+            return f"echo:{content}"
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(llm, "send_text_message", send_text_message)
+    return peak
+
+
+def test_batch_keeps_item_order_and_bounds_concurrency(client, chat_session, llm, monkeypatch):
+    from src.core import settings
+    monkeypatch.setattr(settings, "BATCH_CONCURRENCY", 2)
+    peak = slow_llm(llm, monkeypatch)
+    missing = str(uuid7())
+    items = [{"session_id": chat_session["id"], "content": f"turn {i}"} for i in range(6)]
+    items[2] = {"session_id": missing, "content": "nobody home"}
+    items[4] = {"session_id": chat_session["id"], "content": "fail"}
+
+    response = client.post(f"{API}/message/text/batch", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["index"] for result in results] == list(range(6))
+    assert [result["status"] for result in results] == [201, 201, 404, 201, 502, 201]
+    assert [result["message"]["content"] for result in results if result["status"] == 201] == [
+        "echo:turn 0", "echo:turn 1", "echo:turn 3", "echo:turn 5"
+    ]
+    assert results[2]["session_id"] == missing and "not exists" in results[2]["error"]
+    assert "upstream reset" in results[4]["error"] and results[4]["message"] is None
+    assert peak[0] == 2
+
+
+def test_streamed_batch_reports_every_item_once(client, chat_session, llm, monkeypatch):
+    slow_llm(llm, monkeypatch)
+    items = [{"session_id": chat_session["id"], "content": content} for content in ("first", "fail", "second")]
+
+    response = client.post(f"{API}/message/text/batch", params={"stream": True}, json={"items": items})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert {index: result["status"] for index, result in results.items()} == {0: 201, 1: 502, 2: 201}
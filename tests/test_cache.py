@@ -0,0 +1,61 @@
+from src.common import session_cache
+from src.core.metrics import CACHE_BACKEND_ERRORS
+from conftest import API
+
+
+def test_error_after_cache_miss_keeps_cached_session_usable(client, chat_session):
+    session_id = chat_session["id"]
+    await_portal = client.portal.call
+    await_portal(session_cache.invalidate, session_id)
+
+    # the session is read and cached, then the request fails and its DB session rolls back
+    response = client.post(f"{API}/message/voice", data={"session_id": session_id}, files={"voice_note": ("note.mp3", b"not audio", "audio/mpeg")})
+    assert response.status_code == 400
+
+    # later requests are served the cached session
+    response = client.post(f"{API}/message/text", json={"session_id": session_id, "content": "still there?"})
+    assert response.status_code == 201
+    assert response.json()["content"] == "echo:still there?"
+    assert client.get(f"{API}/session/{session_id}").status_code == 200
+
+
+class UnreachableBackend:
+    """A backend whose server is down."""
+    shared = False
+
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ConnectionError("cache backend unreachable")
+        return fail
+
+
+def test_cache_backend_outage_falls_back_to_the_database(client, chat_session, monkeypatch):
+    monkeypatch.setattr(session_cache, "backend", UnreachableBackend())
+    monkeypatch.setattr(session_cache, "_generation", None)
+    errors = CACHE_BACKEND_ERRORS.value(operation="get")
+    session_id = chat_session["id"]
+
+    response = client.post(f"{API}/message/text", json={"session_id": session_id, "content": "cache is down"})
+    assert response.status_code == 201
+    assert client.get(f"{API}/session/{session_id}").status_code == 200
+    assert client.put(f"{API}/session/{session_id}", json={"title": "renamed"}).status_code == 200
+    assert CACHE_BACKEND_ERRORS.value(operation="get") > errors
+
+
+def test_session_read_after_messages_has_current_counters(client, chat_session):
+    session_id = chat_session["id"]
+    first = client.get(f"{API}/session/{session_id}")
+    client.post(f"{API}/message/text", json={"session_id": session_id, "content": "count me"})
+
+    response = client.get(f"{API}/session/{session_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()["message_count"] == first.json()["message_count"] + 2
+
+
+def test_agent_reads_after_messages_have_current_counters(client, chat_session):
+    agent_id = chat_session["agent_id"]
+    before = client.get(f"{API}/agent/{agent_id}/stats").json()["message_count"]
+    client.post(f"{API}/message/text", json={"session_id": chat_session["id"], "content": "count me too"})
+
+    assert client.get(f"{API}/agent/{agent_id}/stats").json()["message_count"] == before + 2
+    assert client.get(f"{API}/agent/{agent_id}").json()["message_count"] == before + 2
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.core.deadline import _deadline, finish_before_cancel, remaining
+from src.core.metrics import REQUESTS_CANCELLED
+from conftest import API
+
+
+@pytest.fixture
+def slow_llm(llm, monkeypatch):
+    async def slow_reply(content, *args, **kwargs):
+        await asyncio.sleep(5)
+        return f"echo:{content}"
+
+    monkeypatch.setattr(llm, "send_text_message", slow_reply)
+    return llm
+
+
+@pytest.mark.anyio
+async def test_shielded_write_is_not_bound_by_the_deadline():
+    async def write():
+        await asyncio.sleep(0.1)
+        return remaining()  # raises DeadlineExceeded when the deadline still applies
+
+    token = _deadline.set(time.monotonic() + 0.05)
+    try:
+        assert await finish_before_cancel(write()) is None
+    finally:
+        _deadline.reset(token)
+
+
+def _contents(client, session_id: str) -> list[str]:
+    return [message["content"] for message in client.get(f"{API}/message/conversation/{session_id}").json()]
+
+
+def test_deadline_answers_504_and_keeps_the_user_message(client, chat_session, slow_llm):
+    started = time.perf_counter()
+    response = client.post(
+        f"{API}/message/text", json={"session_id": chat_session["id"], "content": "too slow"}, headers={"X-Request-Timeout": "0.2"}
+    )
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+    assert time.perf_counter() - started < 2
+    assert _contents(client, chat_session["id"]) == ["too slow"]
+
+
+def test_client_disconnect_cancels_the_request(client, chat_session, slow_llm):
+    from src.main import app
+
+    body = json.dumps({"session_id": chat_session["id"], "content": "going away"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": f"{API}/message/text", "raw_path": f"{API}/message/text".encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    sent = []
+
+    async def request():
+        requests = iter([{"type": "http.request", "body": body, "more_body": False}])
+
+        async def receive():
+            message = next(requests, None)
+            if message is None:
+                await asyncio.sleep(0.2)
+                return {"type": "http.disconnect"}
+            return message
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+
+    cancelled = REQUESTS_CANCELLED.value(reason="disconnect")
+    started = time.perf_counter()
+    client.portal.call(request)
+    assert time.perf_counter() - started < 2
+    assert sent == []
+    assert REQUESTS_CANCELLED.value(reason="disconnect") == cancelled + 1
+    assert _contents(client, chat_session["id"]) == ["going away"]
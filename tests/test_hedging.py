@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+from src.llm_interaction.hedging import HedgedProvider
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowLLM:
+    """Answers after `latency` seconds, remembering when each attempt started and whether it was cancelled."""
+
+    def __init__(self, name: str, latency: float) -> None:
+        self.name = name
+        self.latency = latency
+        self.started: list[float] = []
+        self.cancelled = 0
+
+    async def send_text_message(self, content, session_id, prompt="", conversation_history=None, model=None):
+        self.started.append(time.perf_counter())
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"{self.name}:{content}"
+
+    async def stream_text_message(self, content, session_id, prompt="", conversation_history=None, model=None):
+        self.started.append(time.perf_counter())
+        try:
+            await asyncio.sleep(self.latency)
+            yield f"{self.name}:"
+            yield content
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+
+
+def hedger(primary, backup, **options) -> HedgedProvider:
+    options = {"initial_delay": 0.1, "min_delay": 0.01, "min_samples": 1000, **options}
+    return HedgedProvider(primary, backup, **options)
+
+
+async def test_fast_primary_is_never_hedged():
+    primary, backup = SlowLLM("primary", 0.01), SlowLLM("backup", 0)
+    assert await hedger(primary, backup).send_text_message("hi", "s") == "primary:hi"
+    assert backup.started == []
+
+
+async def test_hedge_fires_after_the_delay_and_cancels_the_slower_attempt():
+    primary, backup = SlowLLM("primary", 5), SlowLLM("backup", 0.01)
+    started = time.perf_counter()
+
+    assert await hedger(primary, backup).send_text_message("hi", "s") == "backup:hi"
+
+    assert backup.started[0] - started >= 0.1
+    assert primary.cancelled == 1
+    assert time.perf_counter() - started < 1
+
+
+async def test_stream_hedge_closes_the_losing_stream():
+    primary, backup = SlowLLM("primary", 5), SlowLLM("backup", 0.01)
+
+    deltas = [delta async for delta in hedger(primary, backup).stream_text_message("hi", "s")]
+
+    assert deltas == ["backup:", "hi"]
+    assert primary.cancelled == 1
+
+
+async def test_delay_is_the_percentile_of_recent_latencies():
+    provider = hedger(SlowLLM("primary", 0), None, percentile=90, min_samples=10)
+    assert provider.hedge_delay() == 0.1  # not enough samples yet
+    provider._latencies.extend(i / 1000 for i in range(1, 101))
+    assert provider.hedge_delay() == pytest.approx(0.091)
+
+
+async def test_hedges_stop_when_the_budget_is_spent():
+    primary, backup = SlowLLM("primary", 0.15), SlowLLM("backup", 0)
+    provider = hedger(primary, backup, initial_delay=0.02, budget=0.0)  # a burst of one hedge, never refilled
+
+    replies = [await provider.send_text_message("hi", "s") for _ in range(3)]
+
+    assert replies == ["backup:hi", "primary:hi", "primary:hi"]
+    assert len(backup.started) == 1
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import func, select
+from uuid_utils import uuid7
+from src.core.database import AsyncSessionLocal
+from src.core.metrics import WRITE_BEHIND_DROPPED
+from src.message.models import Message
+from src.message.persister import MessageWriteBehindPersister
+from src.message.types import MessageRole, MessageType
+
+pytestmark = pytest.mark.anyio
+
+
+def message(session_id: str, content) -> Message:
+    return Message(session_id=session_id, role=MessageRole.USER, type=MessageType.TEXT, content=content)
+
+
+async def count(session_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(Message).where(Message.session_id == session_id))
+
+
+async def test_row_failing_on_its_own_is_dropped_and_does_not_block_the_batch():
+    persister = MessageWriteBehindPersister(AsyncSessionLocal)
+    session_id = str(uuid7())
+    dropped = WRITE_BEHIND_DROPPED.value()
+    persister.enqueue(message(session_id, "before"))
+    persister.enqueue(message(session_id, None))  # NOT NULL violation
+    persister.enqueue(message(session_id, "after"))
+
+    await persister.flush()
+
+    assert await count(session_id) == 2
+    assert WRITE_BEHIND_DROPPED.value() == dropped + 1
+    assert not persister.has_pending(session_id)
+    await persister.flush()  # nothing left to retry
+
+
+async def test_full_buffer_makes_writers_wait_for_a_flush():
+    persister = MessageWriteBehindPersister(AsyncSessionLocal, max_queued=2)
+    session_id = str(uuid7())
+    for content in ("one", "two"):
+        await persister.make_room()
+        persister.enqueue(message(session_id, content))
+    assert await count(session_id) == 0
+
+    await persister.make_room()
+
+    assert await count(session_id) == 2
+    assert not persister.has_pending(session_id)
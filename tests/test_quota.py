@@ -0,0 +1,43 @@
+from src.agent.quota import SlidingWindowQuota
+from conftest import API
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_usage_slides_out_of_the_window():
+    clock = Clock()
+    quota = SlidingWindowQuota(window=60, slots=6, clock=clock)
+    quota.add("agent", 100)
+    clock.now = 30
+    quota.add("agent", 50)
+
+    assert quota.used("agent") == 150
+    assert quota.retry_after("agent", 120) == 30  # until the first 100 tokens leave the window
+    clock.now = 60
+    assert quota.used("agent") == 50
+    assert quota.retry_after("agent", 120) is None
+    clock.now = 90
+    assert quota.used("agent") == 0
+
+
+def test_agent_over_quota_is_refused_before_calling_openai(client, llm):
+    # every FakeLLM reply uses 15 tokens
+    agent = client.post(f"{API}/agent/", json={"name": "metered", "prompt": "Be brief.", "token_quota": 15}).json()
+    session = client.post(f"{API}/session/", json={"agent_id": agent["id"]}).json()
+    turn = {"session_id": session["id"], "content": "hello"}
+
+    assert client.post(f"{API}/message/text", json=turn).status_code == 201
+    calls = llm.calls
+    response = client.post(f"{API}/message/text", json=turn)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert llm.calls == calls
+    messages = client.get(f"{API}/message/conversation/{session['id']}").json()
+    assert [message["content"] for message in messages] == ["hello", "echo:hello"]
@@ -0,0 +1,38 @@
+import pytest
+from conftest import FakeLLM
+from src.llm_interaction.recording import RecordReplayProvider
+from src.llm_interaction.usage import record_usage, track_usage
+
+pytestmark = pytest.mark.anyio
+
+
+class StreamingFakeLLM(FakeLLM):
+    async def stream_text_message(self, content, session_id, prompt="", conversation_history=None, model=None):
+        self.calls += 1
+        for delta in ("echo:", content):
+            yield delta
+        record_usage(7, 3, 2)  # like OpenAI, usage comes with the event that completes the response
+
+
+async def test_replay_reports_the_recorded_usage(tmp_path):
+    recorder = RecordReplayProvider("record", tmp_path, inner=FakeLLM(), speed=0)
+    with track_usage() as recorded:
+        assert await recorder.send_text_message("hi", "session") == "echo:hi"
+    assert (recorded.input_tokens, recorded.output_tokens) == (10, 5)
+
+    player = RecordReplayProvider("replay", tmp_path, speed=0)
+    with track_usage() as replayed:
+        assert await player.send_text_message("hi", "session") == "echo:hi"
+    assert replayed == recorded
+
+
+async def test_replayed_stream_reports_the_usage_of_its_last_chunk(tmp_path):
+    recorder = RecordReplayProvider("record", tmp_path, inner=StreamingFakeLLM(), speed=0)
+    with track_usage() as recorded:
+        assert [delta async for delta in recorder.stream_text_message("hi", "session")] == ["echo:", "hi"]
+    assert (recorded.input_tokens, recorded.output_tokens, recorded.cached_tokens) == (7, 3, 2)
+
+    player = RecordReplayProvider("replay", tmp_path, speed=0)
+    with track_usage() as replayed:
+        assert [delta async for delta in player.stream_text_message("hi", "session")] == ["echo:", "hi"]
+    assert replayed == recorded
@@ -0,0 +1,73 @@
+import asyncio
+import datetime
+
+import pytest
+from src.agent.models import Agent
+from src.common.cache import Cache, InvalidationListener
+from src.core.database import AsyncSessionLocal
+from src.message.repository import MessageRepository
+from src.session.models import Session
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("redis")
+from src.common.redis_cache import RedisBackend  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+async def stored_session() -> Session:
+    async with AsyncSessionLocal() as db:
+        agent = Agent(name="cached agent", prompt="be brief", model="gpt-4o-mini")
+        db.add(agent)
+        await db.flush()
+        session = Session(agent_id=agent.id, title="cached session")
+        db.add(session)
+        await db.commit()
+        return await MessageRepository(db).get_session_by_id(session.id)
+
+
+def worker(server) -> tuple[RedisBackend, Cache]:
+    """The backend and session cache of one worker process sharing `server`."""
+    backend = RedisBackend(client=fakeredis.aioredis.FakeRedis(server=server))
+    return backend, Cache("sessions", backend, prefix="test", local_ttl=60)
+
+
+async def test_session_round_trips_through_redis_with_its_agent():
+    server = fakeredis.FakeServer()
+    _, writer = worker(server)
+    _, reader = worker(server)
+    session = await stored_session()
+
+    await writer.set(session.id, session)
+    cached = await reader.get(session.id)
+
+    assert cached is not session
+    assert (cached.id, cached.title, cached.agent_id) == (session.id, session.title, session.agent_id)
+    assert isinstance(cached.created_at, datetime.datetime)
+    assert cached.created_at == session.created_at
+    assert (cached.agent.id, cached.agent.prompt, cached.agent.model) == (session.agent.id, "be brief", "gpt-4o-mini")
+    assert cached.agent.created_at == session.agent.created_at
+
+
+async def test_invalidation_reaches_the_local_copy_of_another_worker():
+    server = fakeredis.FakeServer()
+    first_backend, first = worker(server)
+    second_backend, second = worker(server)
+    listener = InvalidationListener(second_backend, [second], prefix="test")
+    listener.start()
+    try:
+        await asyncio.sleep(0.05)  # subscribed
+        session = await stored_session()
+        await first.set(session.id, session)
+        assert (await second.get(session.id)).title == "cached session"  # now held locally for 60s
+
+        await first.invalidate(session.id)
+        for _ in range(100):
+            if await second.get(session.id) is None:
+                break
+            await asyncio.sleep(0.01)
+        assert await second.get(session.id) is None
+    finally:
+        await listener.stop()
+        await first_backend.aclose()
+        await second_backend.aclose()
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+from src.core import settings
+from src.llm_interaction.routing import choose_text_model
+from conftest import API
+
+
+@pytest.fixture
+def fast_model(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ROUTING_FAST_MODEL", "fast-model")
+    monkeypatch.setattr(settings, "LLM_ROUTING_MAX_CHARS", 20)
+
+
+def test_simple_turns_go_to_the_fast_model(fast_model):
+    agent = SimpleNamespace(model=None)
+    assert choose_text_model(agent, "hi there") == "fast-model"
+    assert choose_text_model(agent, "a message well over twenty characters") is None
+    assert choose_text_model(agent, "```x```") is None
+
+
+def test_routing_is_off_without_a_fast_model(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ROUTING_FAST_MODEL", None)
+    assert choose_text_model(SimpleNamespace(model=None), "hi there") is None
+
+
+def test_agent_model_beats_routing(fast_model, client, llm, monkeypatch):
+    models = []
+
+    async def send_text_message(content, session_id, prompt="", conversation_history=None, model=None):
+        models.append(model)
+        return f"echo:{content}"
+
+    monkeypatch.setattr(llm, "send_text_message", send_text_message)
+    pinned = client.post(f"{API}/agent/", json={"name": "pinned", "prompt": "p", "model": "agent-model"}).json()
+    routed = client.post(f"{API}/agent/", json={"name": "routed", "prompt": "p"}).json()
+    for agent in (pinned, routed):
+        session = client.post(f"{API}/session/", json={"agent_id": agent["id"]}).json()
+        assert client.post(f"{API}/message/text", json={"session_id": session["id"], "content": "hi there"}).status_code == 201
+
+    assert models == ["agent-model", "fast-model"]
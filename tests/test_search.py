@@ -0,0 +1,71 @@
+import datetime
+import sqlite3
+
+from conftest import API
+
+
+def _search(client, session_id: str, query: str) -> list[str]:
+    response = client.get(f"{API}/message/search", params={"q": query, "session_id": session_id})
+    assert response.status_code == 200
+    return [message["content"] for message in response.json()]
+
+
+def test_search_index_survives_renumbered_rowids(client, chat_session, database):
+    session_id = chat_session["id"]
+    for content in ("alpha one", "bravo two", "charlie three"):
+        assert client.post(f"{API}/message/text", json={"session_id": session_id, "content": content}).status_code == 201
+    assert sorted(_search(client, session_id, "charlie")) == ["charlie three", "echo:charlie three"]
+
+    # what a table copy (batch migration) or VACUUM may do to the implicit rowids of `messages`
+    with sqlite3.connect(database) as connection:
+        connection.execute("DELETE FROM messages WHERE content LIKE '%alpha one%'")
+        connection.execute("UPDATE messages SET rowid = rowid + 1000000")
+
+    assert sorted(_search(client, session_id, "charlie")) == ["charlie three", "echo:charlie three"]
+    assert sorted(_search(client, session_id, "bravo")) == ["bravo two", "echo:bravo two"]
+    assert _search(client, session_id, "alpha") == []
+
+
+def test_search_rejects_out_of_range_paging(client, chat_session):
+    for params in ({"limit": 0}, {"limit": -1}, {"limit": 101}, {"skip": -1}):
+        response = client.get(f"{API}/message/search", params={"q": "alpha", "session_id": chat_session["id"], **params})
+        assert response.status_code == 422, params
+
+
+def test_archived_session_is_searchable_again_once_rehydrated(client, chat_session, database):
+    from src.common import session_cache
+    from src.core.database import AsyncSessionLocal
+    from src.message.repository import MessageRepository
+    session_id = chat_session["id"]
+    client.post(f"{API}/message/text", json={"session_id": session_id, "content": "delta four"})
+    assert client.get(f"{API}/session/{session_id}").status_code == 200  # write-behind rows are flushed
+
+    async def archive():
+        async with AsyncSessionLocal() as db:
+            return await MessageRepository(db).archive_session(session_id, datetime.datetime.now() + datetime.timedelta(days=1), "zlib")
+
+    assert client.portal.call(archive) == 2
+    with sqlite3.connect(database) as connection:  # idle for longer than ARCHIVE_INACTIVE_DAYS
+        connection.execute("UPDATE sessions SET last_message_at = '2000-01-01 00:00:00' WHERE id = ?", (session_id,))
+    client.portal.call(session_cache.invalidate, session_id)
+
+    # archived messages are listed from the archive but not searched
+    assert [m["content"] for m in client.get(f"{API}/message/conversation/{session_id}").json()] == ["delta four", "echo:delta four"]
+    assert _search(client, session_id, "delta") == []
+
+    client.post(f"{API}/message/text", json={"session_id": session_id, "content": "echo five"})
+    assert sorted(_search(client, session_id, "delta")) == ["delta four", "echo:delta four"]
+
+
+def test_active_session_turns_skip_the_archive_lookup(client, chat_session, monkeypatch):
+    from src.message.repository import MessageRepository
+    lookups = []
+
+    async def rehydrate_session(self, session_id):
+        lookups.append(session_id)
+        return 0
+
+    monkeypatch.setattr(MessageRepository, "rehydrate_session", rehydrate_session)
+    for content in ("first turn", "second turn"):
+        assert client.post(f"{API}/message/text", json={"session_id": chat_session["id"], "content": content}).status_code == 201
+    assert lookups == []
@@ -0,0 +1,27 @@
+import threading
+import time
+
+from conftest import API
+
+
+def test_long_poll_on_upper_case_session_id_is_woken(client, chat_session):
+    session_id = chat_session["id"]
+    first = client.post(f"{API}/message/text", json={"session_id": session_id, "content": "hello"}).json()
+    later = threading.Timer(0.3, client.post, args=(f"{API}/message/text",), kwargs={"json": {"session_id": session_id, "content": "later"}})
+    later.start()
+    started = time.perf_counter()
+    response = client.get(f"{API}/message/conversation/{session_id.upper()}/since/{first['id']}", params={"wait": 5})
+    later.join()
+    assert response.status_code == 200
+    assert response.json()[0]["content"] == "later"
+    assert time.perf_counter() - started < 4
+
+
+def test_long_poll_on_unknown_session_is_not_found(client):
+    started = time.perf_counter()
+    response = client.get(
+        f"{API}/message/conversation/018e0864-8ee0-7f92-a139-7a6b4db524bb/since/018e0864-8ee0-7f92-a139-7a6b4db524bb",
+        params={"wait": 5},
+    )
+    assert response.status_code == 404
+    assert time.perf_counter() - started < 4
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import create_engine, text
+from uuid_utils import uuid7
+from src.core import settings
+from src.common.uuid_storage import check_uuid_storage, convert_uuid_storage, stored_as_binary
+from conftest import API
+
+
+def test_ids_convert_to_binary_and_back(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ids.db'}")
+    agent_id, session_id, archive_id = (str(uuid7()) for _ in range(3))
+    with engine.begin() as connection:
+        assert stored_as_binary(connection) is None  # no agents table yet
+        connection.execute(text("CREATE TABLE agents (id VARCHAR(36) PRIMARY KEY)"))
+        connection.execute(text("CREATE TABLE sessions (id VARCHAR(36) PRIMARY KEY, agent_id VARCHAR(36))"))
+        connection.execute(text("CREATE TABLE message_archives (id VARCHAR(36) PRIMARY KEY, session_id VARCHAR(36), last_message_id VARCHAR(36))"))
+        connection.execute(text("INSERT INTO agents VALUES (:a)"), {"a": agent_id})
+        connection.execute(text("INSERT INTO sessions VALUES (:s, :a)"), {"s": session_id, "a": agent_id})
+        connection.execute(text("INSERT INTO message_archives VALUES (:r, :s, :s)"), {"r": archive_id, "s": session_id})
+        assert stored_as_binary(connection) is False
+
+        assert convert_uuid_storage(connection, binary=True) == 6
+        assert convert_uuid_storage(connection, binary=True) == 0
+        assert stored_as_binary(connection) is True
+        row = connection.execute(text("SELECT s.id, a.id FROM sessions s JOIN agents a ON a.id = s.agent_id")).one()
+        assert len(row[0]) == len(row[1]) == 16
+
+        assert convert_uuid_storage(connection, binary=False) == 6
+        assert connection.execute(text("SELECT * FROM message_archives")).one() == (archive_id, session_id, session_id)
+
+
+def test_startup_refuses_ids_stored_in_the_other_form(client, chat_session, monkeypatch):
+    client.portal.call(check_uuid_storage)
+    monkeypatch.setattr(settings, "DB_BINARY_UUID", True)
+    with pytest.raises(RuntimeError, match="stored as text"):
+        client.portal.call(check_uuid_storage)
+
+
+def test_upper_case_ids_are_normalized(client, chat_session):
+    response = client.get(f"{API}/session/{chat_session['id'].upper()}")
+    assert response.status_code == 200
+    assert response.json()["id"] == chat_session["id"]
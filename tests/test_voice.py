@@ -0,0 +1,22 @@
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from benchmarks.fake_openai import mp3_silence
+from conftest import API
+
+
+def test_reply_is_kept_when_text_to_speech_fails(client, chat_session, llm, monkeypatch):
+    async def failing_text_to_speech(*args, **kwargs):
+        raise APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/audio/speech"))
+
+    monkeypatch.setattr(llm, "text_to_speech", failing_text_to_speech)
+    session_id = chat_session["id"]
+    # answered with 503 by the exception handler, the test client raises it as well
+    with pytest.raises(APIConnectionError):
+        client.post(
+            f"{API}/message/voice", data={"session_id": session_id}, files={"voice_note": ("note.mp3", mp3_silence(1), "audio/mpeg")}
+        )
+
+    conversation = client.get(f"{API}/message/conversation/{session_id}").json()
+    assert [message["content"] for message in conversation] == ["transcript", "echo:transcript"]
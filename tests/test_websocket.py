@@ -0,0 +1,19 @@
+from sqlalchemy.exc import OperationalError
+
+from src.message.repository import MessageRepository
+from conftest import API
+
+
+def test_database_error_in_a_turn_keeps_the_socket_open(client, chat_session, monkeypatch):
+    async def failing_create(self, message):
+        raise OperationalError("INSERT INTO messages", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(MessageRepository, "create", failing_create)
+    with client.websocket_connect(f"{API}/message/ws/{chat_session['id']}") as websocket:
+        assert websocket.receive_json()["type"] == "ready"
+        websocket.send_text("hello there")
+        assert websocket.receive_json() == {
+            "type": "error", "status": 500, "detail": "A database error occurred. Please try again later.",
+        }
+        websocket.send_text("x")
+        assert websocket.receive_json()["status"] == 422